@@ -22,11 +22,21 @@ class Settings(BaseSettings):
     DATABASE_NAME: str = Field(default="amazon_inventory", description="Database name")
     DATABASE_MIN_CONNECTIONS: int = Field(default=5, description="Minimum database connections")
     DATABASE_MAX_CONNECTIONS: int = Field(default=20, description="Maximum database connections")
+    DATABASE_STATEMENT_CACHE_SIZE: int = Field(default=256, description="Prepared write statements cached per connection")
     
     # Report processing configuration
-    MAX_REPORT_SIZE_MB: int = Field(default=100, description="Maximum report file size in MB")
+    MAX_REPORT_SIZE_MB: int = Field(default=4096, description="Maximum report file size in MB (0 disables the limit)")
     REPORT_CHUNK_SIZE: int = Field(default=1000, description="Number of rows to process in a chunk")
+    REPORT_MEMORY_BUDGET_MB: int = Field(default=64, description="Memory budget for a single parsed report chunk in MB")
     UPLOAD_FOLDER: str = Field(default="/app/uploads", description="Folder for uploaded reports")
+    BULK_INGEST_ENABLED: bool = Field(default=True, description="Load report chunks with COPY and a set-based merge")
+    REPORT_WRITER_CONCURRENCY: int = Field(default=4, description="Number of concurrent chunk writers per report")
+    REPORT_WRITER_QUEUE_SIZE: int = Field(default=2, description="Chunk partitions queued per writer before parsing waits")
+    PARSE_WORKERS: int = Field(default=2, description="Processes used to parse report chunks (0 parses in a thread)")
+    MAX_CONCURRENT_INGESTS: int = Field(default=2, description="Reports processed at the same time per replica")
+    REPORT_DEDUPE_ENABLED: bool = Field(default=True, description="Skip reports whose content matches an already completed upload")
+    PROGRESS_INTERVAL_SECONDS: float = Field(default=2.0, description="Minimum seconds between progress writes for a report")
+    INGEST_STALE_AFTER_SECONDS: int = Field(default=300, description="Seconds without progress after which a processing file is resumed on startup")
     
     # CORS configuration
     ALLOWED_ORIGINS: list = Field(default=["*"], description="Allowed origins for CORS")
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, HTTPException, Depends, Query
+from uuid import UUID
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from typing import Optional, List, Dict, Any
@@ -6,9 +7,14 @@ import logging
 from datetime import datetime
 
 from app.database import get_db_pool, close_db_pool, Database
-from app.models import ProductResponse, ProductIdentifier, ErrorResponse
+from app.parsing import get_parse_executor, close_parse_executor
+from app.models import (
+    ProductResponse, ProductIdentifier, ErrorResponse, ReportJobResponse, ReportStatusResponse,
+    ReportErrorsResponse, ReportRowError
+)
 from app.config import settings
-from app.processor import ReportProcessor
+from app.jobs import submit_report, cancel_jobs, resume_interrupted_reports
+from app.reader import ReportTooLargeError
 
 # Configure logging
 logging.basicConfig(
@@ -36,14 +42,21 @@ app.add_middleware(
 # Startup and shutdown events
 @app.on_event("startup")
 async def startup():
-    """Initialize database connection pool on startup"""
-    await get_db_pool()
+    """Initialize database connection pool and report parsing pool, then resume interrupted reports"""
+    db = await get_db_pool()
+    get_parse_executor()
+    try:
+        await resume_interrupted_reports(db)
+    except Exception as e:
+        logger.error(f"Failed to resume interrupted reports: {str(e)}")
     logger.info("Application started, database connection pool initialized")
 
 @app.on_event("shutdown")
 async def shutdown():
-    """Close database connection pool on shutdown"""
+    """Stop ingest jobs, then close database connection pool and report parsing pool on shutdown"""
+    await cancel_jobs()
     await close_db_pool()
+    close_parse_executor()
     logger.info("Application shutting down, database connections closed")
 
 # Health check endpoint
@@ -183,21 +196,151 @@ async def batch_get_products(
     return response
 
 # Upload new report endpoint
-@app.post("/api/reports/upload")
+@app.post(
+    "/api/reports/upload",
+    response_model=ReportJobResponse,
+    status_code=202,
+    responses={404: {"model": ErrorResponse}, 413: {"model": ErrorResponse}},
+)
 async def upload_report(
     file_path: str,
     db: Database = Depends(get_db_pool),
 ):
     """
-    Process a new All Listing Report file
+    Queue a new All Listing Report file for processing
+    
+    Returns as soon as the file is registered; poll `GET /api/reports/{file_id}`
+    for progress.
     
     - **file_path**: Path to the report file
     """
     try:
-        # Create and use the report processor
-        processor = ReportProcessor(db=db)
-        result = await processor.process_report(file_path)
-        return result
+        file_id = await submit_report(db, file_path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ReportTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        logger.error(f"Error processing report: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to process report: {str(e)}") 
\ No newline at end of file
+        logger.error(f"Error queuing report: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue report: {str(e)}")
+    
+    return ReportJobResponse(
+        file_id=file_id,
+        status="pending",
+        message="Report queued for processing"
+    )
+
+# Report status endpoint
+@app.get(
+    "/api/reports/{file_id}",
+    response_model=ReportStatusResponse,
+    responses={404: {"model": ErrorResponse}},
+)
+async def get_report_status(
+    file_id: UUID,
+    db: Database = Depends(get_db_pool),
+):
+    """
+    Get the live status of a report ingest
+    
+    - **file_id**: ID returned by the upload endpoint
+    """
+    query = """
+        SELECT 
+            id,
+            original_name,
+            status,
+            total_rows,
+            processed_rows,
+            error_message,
+            created_at,
+            updated_at,
+            completed_at,
+            EXTRACT(EPOCH FROM (COALESCE(completed_at, NOW()) - created_at)) AS elapsed_seconds,
+            (SELECT COUNT(*) FROM report_row_errors e WHERE e.file_id = uploaded_files.id) AS error_rows
+        FROM 
+            uploaded_files
+        WHERE 
+            id = $1
+    """
+    
+    result = await db.fetch_one(query, str(file_id))
+    
+    if not result:
+        raise HTTPException(status_code=404, detail=f"Report {file_id} not found")
+    
+    processed_rows = result["processed_rows"] or 0
+    total_rows = result["total_rows"]
+    elapsed_seconds = float(result["elapsed_seconds"] or 0)
+    
+    return ReportStatusResponse(
+        file_id=str(result["id"]),
+        original_name=result["original_name"],
+        status=result["status"],
+        total_rows=total_rows,
+        processed_rows=processed_rows,
+        progress_percentage=round(processed_rows * 100 / total_rows, 1) if total_rows else 0,
+        rows_per_second=round(processed_rows / elapsed_seconds, 1) if elapsed_seconds > 0 else None,
+        error_message=result["error_message"],
+        error_rows=result["error_rows"] or 0,
+        created_at=result["created_at"],
+        updated_at=result["updated_at"],
+        completed_at=result["completed_at"]
+    )
+
+# Rejected report rows endpoint
+@app.get(
+    "/api/reports/{file_id}/errors",
+    response_model=ReportErrorsResponse,
+    responses={404: {"model": ErrorResponse}},
+)
+async def get_report_errors(
+    file_id: UUID,
+    page: int = Query(1, ge=1, description="Page number, starting at 1"),
+    limit: int = Query(100, ge=1, le=1000, description="Number of rows per page"),
+    db: Database = Depends(get_db_pool),
+):
+    """
+    List the rows rejected while ingesting a report, in report order
+    
+    - **file_id**: ID returned by the upload endpoint
+    - **page**: Page number, starting at 1
+    - **limit**: Number of rows per page
+    """
+    count_query = """
+        SELECT 
+            (SELECT COUNT(*) FROM report_row_errors WHERE file_id = $1) AS total_count
+        FROM 
+            uploaded_files
+        WHERE 
+            id = $1
+    """
+    
+    result = await db.fetch_one(count_query, str(file_id))
+    
+    if not result:
+        raise HTTPException(status_code=404, detail=f"Report {file_id} not found")
+    
+    query = """
+        SELECT 
+            row_number,
+            sku,
+            message
+        FROM 
+            report_row_errors
+        WHERE 
+            file_id = $1
+        ORDER BY 
+            row_number
+        LIMIT $2 OFFSET $3
+    """
+    
+    rows = await db.fetch_all(query, str(file_id), limit, (page - 1) * limit)
+    
+    return ReportErrorsResponse(
+        file_id=str(file_id),
+        errors=[ReportRowError(**row) for row in rows],
+        page=page,
+        limit=limit,
+        total_count=result["total_count"]
+    )
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any, Union
+from datetime import datetime
 
 class ProductIdentifier(BaseModel):
     """Product identifier model (EAN or UPC)"""
@@ -22,6 +23,46 @@ class ReportProcessingResult(BaseModel):
     errors: List[Dict[str, Any]] = []
     status: str
     message: str
+    inserted_rows: int = 0
+    updated_rows: int = 0
+    unchanged_rows: int = 0
+    duplicate_of: Optional[str] = Field(None, description="ID of an earlier upload with identical content")
+    duplicate_skus: Dict[str, List[int]] = Field({}, description="Row offsets (0 is the first row after the header) of each SKU that appears more than once")
+
+class ReportJobResponse(BaseModel):
+    """Response for a report accepted for background processing"""
+    file_id: str
+    status: str
+    message: str
+
+class ReportStatusResponse(BaseModel):
+    """Live status of a report ingest"""
+    file_id: str
+    original_name: str
+    status: str = Field(..., description="'pending', 'processing', 'completed' or 'error'")
+    total_rows: Optional[int] = None
+    processed_rows: int = 0
+    progress_percentage: float = 0
+    rows_per_second: Optional[float] = Field(None, description="Average throughput since the report was queued")
+    error_message: Optional[str] = None
+    error_rows: int = Field(0, description="Rows rejected so far, listed by GET /api/reports/{file_id}/errors")
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+class ReportRowError(BaseModel):
+    """A report row that was rejected during an ingest"""
+    row_number: int = Field(..., description="Row in the report, 1 for the first row after the header")
+    sku: Optional[str] = None
+    message: str
+
+class ReportErrorsResponse(BaseModel):
+    """One page of the rows rejected from a report"""
+    file_id: str
+    errors: List[ReportRowError]
+    page: int
+    limit: int
+    total_count: int
 
 class DatabaseRow(BaseModel):
     """Database row model from listings table"""
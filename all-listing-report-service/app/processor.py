@@ -2,16 +2,33 @@ import os
 import logging
 import pandas as pd
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, AsyncIterable, Tuple, Union
 import uuid
+import json
 from datetime import datetime
 
+from app.config import settings
 from app.database import Database
+from app.duplicates import DuplicateSkuDetector
 from app.models import ReportProcessingResult
+from app.parsing import get_parse_executor, parse_report_chunks
+from app.progress import ProgressReporter
+from app.reader import check_report_size, estimate_chunk_rows, iter_report_skus, scan_report
+from app.transform import normalize_listing_columns, present_sku_mask, row_fingerprints, to_records, to_text_records
+from app.writers import iterate_chunks, run_chunk_writers
 
 # Configure logging
 logger = logging.getLogger("report-processor")
 
+# Name recorded in upload checkpoints, so each service only resumes its own files
+PROCESSOR_NAME = 'all-listing-report-service'
+
+# Listings column holding the fingerprint of a row's report columns
+ROW_HASH_COLUMN = 'row_hash'
+
+# Listings columns that are never taken from the report
+MANAGED_COLUMNS = ('id', 'file_id', ROW_HASH_COLUMN)
+
 class ReportProcessor:
     """Class to process Amazon All Listing Report files"""
     
@@ -19,12 +36,46 @@ class ReportProcessor:
         """Initialize with database connection"""
         self.db = db
     
-    async def process_report(self, file_path: str) -> ReportProcessingResult:
+    async def queue_report(self, file_path: str) -> str:
+        """
+        Register a report file for processing by a background ingest job
+        
+        Args:
+            file_path: Path to the report file
+            
+        Returns:
+            ID of the registered file, to be passed to process_report
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        # Reject reports above the configured size before accepting them
+        check_report_size(file_path, settings.MAX_REPORT_SIZE_MB)
+        
+        file_id = str(uuid.uuid4())
+        await self._register_file(
+            file_id=file_id,
+            original_name=os.path.basename(file_path),
+            file_path=file_path,
+            total_rows=None,
+            status="pending"
+        )
+        
+        return file_id
+    
+    async def process_report(
+        self,
+        file_path: str,
+        file_id: Optional[str] = None,
+        resume: bool = False
+    ) -> ReportProcessingResult:
         """
         Process an Amazon All Listing Report file
         
         Args:
             file_path: Path to the report file
+            file_id: ID from queue_report, or None to register the file here
+            resume: Continue an interrupted file from its last checkpoint
             
         Returns:
             ReportProcessingResult with processing statistics
@@ -42,33 +93,75 @@ class ReportProcessor:
             )
         
         try:
-            # Create a unique ID for this file
-            file_id = str(uuid.uuid4())
-            
-            # Read the report file
-            df = pd.read_csv(file_path, sep='\t', encoding='utf-8')
-            total_rows = len(df)
+            # Create a unique ID for this file unless it was queued
+            file_id = file_id or str(uuid.uuid4())
             
-            # Log the number of rows found
-            logger.info(f"Found {total_rows} rows in report file")
+            # Reject reports above the configured size before reading them
+            check_report_size(file_path, settings.MAX_REPORT_SIZE_MB)
             
-            # Check for and handle duplicate SKUs in the input file
-            duplicate_skus = df[df.duplicated(subset=['seller-sku'], keep=False)]
-            has_duplicates = len(duplicate_skus) > 0
+            # Count rows and hash the content in one pass without parsing,
+            # so the whole report is never held in memory
+            loop = asyncio.get_running_loop()
+            executor = get_parse_executor()
+            total_rows, content_hash = await loop.run_in_executor(executor, scan_report, file_path)
             
-            if has_duplicates:
-                logger.warning(f"Found {len(duplicate_skus)} duplicate SKUs in the report")
+            # Log the number of rows found
+            logger.info(f"Found {total_rows} rows in report file (sha256 {content_hash})")
             
             # Register the file in the database
             await self._register_file(
                 file_id=file_id,
                 original_name=os.path.basename(file_path),
                 file_path=file_path,
-                total_rows=total_rows
+                total_rows=total_rows,
+                content_hash=content_hash
+            )
+            
+            # Skip the write phase for a byte-identical report that was already processed
+            if settings.REPORT_DEDUPE_ENABLED:
+                previous = await self._find_processed_file(content_hash, exclude_file_id=file_id)
+                if previous:
+                    return await self._complete_duplicate_file(file_id, previous)
+            
+            # Skip the rows an interrupted run already wrote
+            start_row, processed_before = 0, 0
+            if resume:
+                start_row, processed_before = await self._load_checkpoint(file_id)
+                logger.info(f"Resuming file {file_id} at row {start_row} ({processed_before} rows already processed)")
+            
+            # Rows from here on are written again, so drop their earlier errors
+            await self._clear_row_errors(file_id, after_row=start_row)
+            
+            # Stream the report in chunks sized to the memory budget
+            chunk_size = estimate_chunk_rows(
+                file_path,
+                memory_budget_mb=settings.REPORT_MEMORY_BUDGET_MB,
+                max_rows=settings.REPORT_CHUNK_SIZE
             )
             
-            # Process the file rows
-            processed_rows = await self._process_file_rows(df, file_id)
+            # Parse and normalize chunks in the process pool, off the event loop
+            chunks = parse_report_chunks(
+                file_path,
+                chunk_rows=chunk_size,
+                prepare=prepare_chunk,
+                executor=executor,
+                start_row=start_row
+            )
+            
+            # Process the file rows, with the SKUs of skipped rows already
+            # seen so duplicate groups spanning the checkpoint are complete
+            duplicates = DuplicateSkuDetector()
+            if start_row:
+                await loop.run_in_executor(None, detect_skus_before, duplicates, file_path, chunk_size, start_row)
+            row_counts = new_row_counts()
+            processed_rows = await self._process_file_rows(
+                chunks,
+                file_id,
+                row_counts,
+                start_row=start_row,
+                processed_before=processed_before,
+                duplicates=duplicates
+            )
             
             # Update file status to completed
             await self._update_file_status(
@@ -82,9 +175,22 @@ class ReportProcessor:
                 processed_rows=processed_rows,
                 errors=[],
                 status="success",
-                message=f"Successfully processed {processed_rows} rows"
+                message=(
+                    f"Successfully processed {processed_rows} rows "
+                    f"({row_counts['inserted']} inserted, {row_counts['updated']} updated, "
+                    f"{row_counts['unchanged']} unchanged)"
+                ),
+                inserted_rows=row_counts['inserted'],
+                updated_rows=row_counts['updated'],
+                unchanged_rows=row_counts['unchanged'],
+                duplicate_skus=duplicates.groups
             )
             
+        except asyncio.CancelledError:
+            # The service is shutting down; leave the file to be resumed on restart
+            await self.set_file_interrupted(file_id)
+            raise
+            
         except Exception as e:
             error_msg = f"Error processing report: {str(e)}"
             logger.error(error_msg, exc_info=True)
@@ -107,26 +213,45 @@ class ReportProcessor:
                 message=error_msg
             )
     
-    async def _register_file(self, file_id: str, original_name: str, file_path: str, total_rows: int) -> None:
+    async def _register_file(
+        self,
+        file_id: str,
+        original_name: str,
+        file_path: str,
+        total_rows: Optional[int],
+        status: str = "processing",
+        content_hash: Optional[str] = None
+    ) -> None:
         """
         Register a file in the database before processing
         
+        A file that was already registered by queue_report is moved to the
+        new status and row count instead, keeping its checkpoint.
+        
         Args:
             file_id: Unique ID for this file
             original_name: Original filename
             file_path: Path to the file
-            total_rows: Total number of rows in the file
+            total_rows: Total number of rows in the file (None if not counted yet)
+            status: Initial status ('pending' or 'processing')
+            content_hash: Hex SHA-256 of the file content (None if not hashed yet)
         """
         file_size = os.path.getsize(file_path)
         
         query = """
             INSERT INTO uploaded_files (
                 id, original_name, file_path, file_size, mime_type, 
-                status, total_rows, created_at, updated_at
+                status, total_rows, content_hash, checkpoint, created_at, updated_at
             ) VALUES (
                 $1, $2, $3, $4, 'text/tab-separated-values',
-                'processing', $5, NOW(), NOW()
+                $6, $5, $7, $8::jsonb, NOW(), NOW()
             )
+            ON CONFLICT (id) DO UPDATE SET
+                status = EXCLUDED.status,
+                total_rows = EXCLUDED.total_rows,
+                content_hash = EXCLUDED.content_hash,
+                checkpoint = COALESCE(uploaded_files.checkpoint, EXCLUDED.checkpoint),
+                updated_at = NOW()
         """
         
         await self.db.execute(
@@ -135,11 +260,197 @@ class ReportProcessor:
             original_name,
             file_path,
             file_size,
-            total_rows
+            total_rows,
+            status,
+            content_hash,
+            json.dumps({"processor": PROCESSOR_NAME, "rows": 0, "processed_rows": 0})
         )
         
         logger.info(f"Registered file with ID {file_id} and {total_rows} rows")
     
+    async def _find_processed_file(self, content_hash: str, exclude_file_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the most recent completed file with the same content
+        
+        Args:
+            content_hash: Hex SHA-256 of the file content
+            exclude_file_id: ID of the file being processed
+            
+        Returns:
+            Dictionary with the id and processed_rows of the earlier file, or None
+        """
+        query = """
+            SELECT id, processed_rows
+            FROM uploaded_files
+            WHERE content_hash = $1 AND status = 'completed' AND id <> $2
+            ORDER BY completed_at DESC
+            LIMIT 1
+        """
+        
+        return await self.db.fetch_one(query, content_hash, exclude_file_id)
+    
+    async def _complete_duplicate_file(self, file_id: str, previous: Dict[str, Any]) -> ReportProcessingResult:
+        """
+        Mark a re-uploaded file as completed with the result of its earlier upload
+        
+        Args:
+            file_id: ID of the file being processed
+            previous: Earlier file with the same content
+            
+        Returns:
+            ReportProcessingResult copied from the earlier upload
+        """
+        previous_id = str(previous["id"])
+        processed_rows = previous["processed_rows"] or 0
+        
+        await self._update_file_status(
+            file_id=file_id,
+            status="completed",
+            processed_rows=processed_rows
+        )
+        
+        logger.info(f"File {file_id} has the same content as {previous_id}; skipped writing {processed_rows} rows")
+        
+        return ReportProcessingResult(
+            processed_rows=processed_rows,
+            errors=[],
+            status="success",
+            message=f"Report already processed as file {previous_id}; skipped {processed_rows} rows",
+            duplicate_of=previous_id
+        )
+    
+    async def claim_interrupted_files(self) -> List[Dict[str, Any]]:
+        """
+        Claim files this service was processing when a replica stopped
+        
+        A file qualifies if it was interrupted by a shutdown, or if it is still
+        marked as processing but its progress has not been written for
+        INGEST_STALE_AFTER_SECONDS. Claimed files are moved back to processing,
+        so other replicas do not pick them up as well.
+        
+        Returns:
+            List of dictionaries with the id and file_path of each claimed file
+        """
+        query = """
+            UPDATE uploaded_files
+            SET status = 'processing', updated_at = NOW()
+            WHERE id IN (
+                SELECT id FROM uploaded_files
+                WHERE checkpoint->>'processor' = $1
+                  AND (
+                      status = 'interrupted'
+                      OR (status = 'processing' AND updated_at < NOW() - make_interval(secs => $2))
+                  )
+                ORDER BY created_at
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, file_path
+        """
+        
+        rows = await self.db.fetch_all(query, PROCESSOR_NAME, float(settings.INGEST_STALE_AFTER_SECONDS))
+        return [{"id": str(row["id"]), "file_path": row["file_path"]} for row in rows]
+    
+    async def _load_checkpoint(self, file_id: str) -> Tuple[int, int]:
+        """
+        Get the resume point of an interrupted file
+        
+        Args:
+            file_id: ID of the file
+            
+        Returns:
+            Tuple of (data rows already written, rows processed by then)
+        """
+        row = await self.db.fetch_one("SELECT checkpoint FROM uploaded_files WHERE id = $1", file_id)
+        checkpoint = row["checkpoint"] if row else None
+        if isinstance(checkpoint, str):
+            checkpoint = json.loads(checkpoint)
+        checkpoint = checkpoint or {}
+        
+        return int(checkpoint.get("rows", 0)), int(checkpoint.get("processed_rows", 0))
+    
+    async def set_file_interrupted(self, file_id: str) -> None:
+        """
+        Mark a file as interrupted, keeping its checkpoint and progress
+        
+        Also used for a queued file whose job was cancelled before it started,
+        so claim_interrupted_files picks it up on the next start.
+        
+        Args:
+            file_id: ID of the file
+        """
+        await self.db.execute(
+            """
+            UPDATE uploaded_files
+            SET status = 'interrupted',
+                error_message = 'Processing was interrupted by a service shutdown',
+                updated_at = NOW()
+            WHERE id = $1
+            """,
+            file_id
+        )
+        
+        logger.info(f"Marked file {file_id} as interrupted")
+    
+    async def _save_progress(
+        self,
+        file_id: str,
+        processed_rows: int,
+        checkpoint: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Write the progress of a file being processed
+        
+        Args:
+            file_id: ID of the file
+            processed_rows: Number of successfully processed rows
+            checkpoint: Optional new resume point, merged into the stored checkpoint
+        """
+        query = """
+            UPDATE uploaded_files
+            SET processed_rows = $2,
+                checkpoint = COALESCE(checkpoint, '{}'::jsonb) || COALESCE($3::jsonb, '{}'::jsonb),
+                updated_at = NOW()
+            WHERE id = $1
+        """
+        
+        await self.db.execute(
+            query,
+            file_id,
+            processed_rows,
+            json.dumps(checkpoint) if checkpoint else None
+        )
+    
+    async def _record_row_errors(self, file_id: str, errors: List[Dict[str, Any]]) -> None:
+        """
+        Store rejected rows in report_row_errors with a single COPY
+        
+        Args:
+            file_id: ID of the file being processed
+            errors: Errors from _process_chunk_rows
+        """
+        await self.db.copy_records(
+            "report_row_errors",
+            columns=["file_id", "row_number", "sku", "message"],
+            records=[
+                (file_id, error["row_number"], _text_or_none(error["sku"]), error["message"])
+                for error in errors
+            ]
+        )
+    
+    async def _clear_row_errors(self, file_id: str, after_row: int = 0) -> None:
+        """
+        Delete the stored errors of a file's rows after a report row
+        
+        Args:
+            file_id: ID of the file
+            after_row: Report row offset; errors of rows up to and including it are kept
+        """
+        await self.db.execute(
+            "DELETE FROM report_row_errors WHERE file_id = $1 AND row_number > $2",
+            file_id,
+            after_row
+        )
+    
     async def _update_file_status(
         self, 
         file_id: str, 
@@ -176,128 +487,347 @@ class ReportProcessor:
         
         logger.info(f"Updated file {file_id} status to {status}")
     
-    async def _process_file_rows(self, df: pd.DataFrame, file_id: str) -> int:
+    async def _process_file_rows(
+        self,
+        chunks: Union[Iterable[pd.DataFrame], AsyncIterable[pd.DataFrame]],
+        file_id: str,
+        row_counts: Optional[Dict[str, int]] = None,
+        start_row: int = 0,
+        processed_before: int = 0,
+        duplicates: Optional[DuplicateSkuDetector] = None
+    ) -> int:
         """
         Process all rows in the report file
         
         Args:
-            df: Pandas DataFrame with the report data
+            chunks: Chunks with the report data, already passed through prepare_chunk
             file_id: ID of the file being processed
+            row_counts: Optional counts of inserted, updated and unchanged listings, filled in place
+            start_row: Report row of the first chunk, when resuming from a checkpoint
+            processed_before: Rows processed before start_row
+            duplicates: Detector collecting the duplicated SKUs of the report, updated in place
             
         Returns:
             Number of successfully processed rows
         """
-        # Standardize column names
-        df.columns = [col.strip().lower() for col in df.columns]
-        
-        # Map column names to database fields (if needed)
-        # This allows flexibility in case the report format changes slightly
-        column_mapping = {
-            'seller-sku': 'seller-sku',
-            'asin1': 'asin1',
-            'asin': 'asin1',  # Handle alternate column name
-            'product-id': 'product-id',
-            'product-id-type': 'product-id-type',
-            # Add other mappings as needed
-        }
-        
-        # Rename columns if needed
-        for source, target in column_mapping.items():
-            if source in df.columns and source != target:
-                df[target] = df[source]
-        
-        # Count successful inserts
-        successful_rows = 0
-        errors = []
-        
-        # Process in chunks to avoid memory issues with large files
-        chunk_size = 1000
-        for i in range(0, len(df), chunk_size):
-            chunk = df.iloc[i:i+chunk_size]
-            logger.info(f"Processing chunk {i//chunk_size + 1}/{(len(df) + chunk_size - 1)//chunk_size}")
+        # Count successful inserts and rejected rows
+        successful_rows = processed_before
+        error_rows = 0
+        if row_counts is None:
+            row_counts = new_row_counts()
+        
+        # Progress is written from a background task at most once per interval
+        progress = ProgressReporter(
+            lambda processed_rows, checkpoint: self._save_progress(file_id, processed_rows, checkpoint),
+            interval=settings.PROGRESS_INTERVAL_SECONDS,
+            processed_rows=processed_before
+        )
+        
+        # Report row after each chunk and rows written per chunk, kept until the
+        # chunk and every chunk before it are fully written
+        chunk_end_rows: Dict[int, int] = {}
+        chunk_written_rows: Dict[int, int] = {}
+        checkpoint_chunk = 0
+        checkpoint_rows = start_row
+        checkpoint_processed = processed_before
+        
+        def save_checkpoint(committed_chunk: int) -> None:
+            nonlocal checkpoint_chunk, checkpoint_rows, checkpoint_processed
+            while checkpoint_chunk < committed_chunk:
+                checkpoint_chunk += 1
+                checkpoint_rows = chunk_end_rows.pop(checkpoint_chunk)
+                checkpoint_processed += chunk_written_rows.pop(checkpoint_chunk, 0)
+            progress.set_checkpoint({"rows": checkpoint_rows, "processed_rows": checkpoint_processed})
+        
+        # Duplicated SKUs across the file, found in one hash-based pass
+        if duplicates is None:
+            duplicates = DuplicateSkuDetector()
+        
+        async def detect_duplicates():
+            # Receive one chunk at a time to keep memory bounded on large files
+            chunk_number = 0
+            next_row = start_row
+            async for chunk in iterate_chunks(chunks):
+                chunk_number += 1
+                next_row += len(chunk)
+                chunk_end_rows[chunk_number] = next_row
+                logger.info(f"Processing chunk {chunk_number} ({len(chunk)} rows)")
+                
+                # Check for duplicate SKUs in the input file
+                if 'seller-sku' in chunk.columns:
+                    duplicates.add(chunk['seller-sku'])
+                
+                yield chunk
+        
+        async def write_chunk(chunk_number: int, chunk: pd.DataFrame) -> None:
+            nonlocal successful_rows, error_rows
             
-            # Process each row in the chunk
-            for _, row in chunk.iterrows():
+            if settings.BULK_INGEST_ENABLED:
                 try:
-                    # Extract data from the row
-                    sku = row.get('seller-sku')
-                    
-                    if not sku:
-                        logger.warning(f"Skipping row with missing SKU")
-                        continue
-                    
-                    # Check if this SKU already exists
-                    existing = await self.db.fetch_one(
-                        "SELECT id FROM listings WHERE \"seller-sku\" = $1",
-                        sku
-                    )
-                    
-                    # Convert row data to a dict for database
-                    listing_data = row.to_dict()
-                    
-                    # Add file_id to the data
-                    listing_data['file_id'] = file_id
-                    
-                    if existing:
-                        # Update existing listing
-                        # Build dynamic query based on available columns
-                        columns = []
-                        values = []
-                        for key, value in listing_data.items():
-                            # Skip certain columns or null values if needed
-                            if key == 'id':
-                                continue
-                            
-                            # Add column to update
-                            columns.append(f"\"{key}\" = ${len(values) + 2}")
-                            values.append(value)
-                        
-                        # Only update if we have columns to update
-                        if columns:
-                            query = f"""
-                                UPDATE listings
-                                SET {', '.join(columns)}
-                                WHERE id = $1
-                            """
-                            await self.db.execute(query, existing["id"], *values)
-                    else:
-                        # Insert new listing
-                        # Build dynamic query based on available columns
-                        columns = []
-                        placeholders = []
-                        values = []
-                        
-                        for key, value in listing_data.items():
-                            # Don't insert 'id' as it's auto-generated
-                            if key == 'id':
-                                continue
-                                
-                            columns.append(f"\"{key}\"")
-                            placeholders.append(f"${len(values) + 1}")
-                            values.append(value)
-                        
-                        query = f"""
-                            INSERT INTO listings ({', '.join(columns)})
-                            VALUES ({', '.join(placeholders)})
-                        """
-                        await self.db.execute(query, *values)
-                    
-                    successful_rows += 1
-                    
-                    # Update processed rows count in the database periodically
-                    if successful_rows % 100 == 0:
-                        await self._update_file_status(
-                            file_id=file_id,
-                            status="processing",
-                            processed_rows=successful_rows
-                        )
-                
+                    written_rows = await self._bulk_upsert_chunk(chunk, file_id, row_counts)
+                    successful_rows += written_rows
+                    chunk_written_rows[chunk_number] = chunk_written_rows.get(chunk_number, 0) + written_rows
+                    progress.add(written_rows)
+                    return
                 except Exception as e:
-                    error_msg = f"Error processing row with SKU {row.get('seller-sku', 'unknown')}: {str(e)}"
-                    logger.error(error_msg)
-                    errors.append({"sku": row.get('seller-sku'), "message": str(e)})
+                    # Fall back to row-by-row processing so a single bad row
+                    # does not reject the whole chunk
+                    logger.warning(f"Bulk upsert failed for chunk {chunk_number}, retrying row by row: {str(e)}")
+            
+            chunk_rows, chunk_errors = await self._process_chunk_rows(chunk, file_id, row_counts, progress)
+            successful_rows += chunk_rows
+            chunk_written_rows[chunk_number] = chunk_written_rows.get(chunk_number, 0) + chunk_rows
+            
+            # Rejected rows are stored in bulk instead of kept in memory
+            if chunk_errors:
+                error_rows += len(chunk_errors)
+                logger.warning(f"Rejected {len(chunk_errors)} rows in chunk {chunk_number}")
+                await self._record_row_errors(file_id, chunk_errors)
+        
+        # Spread each chunk over concurrent writers by SKU, so rows for the
+        # same SKU are still written in file order
+        async with progress:
+            await run_chunk_writers(
+                detect_duplicates(),
+                write_chunk,
+                concurrency=settings.REPORT_WRITER_CONCURRENCY,
+                queue_size=settings.REPORT_WRITER_QUEUE_SIZE,
+                on_committed=save_checkpoint
+            )
+        
+        if duplicates.groups:
+            logger.warning(
+                f"Found {len(duplicates.groups)} duplicated SKUs in {duplicates.duplicate_rows} rows of the report"
+            )
         
         # Log completion
-        logger.info(f"Processed {successful_rows} rows with {len(errors)} errors")
+        logger.info(
+            f"Processed {successful_rows} rows with {error_rows} errors: {row_counts['inserted']} inserted, "
+            f"{row_counts['updated']} updated, {row_counts['unchanged']} unchanged"
+        )
+        
+        return successful_rows
+    
+    async def _bulk_upsert_chunk(self, chunk: pd.DataFrame, file_id: str, row_counts: Dict[str, int]) -> int:
+        """
+        Load a chunk into listings with COPY and a set-based merge
+        
+        Existing listings whose row fingerprint matches the report are not
+        rewritten, so they keep their file_id and updated_at.
+        
+        Args:
+            chunk: DataFrame slice with standardized column names
+            file_id: ID of the file being processed
+            row_counts: Counts of inserted, updated and unchanged listings, updated in place
+            
+        Returns:
+            Number of rows written from the chunk
+        """
+        columns = await self._report_columns(chunk)
+        if 'seller-sku' not in columns:
+            raise ValueError("Report is missing the seller-sku column")
+        
+        # Keep the last occurrence of each SKU, matching the row-by-row behaviour
+        # where a later row updates the listing inserted by an earlier one
+        has_sku = present_sku_mask(chunk)
+        written_rows = int(has_sku.sum())
+        rows = chunk.loc[has_sku, columns]
+        rows = rows[~rows['seller-sku'].astype(str).duplicated(keep='last')]
+        rows = rows.assign(**{ROW_HASH_COLUMN: row_fingerprints(rows, columns)})
+        records = to_text_records(rows, columns + [ROW_HASH_COLUMN], file_id)
+        
+        updated, inserted = await self.db.bulk_upsert(
+            table="listings",
+            key_column="seller-sku",
+            columns=columns + [ROW_HASH_COLUMN, 'file_id'],
+            records=records,
+            compare_column=ROW_HASH_COLUMN
+        )
+        unchanged = max(len(records) - updated - inserted, 0)
+        row_counts['inserted'] += inserted
+        row_counts['updated'] += updated
+        row_counts['unchanged'] += unchanged
+        logger.info(f"Bulk upsert updated {updated}, inserted {inserted} and skipped {unchanged} unchanged listings")
+        
+        return written_rows
+    
+    async def _report_columns(self, chunk: pd.DataFrame) -> List[str]:
+        """
+        Get the report columns of a chunk that are stored in listings
+        
+        Args:
+            chunk: DataFrame slice with standardized column names
+            
+        Returns:
+            Column names in chunk order
+        """
+        column_types = await self.db.get_column_types("listings")
+        
+        # Only columns that exist in the listings table can be written
+        return [
+            col for col in chunk.columns
+            if col in column_types and col not in MANAGED_COLUMNS
+        ]
+    
+    async def _process_chunk_rows(
+        self,
+        chunk: pd.DataFrame,
+        file_id: str,
+        row_counts: Optional[Dict[str, int]] = None,
+        progress: Optional[ProgressReporter] = None
+    ):
+        """
+        Process a chunk one row at a time inside a single transaction
+        
+        A row that fails is isolated with savepoints and reported as an
+        error, while the other rows of the chunk are committed together.
+        
+        Args:
+            chunk: DataFrame slice with standardized column names
+            file_id: ID of the file being processed
+            row_counts: Optional counts of inserted, updated and unchanged listings, updated in place
+            progress: Optional reporter that is told about the processed rows
+            
+        Returns:
+            Tuple of (successful_rows, errors) for this chunk, where each error
+            holds the row_number, sku and message of a rejected row
+        """
+        if row_counts is None:
+            row_counts = new_row_counts()
+        
+        # Convert the chunk to plain tuples column by column instead of boxing each row
+        chunk_columns = await self._report_columns(chunk)
+        fingerprints = row_fingerprints(chunk, chunk_columns).tolist()
+        
+        # Index labels are report row offsets, kept to report failing rows
+        rows = []
+        for offset, values, fingerprint in zip(chunk.index, to_records(chunk, chunk_columns), fingerprints):
+            listing_data = dict(zip(chunk_columns, values))
+            if not listing_data.get('seller-sku'):
+                logger.warning(f"Skipping row with missing SKU")
+                continue
+            
+            # Add file_id and the row fingerprint to the data
+            listing_data['file_id'] = file_id
+            listing_data[ROW_HASH_COLUMN] = fingerprint
+            rows.append((int(offset) + 1, listing_data))
+        
+        async def write_rows(tx: Database, batch: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, int]:
+            # Counted separately so a batch that is rolled back is not counted
+            batch_counts = new_row_counts()
+            for _, listing_data in batch:
+                await self._write_listing(tx, listing_data, batch_counts)
+            return batch_counts
+        
+        def count_rows(batch_counts: Dict[str, int]) -> None:
+            for key, count in batch_counts.items():
+                row_counts[key] += count
         
-        return successful_rows 
\ No newline at end of file
+        failures = await self.db.write_rows_isolated(rows, write_rows, on_written=count_rows)
+        
+        errors = [
+            {"row_number": row_number, "sku": listing_data.get('seller-sku'), "message": str(e)}
+            for (row_number, listing_data), e in failures
+        ]
+        
+        successful_rows = len(rows) - len(failures)
+        if progress:
+            progress.add(successful_rows)
+        
+        return successful_rows, errors
+    
+    async def _write_listing(self, db: Database, listing_data: Dict[str, Any], row_counts: Dict[str, int]) -> None:
+        """
+        Insert or update one listing, leaving it untouched if its fingerprint matches
+        
+        Args:
+            db: Database, or a transaction from Database.transaction()
+            listing_data: Column values of the listing, including file_id and row_hash
+            row_counts: Counts of inserted, updated and unchanged listings, updated in place
+        """
+        # Check if this SKU already exists
+        existing = await db.fetch_one(
+            "SELECT id, row_hash FROM listings WHERE \"seller-sku\" = $1",
+            listing_data['seller-sku']
+        )
+        
+        # Writes go through the statement cache, so rows with the same
+        # columns reuse one prepared statement
+        if existing and existing[ROW_HASH_COLUMN] == listing_data[ROW_HASH_COLUMN]:
+            # Leave an unchanged listing untouched
+            row_counts['unchanged'] += 1
+        elif existing:
+            # Update existing listing
+            await db.update_row("listings", existing["id"], listing_data)
+            row_counts['updated'] += 1
+        else:
+            # Insert new listing
+            await db.insert_row("listings", listing_data)
+            row_counts['inserted'] += 1
+
+def standardize_columns(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalize column names and map alternate names to database fields
+    
+    Args:
+        chunk: DataFrame chunk as read from the report
+    
+    Returns:
+        DataFrame chunk with standardized columns
+    """
+    # Standardize column names
+    chunk.columns = [col.strip().lower() for col in chunk.columns]
+    
+    # Map column names to database fields (if needed)
+    # This allows flexibility in case the report format changes slightly
+    column_mapping = {
+        'seller-sku': 'seller-sku',
+        'asin1': 'asin1',
+        'asin': 'asin1',  # Handle alternate column name
+        'product-id': 'product-id',
+        'product-id-type': 'product-id-type',
+        # Add other mappings as needed
+    }
+    
+    # Rename columns if needed
+    for source, target in column_mapping.items():
+        if source in chunk.columns and source != target:
+            chunk[target] = chunk[source]
+    
+    return chunk
+
+# Report columns read as the SKU, in order of preference
+SKU_COLUMNS = ('seller-sku',)
+
+def detect_skus_before(duplicates: DuplicateSkuDetector, file_path: str, chunk_size: int, start_row: int) -> None:
+    """
+    Feed a duplicate detector the SKUs of the rows before start_row
+    
+    Args:
+        duplicates: Detector of the resumed run, updated in place
+        file_path: Path to the report file
+        chunk_size: Number of rows per chunk
+        start_row: Report row the resumed run starts at
+    """
+    for skus in iter_report_skus(file_path, chunk_size, start_row, names=SKU_COLUMNS):
+        duplicates.add(skus)
+
+def prepare_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Standardize and normalize a parsed chunk (runs in the parsing process pool)
+    
+    Args:
+        chunk: DataFrame chunk as read from the report
+        
+    Returns:
+        DataFrame chunk ready for the writers
+    """
+    return normalize_listing_columns(standardize_columns(chunk))
+
+def _text_or_none(value: Any) -> Optional[str]:
+    """Convert a SKU cell to text for storage, keeping missing values as None"""
+    return None if value is None else str(value)
+
+def new_row_counts() -> Dict[str, int]:
+    """Create zeroed counts of inserted, updated and unchanged listings"""
+    return {'inserted': 0, 'updated': 0, 'unchanged': 0}
@@ -0,0 +1,135 @@
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Dict, Optional
+
+# Configure logging
+logger = logging.getLogger("report-schema")
+
+# Low-cardinality text, read into pandas as a categorical
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# Flag values that mean "true"
+TRUE_VALUES = ('y', 'yes', 'true')
+
+# Text that parses as a number once surrounding whitespace is trimmed
+NUMBER_PATTERN = r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$'
+
+# All Listings Report columns and their types, following the listings table in 01-init.sql
+ALL_LISTINGS_SCHEMA: Dict[str, pa.DataType] = {
+    'item-name': pa.string(),
+    'item-description': pa.string(),
+    'listing-id': pa.string(),
+    'seller-sku': pa.string(),
+    'price': pa.float64(),
+    'quantity': pa.int64(),
+    'open-date': pa.string(),
+    'image-url': pa.string(),
+    'item-is-marketplace': pa.bool_(),
+    'product-id-type': CATEGORY,
+    'zshop-shipping-fee': pa.string(),
+    'item-note': pa.string(),
+    'item-condition': CATEGORY,
+    'zshop-category1': pa.string(),
+    'zshop-browse-path': pa.string(),
+    'zshop-storefront-feature': pa.string(),
+    'asin1': pa.string(),
+    'asin2': pa.string(),
+    'asin3': pa.string(),
+    'will-ship-internationally': pa.bool_(),
+    'expedited-shipping': pa.bool_(),
+    'zshop-boldface': pa.bool_(),
+    'product-id': pa.string(),
+    'bid-for-featured-placement': pa.string(),
+    'add-delete': CATEGORY,
+    'pending-quantity': pa.int64(),
+    'fulfillment-channel': CATEGORY,
+    'merchant-shipping-group': CATEGORY,
+    'status': CATEGORY,
+}
+
+# pandas dtypes for Arrow types that would otherwise become Python objects or floats
+PANDAS_TYPES = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.int64(): pd.Int64Dtype(),
+    pa.bool_(): pd.BooleanDtype(),
+}
+
+def column_key(name: str) -> str:
+    """Normalize a report column name for schema lookups ('Seller SKU' -> 'seller-sku')"""
+    return name.strip().replace(' ', '-').lower()
+
+def apply_schema(table: pa.Table, schema: Optional[Dict[str, pa.DataType]]) -> pa.Table:
+    """
+    Cast the text columns of a parsed report to their declared types
+
+    Reports are read as text, so a single bad cell never fails a chunk. Here
+    quantities become integers (invalid quantities become 0), prices become
+    floats (invalid prices become null), y/n flags become booleans and
+    low-cardinality columns are dictionary encoded. Blank cells stay null and
+    undeclared columns stay text.
+
+    Args:
+        table: Parsed report rows with text columns
+        schema: Declared column types by normalized column name
+
+    Returns:
+        Table with the declared column types
+    """
+    if not schema:
+        return table
+
+    columns = []
+    for name, values in zip(table.column_names, table.columns):
+        target = schema.get(column_key(name))
+        columns.append(values if target is None else cast_column(values, target))
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+def cast_column(values: pa.ChunkedArray, target: pa.DataType) -> pa.ChunkedArray:
+    """
+    Cast one text column to its declared type without failing on bad cells
+
+    Args:
+        values: Text column
+        target: Declared type
+
+    Returns:
+        Column of the declared type
+    """
+    if target == pa.string():
+        return values
+    if pa.types.is_dictionary(target):
+        return pc.dictionary_encode(values)
+
+    text = pc.utf8_trim_whitespace(values)
+    present = pc.fill_null(pc.not_equal(text, ''), False)
+
+    if pa.types.is_boolean(target):
+        flags = pc.is_in(pc.utf8_lower(text), value_set=pa.array(TRUE_VALUES))
+        return pc.if_else(present, flags, pa.scalar(None, pa.bool_()))
+
+    numeric = pc.fill_null(pc.match_substring_regex(text, NUMBER_PATTERN), False)
+    numbers = pc.cast(pc.if_else(numeric, text, pa.scalar(None, pa.string())), pa.float64())
+
+    if pa.types.is_integer(target):
+        integers = pc.cast(pc.trunc(numbers), target)
+        return pc.if_else(present, pc.fill_null(integers, 0), pa.scalar(None, target))
+
+    return pc.cast(numbers, target)
+
+def to_frame(table: pa.Table) -> pd.DataFrame:
+    """
+    Convert a typed report table to pandas
+
+    Text stays Arrow-backed instead of becoming Python strings, integers
+    and flags become nullable pandas dtypes and dictionary columns become
+    categoricals.
+
+    Args:
+        table: Table from apply_schema
+
+    Returns:
+        DataFrame with the same columns
+    """
+    return table.to_pandas(types_mapper=PANDAS_TYPES.get)
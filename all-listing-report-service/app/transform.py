@@ -0,0 +1,156 @@
+import logging
+import numpy as np
+import pandas as pd
+from typing import List, Any, Tuple
+
+# Configure logging
+logger = logging.getLogger("report-transform")
+
+# Listing columns stored as BOOLEAN, reported as y/n flags
+BOOLEAN_COLUMNS = ('item-is-marketplace', 'will-ship-internationally', 'expedited-shipping', 'zshop-boldface')
+
+# Listing columns stored as DECIMAL
+DECIMAL_COLUMNS = ('price',)
+
+# Listing columns stored as INTEGER
+INTEGER_COLUMNS = ('quantity', 'pending-quantity')
+
+# Flag values that mean "true"
+TRUE_VALUES = ('y', 'yes', 'true')
+
+def normalize_listing_columns(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast listing columns to their database types, one whole column at a time
+
+    Blank cells become nulls, prices become floats (invalid prices are
+    nulled), quantities become integers (invalid quantities become 0) and
+    y/n flags become booleans.
+
+    Args:
+        chunk: DataFrame chunk with standardized column names
+
+    Returns:
+        DataFrame chunk with normalized columns
+    """
+    for col in DECIMAL_COLUMNS:
+        if col in chunk.columns:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+
+    for col in INTEGER_COLUMNS:
+        # Columns already typed by the report schema need no cast
+        if col in chunk.columns and not pd.api.types.is_integer_dtype(chunk[col]):
+            present = chunk[col].notna() & (chunk[col].astype(str).str.strip() != '')
+            numbers = pd.to_numeric(chunk[col], errors='coerce').fillna(0)
+            chunk[col] = numbers.where(present).apply(np.trunc).astype('Int64')
+
+    for col in BOOLEAN_COLUMNS:
+        if col in chunk.columns:
+            values = chunk[col]
+            if pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'mixed'):
+                continue
+            # Non-string cells (already booleans) yield NaN here and are kept as is
+            text = values.str.strip().str.lower()
+            flags = values.where(text.isna(), text.isin(TRUE_VALUES))
+            chunk[col] = flags.astype(object).where(values.notna() & (text != ''), None)
+
+    return chunk
+
+def to_python_column(series: pd.Series) -> List[Any]:
+    """
+    Convert a column to a list of native Python values with None for nulls
+
+    Args:
+        series: DataFrame column
+
+    Returns:
+        List of Python values ready for the database driver
+    """
+    values = series.astype(object)
+    return values.where(series.notna(), None).tolist()
+
+def to_text_column(series: pd.Series) -> List[Any]:
+    """
+    Convert a column to the text form staged by COPY, with None for nulls
+
+    pandas reads integer columns that contain blanks as floats, so whole
+    float values are written without a fractional part ("50" not "50.0").
+
+    Args:
+        series: DataFrame column
+
+    Returns:
+        List of strings (or None) ready for copy_records_to_table
+    """
+    present = series.notna()
+    text = series.astype(str).astype(object)
+
+    if pd.api.types.is_float_dtype(series.dtype):
+        whole = present & (series % 1 == 0)
+        if whole.any():
+            text[whole] = series[whole].astype("int64").astype(str)
+
+    return text.where(present, None).tolist()
+
+def to_records(chunk: pd.DataFrame, columns: List[str]) -> List[Tuple[Any, ...]]:
+    """
+    Convert a chunk to row tuples of native Python values, column by column
+
+    Args:
+        chunk: DataFrame chunk
+        columns: Columns to include, in tuple order
+
+    Returns:
+        List of row tuples
+    """
+    return list(zip(*(to_python_column(chunk[col]) for col in columns)))
+
+def to_text_records(chunk: pd.DataFrame, columns: List[str], *extra_values: Any) -> List[Tuple[Any, ...]]:
+    """
+    Convert a chunk to row tuples of COPY text values, column by column
+
+    Args:
+        chunk: DataFrame chunk
+        columns: Columns to include, in tuple order
+        extra_values: Constant values appended to every row (e.g. the file ID)
+
+    Returns:
+        List of row tuples
+    """
+    arrays = [to_text_column(chunk[col]) for col in columns]
+    arrays.extend([value] * len(chunk) for value in extra_values)
+    return list(zip(*arrays))
+
+def row_fingerprints(chunk: pd.DataFrame, columns: List[str]) -> pd.Series:
+    """
+    Hash the report columns of each row into a signed 64-bit fingerprint
+
+    Values are hashed in their COPY text form and columns in name order, so
+    a row hashes the same whatever the dtype pandas inferred for its chunk or
+    the column order of the report.
+
+    Args:
+        chunk: DataFrame chunk
+        columns: Columns to include in the fingerprint
+
+    Returns:
+        Series of int64 fingerprints aligned with the chunk
+    """
+    text = pd.DataFrame(
+        {col: to_text_column(chunk[col]) for col in sorted(columns)},
+        index=chunk.index,
+    )
+    hashes = pd.util.hash_pandas_object(text, index=False).to_numpy()
+    return pd.Series(hashes.view('int64'), index=chunk.index)
+
+def present_sku_mask(chunk: pd.DataFrame) -> pd.Series:
+    """
+    Flag rows that carry a non-empty seller SKU
+
+    Args:
+        chunk: DataFrame chunk with a seller-sku column
+
+    Returns:
+        Boolean Series aligned with the chunk
+    """
+    skus = chunk['seller-sku']
+    return skus.notna() & (skus.astype(str).str.strip() != '')
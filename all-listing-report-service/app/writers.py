@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import pandas as pd
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+# Configure logging
+logger = logging.getLogger("report-writers")
+
+def partition_by_sku(chunk: pd.DataFrame, partitions: int) -> List[pd.DataFrame]:
+    """
+    Split a chunk into disjoint partitions by a hash of the seller SKU
+
+    Every row for a given SKU lands in the same partition, and rows keep
+    their file order within a partition.
+
+    Args:
+        chunk: DataFrame chunk with standardized column names
+        partitions: Number of partitions
+
+    Returns:
+        List of DataFrame partitions (some may be empty)
+    """
+    if partitions <= 1 or 'seller-sku' not in chunk.columns:
+        return [chunk]
+
+    skus = chunk['seller-sku'].astype(str)
+    buckets = pd.util.hash_pandas_object(skus, index=False).to_numpy() % partitions
+    return [chunk[buckets == partition] for partition in range(partitions)]
+
+async def iterate_chunks(
+    chunks: Union[Iterable[pd.DataFrame], AsyncIterable[pd.DataFrame]]
+) -> AsyncIterator[pd.DataFrame]:
+    """Iterate over a plain or asynchronous iterable of chunks"""
+    if hasattr(chunks, '__aiter__'):
+        async for chunk in chunks:
+            yield chunk
+    else:
+        for chunk in chunks:
+            yield chunk
+
+async def run_chunk_writers(
+    chunks: Union[Iterable[pd.DataFrame], AsyncIterable[pd.DataFrame]],
+    write: Callable[[int, pd.DataFrame], Awaitable[None]],
+    concurrency: int,
+    queue_size: int,
+    on_committed: Optional[Callable[[int], None]] = None,
+) -> None:
+    """
+    Write report chunks with several concurrent writers
+
+    Each chunk is split by SKU and every partition is handed to the writer
+    that owns it through a bounded queue, so a writer sees all rows for its
+    SKUs in file order while the writers use separate pool connections. The
+    queues apply back-pressure, keeping at most queue_size partitions per
+    writer in memory. on_committed is called with the highest chunk number
+    whose partitions, and those of every earlier chunk, have all been written.
+
+    Args:
+        chunks: Plain or asynchronous iterable of DataFrame chunks
+        write: Coroutine function called with (chunk_number, partition)
+        concurrency: Number of concurrent writers
+        queue_size: Maximum number of partitions waiting per writer
+        on_committed: Optional function called as leading chunks finish writing
+
+    Raises:
+        The first exception raised by a writer, after all writers have stopped
+    """
+    concurrency = max(concurrency, 1)
+    queues = [asyncio.Queue(maxsize=max(queue_size, 1)) for _ in range(concurrency)]
+    failures = []
+
+    # Partitions not yet written per chunk, and the last fully written chunk
+    remaining: Dict[int, int] = {}
+    committed = 0
+
+    def advance_committed() -> None:
+        nonlocal committed
+        advanced = committed
+        while remaining.get(advanced + 1) == 0:
+            advanced += 1
+            del remaining[advanced]
+        if advanced > committed:
+            committed = advanced
+            if on_committed:
+                on_committed(committed)
+
+    async def writer(queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            # Keep draining after a failure so the producer never blocks on a full queue
+            if failures:
+                continue
+            chunk_number, partition = item
+            try:
+                await write(chunk_number, partition)
+            except Exception as e:
+                logger.error(f"Writer failed on chunk {chunk_number}: {str(e)}")
+                failures.append(e)
+                continue
+            remaining[chunk_number] -= 1
+            advance_committed()
+
+    tasks = [asyncio.create_task(writer(queue)) for queue in queues]
+    try:
+        chunk_number = 0
+        async for chunk in iterate_chunks(chunks):
+            if failures:
+                break
+            chunk_number += 1
+            partitions = [
+                (queue, partition)
+                for queue, partition in zip(queues, partition_by_sku(chunk, concurrency))
+                if len(partition)
+            ]
+            remaining[chunk_number] = len(partitions)
+            advance_committed()
+            for queue, partition in partitions:
+                await queue.put((chunk_number, partition))
+    finally:
+        for queue in queues:
+            await queue.put(None)
+        await asyncio.gather(*tasks)
+
+    if failures:
+        raise failures[0]
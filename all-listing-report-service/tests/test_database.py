@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+
+from app import database
+from app.config import settings
+from app.database import Database
+
+@pytest.fixture(autouse=True)
+def clear_statement_cache():
+    """Start every test with an empty statement cache"""
+    database._statement_cache.clear()
+    yield
+    database._statement_cache.clear()
+
+def test_get_statement_insert():
+    """Test generation of a parameterized INSERT"""
+    db = Database(pool=None)
+
+    query = db.get_statement("listings", ("seller-sku", "price"), "insert")
+
+    assert query == 'INSERT INTO listings ("seller-sku", "price") VALUES ($1, $2)'
+
+def test_get_statement_update_by_id():
+    """Test generation of a parameterized UPDATE keyed on id"""
+    db = Database(pool=None)
+
+    query = db.get_statement("listings", ("seller-sku", "price"), "update_by_id")
+
+    assert query == 'UPDATE listings SET "seller-sku" = $2, "price" = $3 WHERE id = $1'
+
+def test_get_statement_reuses_cached_query():
+    """Test that the same shape returns the cached query text"""
+    db = Database(pool=None)
+
+    first = db.get_statement("listings", ("seller-sku",), "insert")
+    second = db.get_statement("listings", ("seller-sku",), "insert")
+
+    assert first is second
+    assert len(database._statement_cache) == 1
+
+def test_get_statement_evicts_least_recently_used(monkeypatch):
+    """Test that the cache is bounded and evicts the oldest shape"""
+    monkeypatch.setattr(settings, "DATABASE_STATEMENT_CACHE_SIZE", 2)
+    db = Database(pool=None)
+
+    db.get_statement("listings", ("a",), "insert")
+    db.get_statement("listings", ("b",), "insert")
+    db.get_statement("listings", ("a",), "insert")
+    db.get_statement("listings", ("c",), "insert")
+
+    assert list(database._statement_cache) == [
+        ("listings", ("a",), "insert"),
+        ("listings", ("c",), "insert"),
+    ]
+
+def test_get_statement_rejects_unknown_operation():
+    """Test that an unknown operation raises"""
+    db = Database(pool=None)
+
+    with pytest.raises(ValueError):
+        db.get_statement("listings", ("a",), "delete")
+
+class FakeConnection:
+    """Connection whose transactions and savepoints roll back a list of written rows"""
+
+    def __init__(self):
+        self.rows = []
+        self.transactions = 0
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        snapshot = list(self.rows)
+        try:
+            yield
+        except Exception:
+            self.rows[:] = snapshot
+            raise
+
+def test_write_rows_isolated_bisects_to_failing_rows():
+    """Test that failing rows are isolated and the other rows are kept"""
+    conn = FakeConnection()
+    db = Database(database._ConnectionPool(conn))
+    written = []
+
+    async def write(tx, batch):
+        for row in batch:
+            tx.pool.conn.rows.append(row)
+            if row in (3, 6):
+                raise ValueError(f"bad row {row}")
+        return len(batch)
+
+    failures = asyncio.run(db.write_rows_isolated([1, 2, 3, 4, 5, 6, 7, 8], write, on_written=written.append))
+
+    assert [row for row, _ in failures] == [3, 6]
+    assert conn.rows == [1, 2, 4, 5, 7, 8]
+    assert sum(written) == 6
+
+def test_write_rows_isolated_uses_one_savepoint_without_failures():
+    """Test that a clean batch is written under a single savepoint"""
+    conn = FakeConnection()
+    db = Database(database._ConnectionPool(conn))
+
+    async def write(tx, batch):
+        tx.pool.conn.rows.extend(batch)
+
+    failures = asyncio.run(db.write_rows_isolated([1, 2, 3], write))
+
+    assert failures == []
+    assert conn.rows == [1, 2, 3]
+    assert conn.transactions == 2
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from app.duplicates import DuplicateSkuDetector
+
+def test_detector_groups_duplicates_across_chunks():
+    """Test that repeated SKUs are grouped with the row offsets of every occurrence"""
+    detector = DuplicateSkuDetector()
+
+    assert detector.add(pd.Series(["SKU-1", "SKU-2", "SKU-1"], index=[0, 1, 2])) == 1
+    assert detector.add(pd.Series(["SKU-3", "SKU-2", "SKU-1"], index=[3, 4, 5])) == 2
+
+    assert detector.groups == {"SKU-1": [0, 2, 5], "SKU-2": [1, 4]}
+    assert detector.duplicate_rows == 5
+    assert detector.row_offsets() == {0, 1, 2, 4, 5}
+
+def test_detector_ignores_blank_skus():
+    """Test that missing and blank SKUs are never reported as duplicates"""
+    detector = DuplicateSkuDetector()
+
+    assert detector.add(pd.Series([None, "", "  ", None, "SKU-1"], index=range(10, 15))) == 0
+    assert detector.groups == {}
+    assert detector.duplicate_rows == 0
+
+def test_detector_accepts_typed_columns():
+    """Test Arrow-backed SKU columns from the report reader"""
+    detector = DuplicateSkuDetector()
+    skus = pd.Series(["00123", None, "00123"], dtype="string[pyarrow]")
+
+    assert detector.add(skus) == 1
+    assert detector.groups == {"00123": [0, 2]}
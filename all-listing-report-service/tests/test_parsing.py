@@ -0,0 +1,123 @@
+import gzip
+import pytest
+import asyncio
+import zipfile
+import pandas as pd
+import pyarrow as pa
+from concurrent.futures import ProcessPoolExecutor
+
+from app.parsing import parse_report_chunks
+from app.processor import prepare_chunk
+from app.reader import plan_report_chunks, read_report_range
+
+HEADER = "item-name\tSeller-SKU\tprice\tquantity\titem-is-marketplace\n"
+
+@pytest.fixture
+def report_file(tmp_path):
+    """Write a small All Listing Report to disk"""
+    path = tmp_path / "all-listings.txt"
+    rows = [f"Item {i}\tSKU-{i}\t{i}.50\t{i}\ty\n" for i in range(50)]
+    path.write_text(HEADER + "".join(rows), encoding="utf-8")
+    return str(path)
+
+def compress_report(source, path):
+    """Write a compressed copy of a report, choosing the format from the path"""
+    with open(source, "rb") as f:
+        data = f.read()
+    if path.endswith(".gz"):
+        with gzip.open(path, "wb") as f:
+            f.write(data)
+    elif path.endswith(".zip"):
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("report.txt", data)
+    else:
+        with pa.output_stream(path, compression="zstd") as f:
+            f.write(data)
+
+async def collect(chunks):
+    """Gather the chunks of an asynchronous iterator"""
+    return [chunk async for chunk in chunks]
+
+def test_plan_report_chunks_covers_file(report_file):
+    """Test that planned ranges are contiguous and parse back to every row"""
+    ranges = plan_report_chunks(report_file, chunk_rows=7)
+
+    assert len(ranges) > 1
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+
+    chunks = [read_report_range(report_file, start, end) for start, end in ranges]
+    assert pd.concat(chunks)["Seller-SKU"].tolist() == [f"SKU-{i}" for i in range(50)]
+
+def test_plan_report_chunks_header_only(tmp_path):
+    """Test that a report without data rows has no ranges"""
+    path = tmp_path / "empty.txt"
+    path.write_text(HEADER, encoding="utf-8")
+
+    assert plan_report_chunks(str(path), chunk_rows=10) == []
+
+def test_parse_report_chunks_in_thread(report_file):
+    """Test ordered, prepared chunks with a continuous index"""
+    chunks = asyncio.run(collect(parse_report_chunks(
+        report_file, chunk_rows=7, prepare=prepare_chunk, max_in_flight=3
+    )))
+
+    frame = pd.concat(chunks)
+    assert frame.index.tolist() == list(range(50))
+    assert frame["seller-sku"].tolist() == [f"SKU-{i}" for i in range(50)]
+    assert frame["item-is-marketplace"].tolist() == [True] * 50
+    assert str(frame["quantity"].dtype) == "Int64"
+
+def test_parse_report_chunks_from_start_row(report_file):
+    """Test resuming part way through a report keeps file row offsets as the index"""
+    chunks = asyncio.run(collect(parse_report_chunks(
+        report_file, chunk_rows=7, prepare=prepare_chunk, start_row=23
+    )))
+
+    frame = pd.concat(chunks)
+    assert frame.index.tolist() == list(range(23, 50))
+    assert frame["seller-sku"].tolist() == [f"SKU-{i}" for i in range(23, 50)]
+
+def test_parse_report_chunks_in_process_pool(report_file):
+    """Test parsing in worker processes"""
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        chunks = asyncio.run(collect(parse_report_chunks(
+            report_file, chunk_rows=10, prepare=prepare_chunk, executor=executor
+        )))
+
+    assert sum(len(chunk) for chunk in chunks) == 50
+    assert chunks[-1]["seller-sku"].iloc[-1] == "SKU-49"
+
+def test_read_report_range_applies_schema(tmp_path):
+    """Test that columns are cast to their declared types instead of inferred ones"""
+    path = tmp_path / "typed.txt"
+    path.write_text(
+        "seller-sku\tproduct-id\tquantity\tstatus\n"
+        "00123\t0042\t5\tActive\n"
+        "NA\t0043\tn/a\tInactive\n"
+        "SKU-3\t\t\tActive\n",
+        encoding="utf-8",
+    )
+    start, end = plan_report_chunks(str(path), chunk_rows=10)[0]
+
+    chunk = read_report_range(str(path), start, end)
+
+    assert chunk["seller-sku"].tolist() == ["00123", "NA", "SKU-3"]
+    assert chunk["product-id"].tolist()[:2] == ["0042", "0043"]
+    assert str(chunk["quantity"].dtype) == "Int64"
+    assert chunk["quantity"].tolist()[:2] == [5, 0]
+    assert chunk["quantity"].isna().tolist() == [False, False, True]
+    assert isinstance(chunk["status"].dtype, pd.CategoricalDtype)
+
+@pytest.mark.parametrize("extension", [".gz", ".zip", ".zst"])
+def test_parse_report_chunks_from_compressed_report(report_file, tmp_path, extension):
+    """Test that compressed reports are parsed in order, also when resuming"""
+    path = str(tmp_path / f"report.txt{extension}")
+    compress_report(report_file, path)
+
+    chunks = asyncio.run(collect(parse_report_chunks(
+        path, chunk_rows=7, prepare=prepare_chunk, max_in_flight=3, start_row=23
+    )))
+
+    frame = pd.concat(chunks)
+    assert frame.index.tolist() == list(range(23, 50))
+    assert frame["seller-sku"].tolist() == [f"SKU-{i}" for i in range(23, 50)]
@@ -0,0 +1,296 @@
+import hashlib
+import json
+import pytest
+import asyncio
+import io
+import pandas as pd
+from unittest.mock import MagicMock
+
+from app.config import settings
+from app.processor import ReportProcessor, detect_skus_before, new_row_counts, prepare_chunk
+from app.reader import iter_report_chunks
+from app.transform import row_fingerprints
+from app.database import Database
+from app.duplicates import DuplicateSkuDetector
+
+# Sample All Listing Report data (tab separated)
+SAMPLE_TSV_DATA = (
+    "item-name\tseller-sku\tprice\tquantity\titem-is-marketplace\tasin1\n"
+    "ATOM SKATES Outdoor Quad Roller Wheels\tAM-1000-BK-4W-A1\t35.00\t100\ty\tB08ZJWN6ZS\n"
+    "ATOM SKATES Outdoor Quad Roller Wheels Blue\tAM-1000-BL-4W-A3\t35.00\t\ty\tB08ZJZHS5V\n"
+    "ATOM SKATES Outdoor Quad Roller Wheels Blue\tAM-1000-BL-4W-A3\t36.00\t50\ty\tB08ZJZHS5V\n"
+)
+
+LISTING_COLUMN_TYPES = {
+    "id": "integer",
+    "item-name": "character varying(255)",
+    "seller-sku": "character varying(100)",
+    "price": "numeric(10,2)",
+    "quantity": "integer",
+    "item-is-marketplace": "boolean",
+    "asin1": "character varying(20)",
+    "file_id": "uuid",
+    "row_hash": "bigint",
+}
+
+@pytest.fixture
+def sample_dataframe():
+    """Create a prepared sample dataframe from TSV data"""
+    return prepare_chunk(pd.read_csv(io.StringIO(SAMPLE_TSV_DATA), sep="\t"))
+
+@pytest.fixture
+def mock_db():
+    """Mock database that records bulk upserts"""
+    mock = MagicMock(spec=Database)
+    mock.bulk_upserts = []
+    mock.copies = []
+
+    async def mock_get_column_types(table):
+        return LISTING_COLUMN_TYPES
+
+    async def mock_bulk_upsert(table, key_column, columns, records, compare_column=None):
+        mock.bulk_upserts.append((table, key_column, columns, records))
+        return 0, len(records)
+
+    async def mock_execute(*args, **kwargs):
+        return "UPDATE 1"
+
+    async def mock_write_rows_isolated(rows, write, on_written=None):
+        # Write each row on its own so a failing row only fails itself
+        failures = []
+        for row in rows:
+            try:
+                result = await write(mock, [row])
+            except Exception as e:
+                failures.append((row, e))
+                continue
+            if on_written:
+                on_written(result)
+        return failures
+
+    mock.get_column_types.side_effect = mock_get_column_types
+    mock.bulk_upsert.side_effect = mock_bulk_upsert
+    mock.execute.side_effect = mock_execute
+    async def mock_copy_records(table, columns, records):
+        mock.copies.append((table, columns, records))
+
+    mock.write_rows_isolated.side_effect = mock_write_rows_isolated
+    mock.copy_records.side_effect = mock_copy_records
+    return mock
+
+def test_bulk_upsert_chunk(mock_db, sample_dataframe):
+    """Test that a chunk is staged once with the last row per SKU"""
+    processor = ReportProcessor(db=mock_db)
+
+    written = asyncio.run(processor._process_file_rows([sample_dataframe], "file-1"))
+
+    assert written == 3
+
+    # Each writer stages its own SKU partition of the chunk
+    records = []
+    for table, key_column, columns, partition_records in mock_db.bulk_upserts:
+        assert table == "listings"
+        assert key_column == "seller-sku"
+        assert columns[-1] == "file_id"
+        records.extend(partition_records)
+    assert len(records) == 2
+
+    by_sku = {record[columns.index("seller-sku")]: record for record in records}
+    assert by_sku["AM-1000-BL-4W-A3"][columns.index("price")] == "36"
+    assert by_sku["AM-1000-BL-4W-A3"][columns.index("quantity")] == "50"
+    assert by_sku["AM-1000-BK-4W-A1"][-1] == "file-1"
+    assert columns[-2] == "row_hash"
+    assert by_sku["AM-1000-BK-4W-A1"][-2] != by_sku["AM-1000-BL-4W-A3"][-2]
+
+def test_bulk_upsert_falls_back_to_rows(mock_db, sample_dataframe):
+    """Test that a failing bulk upsert is retried row by row"""
+    async def failing_bulk_upsert(*args, **kwargs):
+        raise Exception("COPY failed")
+
+    async def mock_fetch_one(query, *args):
+        return None
+
+    async def mock_insert_row(table, data, returning_id=False):
+        return None
+
+    mock_db.bulk_upsert.side_effect = failing_bulk_upsert
+    mock_db.fetch_one.side_effect = mock_fetch_one
+    mock_db.insert_row.side_effect = mock_insert_row
+    processor = ReportProcessor(db=mock_db)
+
+    written = asyncio.run(processor._process_file_rows([sample_dataframe], "file-1"))
+
+    assert written == 3
+    assert mock_db.insert_row.call_count == 3
+
+def test_bulk_upsert_counts_unchanged_rows(mock_db, sample_dataframe):
+    """Test that staged rows neither updated nor inserted are counted as unchanged"""
+    async def mock_bulk_upsert(table, key_column, columns, records, compare_column=None):
+        assert compare_column == "row_hash"
+        return 0, 0
+
+    mock_db.bulk_upsert.side_effect = mock_bulk_upsert
+    processor = ReportProcessor(db=mock_db)
+    row_counts = new_row_counts()
+
+    written = asyncio.run(processor._process_file_rows([sample_dataframe], "file-1", row_counts))
+
+    assert written == 3
+    assert row_counts == {"inserted": 0, "updated": 0, "unchanged": 2}
+
+def test_process_chunk_rows_skips_unchanged_rows(mock_db, sample_dataframe):
+    """Test that a listing whose fingerprint matches is not rewritten"""
+    processor = ReportProcessor(db=mock_db)
+    fingerprints = row_fingerprints(sample_dataframe, list(sample_dataframe.columns)).tolist()
+    stored = {"AM-1000-BK-4W-A1": {"id": 1, "row_hash": fingerprints[0]}}
+
+    async def mock_fetch_one(query, sku):
+        return stored.get(sku)
+
+    async def mock_insert_row(table, data, returning_id=False):
+        stored[data["seller-sku"]] = {"id": len(stored) + 1, "row_hash": data["row_hash"]}
+
+    async def mock_update_row(table, row_id, data):
+        return None
+
+    mock_db.fetch_one.side_effect = mock_fetch_one
+    mock_db.insert_row.side_effect = mock_insert_row
+    mock_db.update_row.side_effect = mock_update_row
+    row_counts = new_row_counts()
+
+    written, errors = asyncio.run(processor._process_chunk_rows(sample_dataframe, "file-1", row_counts))
+
+    assert written == 3
+    assert errors == []
+    assert row_counts == {"inserted": 1, "updated": 1, "unchanged": 1}
+    assert mock_db.update_row.call_count == 1
+
+def test_process_chunk_rows_reports_failing_rows(mock_db, sample_dataframe):
+    """Test that a failing row is reported without failing the rest of the chunk"""
+    async def mock_fetch_one(query, sku):
+        return None
+
+    async def mock_insert_row(table, data, returning_id=False):
+        if data["seller-sku"] == "AM-1000-BK-4W-A1":
+            raise ValueError("value too long")
+
+    mock_db.fetch_one.side_effect = mock_fetch_one
+    mock_db.insert_row.side_effect = mock_insert_row
+    processor = ReportProcessor(db=mock_db)
+    row_counts = new_row_counts()
+
+    written, errors = asyncio.run(processor._process_chunk_rows(sample_dataframe, "file-1", row_counts))
+
+    assert written == 2
+    assert errors == [{"row_number": 1, "sku": "AM-1000-BK-4W-A1", "message": "value too long"}]
+    assert row_counts == {"inserted": 2, "updated": 0, "unchanged": 0}
+
+def test_process_file_rows_records_rejected_rows(mock_db, sample_dataframe):
+    """Test that rows rejected by the row-by-row fallback are stored with their report row"""
+    async def failing_bulk_upsert(*args, **kwargs):
+        raise Exception("COPY failed")
+
+    async def mock_fetch_one(query, *args):
+        return None
+
+    async def mock_insert_row(table, data, returning_id=False):
+        if data["price"] == 36.0:
+            raise ValueError("price out of range")
+
+    mock_db.bulk_upsert.side_effect = failing_bulk_upsert
+    mock_db.fetch_one.side_effect = mock_fetch_one
+    mock_db.insert_row.side_effect = mock_insert_row
+    processor = ReportProcessor(db=mock_db)
+
+    written = asyncio.run(processor._process_file_rows([sample_dataframe], "file-1"))
+
+    assert written == 2
+    assert mock_db.copies == [(
+        "report_row_errors",
+        ["file_id", "row_number", "sku", "message"],
+        [("file-1", 3, "AM-1000-BL-4W-A3", "price out of range")],
+    )]
+
+def test_process_report_skips_already_processed_content(tmp_path, monkeypatch):
+    """Test that a report with the content of a completed upload is not written again"""
+    monkeypatch.setattr(settings, "PARSE_WORKERS", 0)
+    path = tmp_path / "report.txt"
+    path.write_text(SAMPLE_TSV_DATA, encoding="utf-8")
+
+    mock_db = MagicMock(spec=Database)
+    executed = []
+
+    async def mock_execute(query, *args):
+        executed.append((query, args))
+        return "UPDATE 1"
+
+    async def mock_fetch_one(query, *args):
+        return {"id": "prior-file", "processed_rows": 3}
+
+    async def unexpected_write(*args, **kwargs):
+        raise AssertionError("rows should not be written for a duplicate report")
+
+    mock_db.execute.side_effect = mock_execute
+    mock_db.fetch_one.side_effect = mock_fetch_one
+    processor = ReportProcessor(db=mock_db)
+    processor._process_file_rows = unexpected_write
+
+    result = asyncio.run(processor.process_report(str(path), file_id="new-file"))
+
+    assert result.status == "success"
+    assert result.duplicate_of == "prior-file"
+    assert result.processed_rows == 3
+
+    # The new upload is registered with its hash and completed with the earlier row count
+    register_args = executed[0][1]
+    assert hashlib.sha256(path.read_bytes()).hexdigest() in register_args
+    assert executed[-1][1][:2] == ("completed", 3)
+
+def test_process_file_rows_checkpoints_after_resume(mock_db, sample_dataframe):
+    """Test that a resumed run continues the row count and checkpoints the file row reached"""
+    saved = []
+
+    async def mock_execute(query, *args):
+        saved.append(args)
+        return "UPDATE 1"
+
+    mock_db.execute.side_effect = mock_execute
+    processor = ReportProcessor(db=mock_db)
+
+    processed = asyncio.run(processor._process_file_rows(
+        [sample_dataframe], "file-1", start_row=100, processed_before=40
+    ))
+
+    assert processed == 43
+
+    # The final progress write carries the checkpoint of the last chunk
+    file_id, processed_rows, checkpoint = saved[-1]
+    assert (file_id, processed_rows) == ("file-1", 43)
+    assert json.loads(checkpoint) == {"rows": 100 + 3, "processed_rows": 43}
+
+def test_process_file_rows_collects_duplicate_skus(mock_db, sample_dataframe):
+    """Test that duplicated SKUs are reported with the row offsets of every occurrence"""
+    processor = ReportProcessor(db=mock_db)
+    duplicates = DuplicateSkuDetector()
+
+    asyncio.run(processor._process_file_rows([sample_dataframe], "file-1", duplicates=duplicates))
+
+    assert duplicates.groups == {"AM-1000-BL-4W-A3": [1, 2]}
+
+def test_resume_completes_duplicate_groups_across_checkpoint(mock_db, tmp_path):
+    """Test that a resumed run groups a duplicate SKU with its occurrence before the checkpoint"""
+    report_file = tmp_path / "all-listings.txt"
+    skus = ["SKU-A", "SKU-B", "SKU-C", "SKU-B", "SKU-D"]
+    rows = [f"Item {i}\t{sku}\t{i}.99\t{i}\n" for i, sku in enumerate(skus)]
+    report_file.write_text("item-name\tseller-sku\tprice\tquantity\n" + "".join(rows), encoding="utf-8")
+
+    processor = ReportProcessor(db=mock_db)
+    duplicates = DuplicateSkuDetector()
+    detect_skus_before(duplicates, str(report_file), 2, start_row=3)
+    chunks = [prepare_chunk(chunk[chunk.index >= 3].copy()) for chunk in iter_report_chunks(str(report_file), 2)]
+
+    asyncio.run(processor._process_file_rows(
+        [chunk for chunk in chunks if len(chunk)], "file-1", start_row=3, processed_before=3, duplicates=duplicates
+    ))
+
+    assert duplicates.groups == {"SKU-B": [1, 3]}
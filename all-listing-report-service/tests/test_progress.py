@@ -0,0 +1,75 @@
+import pytest
+import asyncio
+
+from app.progress import ProgressReporter
+
+def test_progress_reporter_coalesces_writes():
+    """Test that many updates within an interval become one write plus a final flush"""
+    written = []
+
+    async def write(processed_rows, checkpoint):
+        written.append(processed_rows)
+
+    async def run():
+        async with ProgressReporter(write, interval=0.05) as progress:
+            for _ in range(1000):
+                progress.add(1)
+            await asyncio.sleep(0.08)
+            progress.add(5)
+
+    asyncio.run(run())
+
+    assert written == [1000, 1005]
+
+def test_progress_reporter_skips_unchanged_count():
+    """Test that nothing is written when no rows were processed"""
+    written = []
+
+    async def write(processed_rows, checkpoint):
+        written.append(processed_rows)
+
+    async def run():
+        async with ProgressReporter(write, interval=0.01):
+            await asyncio.sleep(0.05)
+
+    asyncio.run(run())
+
+    assert written == []
+
+def test_progress_reporter_survives_write_errors():
+    """Test that a failed write is retried with the latest count"""
+    written = []
+
+    async def write(processed_rows, checkpoint):
+        if not written:
+            written.append(None)
+            raise Exception("connection lost")
+        written.append(processed_rows)
+
+    async def run():
+        async with ProgressReporter(write, interval=0.02) as progress:
+            progress.add(10)
+            await asyncio.sleep(0.03)
+            progress.add(2)
+
+    asyncio.run(run())
+
+    assert written == [None, 12]
+
+def test_progress_reporter_writes_checkpoints_once():
+    """Test that a checkpoint is written with the next count and not repeated"""
+    written = []
+
+    async def write(processed_rows, checkpoint):
+        written.append((processed_rows, checkpoint))
+
+    async def run():
+        async with ProgressReporter(write, interval=0.02, processed_rows=100) as progress:
+            progress.add(10)
+            progress.set_checkpoint({"rows": 120, "processed_rows": 110})
+            await asyncio.sleep(0.03)
+            progress.add(5)
+
+    asyncio.run(run())
+
+    assert written == [(110, {"rows": 120, "processed_rows": 110}), (115, None)]
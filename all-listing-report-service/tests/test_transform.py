@@ -0,0 +1,61 @@
+import pytest
+import io
+import pandas as pd
+
+from app.transform import normalize_listing_columns, present_sku_mask, row_fingerprints, to_records, to_text_records
+
+# Sample All Listing Report data (tab separated)
+SAMPLE_TSV_DATA = (
+    "seller-sku\tprice\tquantity\titem-is-marketplace\tzshop-boldface\n"
+    "AM-1000-BK-4W-A1\t35.00\t100\ty\tN\n"
+    "AM-1000-BL-4W-A3\tabc\t\tn\t\n"
+    "\t35.50\tten\tYES\tn\n"
+)
+
+@pytest.fixture
+def sample_dataframe():
+    """Create a normalized dataframe from TSV data"""
+    return normalize_listing_columns(pd.read_csv(io.StringIO(SAMPLE_TSV_DATA), sep="\t"))
+
+def test_normalize_listing_columns(sample_dataframe):
+    """Test column-wise casting of prices, quantities and flags"""
+    records = to_records(sample_dataframe, ["price", "quantity", "item-is-marketplace", "zshop-boldface"])
+
+    assert records == [
+        (35.0, 100, True, False),
+        (None, None, False, None),
+        (35.5, 0, True, False),
+    ]
+    assert all(type(value) is int for value in (records[0][1], records[2][1]))
+
+def test_to_text_records(sample_dataframe):
+    """Test conversion of a chunk to COPY text values"""
+    records = to_text_records(sample_dataframe, ["price", "quantity"], "file-1")
+
+    assert records == [
+        ("35", "100", "file-1"),
+        (None, None, "file-1"),
+        ("35.5", "0", "file-1"),
+    ]
+
+def test_present_sku_mask(sample_dataframe):
+    """Test that rows without a SKU are flagged"""
+    assert present_sku_mask(sample_dataframe).tolist() == [True, True, False]
+
+def test_row_fingerprints(sample_dataframe):
+    """Test that fingerprints follow values, not dtypes or column order"""
+    columns = ["seller-sku", "price", "quantity"]
+    fingerprints = row_fingerprints(sample_dataframe, columns)
+
+    assert fingerprints.dtype == "int64"
+    assert fingerprints.nunique() == 3
+
+    # The same values read with other dtypes and another column order hash the same
+    as_text = sample_dataframe[columns[::-1]].astype(object)
+    as_text["price"] = ["35", None, "35.5"]
+    assert row_fingerprints(as_text, columns[::-1]).tolist() == fingerprints.tolist()
+
+    changed = sample_dataframe.copy()
+    changed.loc[0, "price"] = 36.0
+    assert row_fingerprints(changed, columns).tolist()[1:] == fingerprints.tolist()[1:]
+    assert row_fingerprints(changed, columns).iloc[0] != fingerprints.iloc[0]
@@ -0,0 +1,75 @@
+import pytest
+import asyncio
+import pandas as pd
+
+from app.writers import partition_by_sku, run_chunk_writers
+
+@pytest.fixture
+def sample_chunks():
+    """Two chunks where SKUs repeat within and across chunks"""
+    first = pd.DataFrame({"seller-sku": ["A", "B", "C", "A"], "quantity": [1, 2, 3, 4]})
+    second = pd.DataFrame({"seller-sku": ["B", "A", "D"], "quantity": [5, 6, 7]}, index=[4, 5, 6])
+    return [first, second]
+
+def test_partition_by_sku_keeps_sku_together(sample_chunks):
+    """Test that every row for a SKU lands in one partition, in file order"""
+    partitions = partition_by_sku(sample_chunks[0], 3)
+
+    assert len(partitions) == 3
+    assert sum(len(partition) for partition in partitions) == 4
+    for partition in partitions:
+        if "A" in partition["seller-sku"].values:
+            assert partition.loc[partition["seller-sku"] == "A", "quantity"].tolist() == [1, 4]
+
+def test_partition_by_sku_single_writer(sample_chunks):
+    """Test that a single partition is the chunk itself"""
+    assert partition_by_sku(sample_chunks[0], 1)[0] is sample_chunks[0]
+
+def test_run_chunk_writers_preserves_sku_order(sample_chunks):
+    """Test that concurrent writers see each SKU's rows in file order"""
+    written = []
+
+    async def write(chunk_number, partition):
+        await asyncio.sleep(0)
+        written.extend(partition.itertuples(index=False, name=None))
+
+    asyncio.run(run_chunk_writers(sample_chunks, write, concurrency=3, queue_size=1))
+
+    assert len(written) == 7
+    assert [quantity for sku, quantity in written if sku == "A"] == [1, 4, 6]
+    assert [quantity for sku, quantity in written if sku == "B"] == [2, 5]
+
+def test_run_chunk_writers_raises_writer_failure(sample_chunks):
+    """Test that a writer failure stops the run and is re-raised"""
+    async def write(chunk_number, partition):
+        raise RuntimeError("write failed")
+
+    with pytest.raises(RuntimeError, match="write failed"):
+        asyncio.run(run_chunk_writers(sample_chunks, write, concurrency=2, queue_size=1))
+
+def test_run_chunk_writers_reports_committed_chunks(sample_chunks):
+    """Test that a chunk is committed only once it and every earlier chunk are written"""
+    committed = []
+    release_first = asyncio.Event()
+
+    async def write(chunk_number, partition):
+        # Hold back the first chunk's partition that contains SKU A
+        if chunk_number == 1 and "A" in partition["seller-sku"].values:
+            await release_first.wait()
+
+    def on_committed(chunk_number):
+        committed.append(chunk_number)
+
+    async def run():
+        writers = asyncio.create_task(run_chunk_writers(
+            sample_chunks, write, concurrency=3, queue_size=2, on_committed=on_committed
+        ))
+        await asyncio.sleep(0.01)
+        assert committed == []
+        release_first.set()
+        await writers
+
+    asyncio.run(run())
+
+    assert committed[-1] == 2
+    assert committed == sorted(committed)
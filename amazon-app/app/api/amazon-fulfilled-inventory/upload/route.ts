@@ -2,18 +2,9 @@ import { NextRequest, NextResponse } from 'next/server';
 import { randomUUID } from 'crypto';
 import fs from 'fs';
 import path from 'path';
-import { createClient } from 'redis';
-import { db } from '@/lib/db';
+import axios from 'axios';
 
-// Create Redis client
-const getRedisClient = async () => {
-  const client = createClient({
-    url: process.env.REDIS_URL || 'redis://redis:6379'
-  });
-  
-  await client.connect();
-  return client;
-};
+const AMAZON_FULFILLED_INVENTORY_API_URL = process.env.AMAZON_FULFILLED_INVENTORY_API_URL || 'http://amazon-fulfilled-inventory-service:5000';
 
 export async function POST(request: NextRequest) {
   try {
@@ -27,12 +18,13 @@ export async function POST(request: NextRequest) {
       }, { status: 400 });
     }
 
-    // Check file extension
+    // Check file extension; reports may also be uploaded compressed
     const filename = file.name.toLowerCase();
-    if (!filename.endsWith('.txt') && !filename.endsWith('.csv')) {
+    const isCompressed = /\.(gz|zip|zst)$/.test(filename);
+    if (!isCompressed && !filename.endsWith('.txt') && !filename.endsWith('.csv')) {
       return NextResponse.json({ 
         success: false, 
-        message: 'Invalid file format. Please upload a .txt or .csv file' 
+        message: 'Invalid file format. Please upload a .txt or .csv file, optionally compressed as .gz, .zip or .zst' 
       }, { status: 400 });
     }
 
@@ -51,73 +43,32 @@ export async function POST(request: NextRequest) {
     const filePath = path.join(uploadsDir, `${fileId}-${filename}`);
     fs.writeFileSync(filePath, buffer);
     
-    // Count approximate number of rows
-    const fileText = await file.text();
-    const lineCount = fileText.split('\n').length - 1; // subtract header row
-    
-    // Store file information in database
-    await db.query(
-      `INSERT INTO uploaded_files (
-         id, original_name, file_path, file_size, mime_type, status, total_rows, 
-         created_at, updated_at
-       ) VALUES ($1, $2, $3, $4, $5, $6, $7, NOW(), NOW())`,
-      [
-        fileId,
-        file.name,
-        filePath,
-        buffer.length,
-        file.type || 'text/plain',
-        'pending',
-        lineCount
-      ]
-    );
-    
-    // Queue task for background processing
+    // Hand the report to the Amazon Fulfilled Inventory microservice, which reads it from
+    // the shared uploads directory, registers it and ingests it in a background job
     try {
-      const redis = await getRedisClient();
-      
-      // Create a Celery-compatible task message
-      const taskId = randomUUID();
-      const task = {
-        id: taskId,
-        task: 'process_amazon_fulfilled_inventory', // Use a specific task name for this report type
-        args: [filePath, fileId],
-        kwargs: {},
-        exchange: 'celery',
-        routing_key: 'celery',
-        properties: {
-          delivery_mode: 2,  // persistent
-          correlation_id: taskId,
-          delivery_tag: taskId  // Add delivery_tag
-        }
-      };
-      
-      // Add task to Celery queue
-      await redis.lPush('celery', JSON.stringify(task));
-      await redis.quit();
+      const response = await axios.post(
+        `${AMAZON_FULFILLED_INVENTORY_API_URL}/api/reports/upload`,
+        null,
+        { params: { file_path: filePath } }
+      );
       
       return NextResponse.json({
         success: true,
         message: 'File uploaded and queued for processing',
-        fileId: fileId,
-        status: 'pending'
+        fileId: response.data.file_id,
+        status: response.data.status
       });
-    } catch (redisError) {
-      console.error('Error queueing task:', redisError);
-      
-      // Update file status to error
-      await db.query(
-        `UPDATE uploaded_files 
-         SET status = 'error', error_message = $1, updated_at = NOW() 
-         WHERE id = $2`,
-        [`Failed to queue processing task: ${(redisError as Error).message}`, fileId]
-      );
+    } catch (serviceError) {
+      console.error('Error queueing report with the inventory service:', serviceError);
+      fs.rmSync(filePath, { force: true });
       
+      // Pass on the service's rejection, e.g. a report above its size limit
+      const status = axios.isAxiosError(serviceError) ? serviceError.response?.status : undefined;
+      const detail = axios.isAxiosError(serviceError) ? serviceError.response?.data?.detail : undefined;
       return NextResponse.json({ 
         success: false, 
-        message: `Error queueing processing task: ${(redisError as Error).message}`,
-        fileId: fileId
-      }, { status: 500 });
+        message: `Error queueing processing task: ${detail || (serviceError as Error).message}`
+      }, { status: status && status < 500 ? status : 500 });
     }
   } catch (error) {
     console.error('Error uploading file:', error);
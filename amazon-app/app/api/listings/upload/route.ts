@@ -6,6 +6,14 @@ import { randomUUID } from 'crypto';
 import fs from 'fs';
 import path from 'path';
 import { createClient } from 'redis';
+import { getServerSession } from 'next-auth';
+import { authOptions } from '@/lib/auth';
+
+// Reports of at least this many bytes are queued behind smaller uploads (0, the default, disables this)
+const BULK_REPORT_MIN_BYTES = Number(process.env.BULK_REPORT_MIN_BYTES ?? 0);
+
+// Seconds an enqueued file stays claimed if its task is never acknowledged
+const ENQUEUE_KEY_TTL_SECONDS = 7 * 24 * 3600;
 
 // Create Redis client
 const getRedisClient = async () => {
@@ -29,12 +37,13 @@ export async function POST(request: NextRequest) {
       }, { status: 400 });
     }
 
-    // Check file extension
+    // Check file extension; reports may also be uploaded compressed
     const filename = file.name.toLowerCase();
-    if (!filename.endsWith('.txt') && !filename.endsWith('.csv')) {
+    const isCompressed = /\.(gz|zip|zst)$/.test(filename);
+    if (!isCompressed && !filename.endsWith('.txt') && !filename.endsWith('.csv')) {
       return NextResponse.json({ 
         success: false, 
-        message: 'Invalid file format. Please upload a .txt or .csv file' 
+        message: 'Invalid file format. Please upload a .txt or .csv file, optionally compressed as .gz, .zip or .zst' 
       }, { status: 400 });
     }
 
@@ -54,15 +63,24 @@ export async function POST(request: NextRequest) {
     fs.writeFileSync(filePath, buffer);
     
     // Count approximate number of rows
-    const fileText = await file.text();
-    const lineCount = fileText.split('\n').length - 1; // subtract header row
+    // (compressed reports are counted by the worker while they are processed)
+    let lineCount: number | null = null;
+    if (!isCompressed) {
+      const fileText = await file.text();
+      lineCount = fileText.split('\n').length - 1; // subtract header row
+    }
     
-    // Store file information in database
+    // Newer uploads supersede older queued ones per account; uploads made without a
+    // signed-in user all share the 'default' account
+    const session = await getServerSession(authOptions);
+    const userId = (session?.user as { id?: string } | undefined)?.id;
+    
+    // Store file information in database, with the uploading account
     await db.query(
       `INSERT INTO uploaded_files (
          id, original_name, file_path, file_size, mime_type, status, total_rows, 
-         created_at, updated_at
-       ) VALUES ($1, $2, $3, $4, $5, $6, $7, NOW(), NOW())`,
+         user_id, created_at, updated_at
+       ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW(), NOW())`,
       [
         fileId,
         file.name,
@@ -70,7 +88,8 @@ export async function POST(request: NextRequest) {
         buffer.length,
         file.type || 'text/plain',
         'pending',
-        lineCount
+        lineCount,
+        userId ?? null
       ]
     );
     
@@ -84,7 +103,7 @@ export async function POST(request: NextRequest) {
         id: taskId,
         task: 'process_report',
         args: [filePath, fileId],
-        kwargs: {},
+        kwargs: userId ? { user_id: userId } : {},
         exchange: 'celery',
         routing_key: 'celery',
         properties: {
@@ -94,8 +113,20 @@ export async function POST(request: NextRequest) {
         }
       };
       
-      // Add task to Celery queue
-      await redis.lPush('celery', JSON.stringify(task));
+      // Add task to Celery queue, claiming the file id and recording this upload as the
+      // newest snapshot of its report type, so the worker skips older queued uploads
+      const enqueue = redis.multi()
+        .set(`celery:enqueued:${fileId}`, taskId, { EX: ENQUEUE_KEY_TTL_SECONDS })
+        .set(`celery:latest:${task.task}:${userId ?? 'default'}`, fileId, { EX: ENQUEUE_KEY_TTL_SECONDS });
+      
+      // Large reports go to the bulk lane, which the worker drains after regular
+      // uploads, smallest file first
+      if (BULK_REPORT_MIN_BYTES > 0 && buffer.length >= BULK_REPORT_MIN_BYTES) {
+        enqueue.zAdd('celery:bulk', { score: buffer.length, value: JSON.stringify(task) });
+      } else {
+        enqueue.lPush('celery', JSON.stringify(task));
+      }
+      await enqueue.exec();
       await redis.quit();
       
       return NextResponse.json({
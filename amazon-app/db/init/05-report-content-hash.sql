@@ -0,0 +1,5 @@
+-- Add a content hash to uploaded files so identical re-uploads can be skipped
+ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
+
+-- Create index for looking up earlier uploads by content
+CREATE INDEX IF NOT EXISTS idx_uploaded_files_content_hash ON uploaded_files(content_hash);
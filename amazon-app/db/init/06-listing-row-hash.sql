@@ -0,0 +1,2 @@
+-- Add a fingerprint of the report columns to listings so unchanged rows are not rewritten
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS row_hash BIGINT;
@@ -0,0 +1,6 @@
+-- Add a resume checkpoint to uploaded files so interrupted ingests continue where they stopped
+ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS checkpoint JSONB;
+
+-- Create index for finding interrupted files on startup
+CREATE INDEX IF NOT EXISTS idx_uploaded_files_resumable ON uploaded_files(updated_at)
+WHERE status IN ('processing', 'interrupted');
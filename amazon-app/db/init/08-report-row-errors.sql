@@ -0,0 +1,9 @@
+-- Create table for report rows that were rejected during an ingest
+CREATE TABLE IF NOT EXISTS report_row_errors (
+    file_id UUID NOT NULL REFERENCES uploaded_files(id) ON DELETE CASCADE,
+    row_number INTEGER NOT NULL, -- 1 for the first row after the header
+    sku VARCHAR(255),
+    message TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (file_id, row_number)
+);
@@ -0,0 +1,2 @@
+-- Record the typed Arrow snapshot written when a report is first parsed
+ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS snapshot_path TEXT;
@@ -0,0 +1,2 @@
+-- Record the account that uploaded a file, so queued uploads are coalesced per account
+ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS user_id TEXT;
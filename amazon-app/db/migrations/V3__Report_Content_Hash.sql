@@ -0,0 +1,6 @@
+-- V3__Report_Content_Hash.sql
+-- Store a SHA-256 of each uploaded report so identical re-uploads can be skipped
+
+ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
+
+CREATE INDEX IF NOT EXISTS idx_uploaded_files_content_hash ON uploaded_files(content_hash);
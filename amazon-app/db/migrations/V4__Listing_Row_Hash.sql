@@ -0,0 +1,4 @@
+-- V4__Listing_Row_Hash.sql
+-- Store a 64-bit fingerprint of each listing's report columns so ingest can skip unchanged rows
+
+ALTER TABLE listings ADD COLUMN IF NOT EXISTS row_hash BIGINT;
@@ -0,0 +1,7 @@
+-- V5__Upload_Checkpoints.sql
+-- Record the last committed chunk of each upload so interrupted ingests can resume
+
+ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS checkpoint JSONB;
+
+CREATE INDEX IF NOT EXISTS idx_uploaded_files_resumable ON uploaded_files(updated_at)
+WHERE status IN ('processing', 'interrupted');
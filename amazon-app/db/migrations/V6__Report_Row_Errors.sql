@@ -0,0 +1,11 @@
+-- V6__Report_Row_Errors.sql
+-- Record rejected report rows per file so operators can see which SKUs failed
+
+CREATE TABLE IF NOT EXISTS report_row_errors (
+    file_id UUID NOT NULL REFERENCES uploaded_files(id) ON DELETE CASCADE,
+    row_number INTEGER NOT NULL,
+    sku VARCHAR(255),
+    message TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (file_id, row_number)
+);
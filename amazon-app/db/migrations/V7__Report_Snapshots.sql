@@ -0,0 +1,4 @@
+-- V7__Report_Snapshots.sql
+-- Record the typed Arrow snapshot of each parsed report so resolutions and resumes skip re-parsing
+
+ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS snapshot_path TEXT;
@@ -0,0 +1,4 @@
+-- V8__Upload_Accounts.sql
+-- Record the account that uploaded each file, so requeued uploads are still coalesced per account
+
+ALTER TABLE uploaded_files ADD COLUMN IF NOT EXISTS user_id TEXT;
@@ -7,6 +7,7 @@ import psycopg2
 from psycopg2.extras import execute_values
 from datetime import datetime
 import pandas as pd
+import pyarrow as pa
 
 # Set up logging
 logging.basicConfig(
@@ -19,6 +20,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger("file_processor")
 
+# Compressed upload formats, by file extension
+COMPRESSION_BY_EXTENSION = {'.gz': 'gzip', '.zip': 'zip', '.zst': 'zstd'}
+
 def get_db_connection():
     """Establish a database connection"""
     try:
@@ -33,6 +37,21 @@ def get_db_connection():
         logger.error(f"Database connection error: {e}")
         raise
 
+def report_compression(file_path):
+    """Compression of an uploaded file for pandas, chosen from its extension (None when uncompressed)"""
+    extension = os.path.splitext(file_path)[1].lower()
+    return COMPRESSION_BY_EXTENSION.get(extension)
+
+def read_upload(file_path):
+    """Read an uploaded file, decompressing .gz, .zip and .zst uploads while reading"""
+    compression = report_compression(file_path)
+    if compression == 'zstd':
+        # Decompress with pyarrow's zstd codec, as the report services do, since
+        # pandas would need the separate zstandard package
+        with pa.input_stream(file_path, compression='zstd') as source:
+            return pd.read_csv(source)
+    return pd.read_csv(file_path, compression=compression)
+
 def process_file(file_id):
     """Process an uploaded file and update database"""
     logger.info(f"Processing file ID: {file_id}")
@@ -61,8 +80,8 @@ def process_file(file_id):
             conn.commit()
             return False
         
-        # Read the file
-        df = pd.read_csv(file_path)
+        # Read the file, decompressing .gz, .zip and .zst uploads while reading
+        df = read_upload(file_path)
         logger.info(f"Successfully read file with {len(df)} rows")
         
         # Clean column names (lowercase, remove whitespace)
@@ -140,26 +159,20 @@ def insert_upload_data(cursor, df, file_id):
     # Prepare data for insert
     columns = list(df.columns)
     
-    # Add row number and upload_id to each row
-    data = []
-    for idx, row in df.iterrows():
-        row_dict = dict(row)
-        row_dict['upload_id'] = file_id
-        row_dict['row_number'] = idx + 1  # 1-based row number
-        data.append(row_dict)
-    
-    # Convert to list of tuples
-    values = [tuple(row[col] if col in row else None for col in ['upload_id', 'row_number'] + columns) 
-              for row in data]
+    # Build the rows column by column: nulls become None and numpy scalars
+    # become native Python values that psycopg2 can adapt
+    arrays = [[file_id] * len(df), (df.index + 1).tolist()]  # 1-based row number
+    for col in columns:
+        arrays.append(df[col].astype(object).where(df[col].notna(), None).tolist())
+    values = list(zip(*arrays))
     
     # Create insert query
     columns_str = ", ".join(['upload_id', 'row_number'] + columns)
-    placeholders = ", ".join(["%s"] * (len(columns) + 2))
     
-    query = f"INSERT INTO upload_data ({columns_str}) VALUES ({placeholders})"
+    query = f"INSERT INTO upload_data ({columns_str}) VALUES %s"
     
     # Execute insert
-    cursor.executemany(query, values)
+    execute_values(cursor, query, values)
     logger.info(f"Inserted {len(values)} rows into upload_data table")
 
 def check_duplicate_skus(cursor, file_id):
@@ -0,0 +1,102 @@
+"""
+Inspect and replay tasks the worker dead-lettered after running out of retries
+
+Usage:
+    python report_dlq.py list
+    python report_dlq.py show 1
+    python report_dlq.py replay 1 3
+    python report_dlq.py replay --all
+    python report_dlq.py drop 2
+
+Dead letters are numbered from 1, newest first, as shown by `list`.
+"""
+import os
+import sys
+import json
+import argparse
+import redis
+from dotenv import load_dotenv
+
+from report_queue import TaskQueue
+
+load_dotenv()
+
+def get_queue():
+    """Queue of the worker, for reading and replaying its dead letters"""
+    redis_client = redis.Redis.from_url(os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0'))
+    claim_ttl = int(os.getenv('ENQUEUE_KEY_TTL_SECONDS', str(7 * 24 * 3600)))
+    return TaskQueue(redis_client, 'celery', claim_ttl=claim_ttl)
+
+def select(dead_letters, numbers, all_entries=False):
+    """Pick dead letters by their 1-based numbers, or all of them"""
+    if all_entries:
+        return dead_letters
+    selected = []
+    for number in numbers:
+        if not 1 <= number <= len(dead_letters):
+            raise SystemExit(f"No dead letter number {number} (there are {len(dead_letters)})")
+        selected.append(dead_letters[number - 1])
+    return selected
+
+def describe(entry):
+    """One-line summary of a dead letter"""
+    task = entry.get('task') or {}
+    return (
+        f"{entry.get('dead_at', '?')}  {task.get('task', '<undecodable>')}  "
+        f"id={task.get('id')}  args={task.get('args')}  "
+        f"attempts={len(entry.get('attempts') or [])}  error={entry.get('error')}"
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and replay dead-lettered worker tasks")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="List dead-lettered tasks, newest first")
+    show = commands.add_parser('show', help="Print dead letters with their full attempt history")
+    show.add_argument('numbers', type=int, nargs='+')
+    replay = commands.add_parser('replay', help="Queue dead-lettered tasks again with fresh retries")
+    replay.add_argument('numbers', type=int, nargs='*')
+    replay.add_argument('--all', action='store_true', help="Replay every dead letter")
+    drop = commands.add_parser('drop', help="Delete dead letters without running them")
+    drop.add_argument('numbers', type=int, nargs='*')
+    drop.add_argument('--all', action='store_true', help="Delete every dead letter")
+    args = parser.parse_args(argv)
+
+    queue = get_queue()
+    dead_letters = queue.dead_letters()
+
+    if args.command == 'list':
+        if not dead_letters:
+            print("No dead-lettered tasks")
+        for number, (_, entry) in enumerate(dead_letters, start=1):
+            print(f"{number:>4}  {describe(entry)}")
+        return 0
+
+    if args.command == 'show':
+        for raw, entry in select(dead_letters, args.numbers):
+            print(json.dumps(entry, indent=2))
+        return 0
+
+    if not args.numbers and not args.all:
+        parser.error(f"{args.command} needs dead letter numbers or --all")
+
+    verb = 'Replayed' if args.command == 'replay' else 'Dropped'
+    handled = 0
+    for raw, entry in select(dead_letters, args.numbers, args.all):
+        task = entry.get('task') or {}
+        if args.command == 'replay':
+            done = queue.replay(raw)
+            if not done and not entry.get('task'):
+                print(f"Cannot replay an undecodable message: {entry.get('message')!r}")
+                continue
+        else:
+            done = queue.drop(raw)
+        if done:
+            handled += 1
+            print(f"{verb} {task.get('task')} task {task.get('id')}")
+        else:
+            print(f"Task {task.get('id')} was already taken off the dead letter list")
+    print(f"{verb} {handled} dead letters")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Set
+
+# Configure logging
+logger = logging.getLogger("report_duplicates")
+
+class DuplicateSkuDetector:
+    """
+    Find SKUs that appear more than once while a report is streamed
+
+    Chunks are fed in file order with their row offsets as index labels. Each
+    SKU is reduced to a 64-bit hash mapped to the row it first appeared on,
+    so detection is a single O(n) pass that holds one integer pair per
+    distinct SKU instead of the SKU strings. Only the groups of duplicated
+    SKUs, with the row offsets of all their occurrences, are kept in full.
+    A 64-bit hash collision between two distinct SKUs (vanishingly rare)
+    would add an unrelated row to a group.
+    """
+
+    def __init__(self):
+        # First row offset of each SKU, by SKU hash
+        self._first_rows: Dict[int, int] = {}
+
+        # Row offsets of every occurrence of each duplicated SKU, in file order
+        self.groups: Dict[str, List[int]] = {}
+
+    def add(self, skus: pd.Series) -> int:
+        """
+        Feed the SKU column of the next chunk
+
+        Args:
+            skus: SKU column indexed by row offset; blank SKUs are ignored
+
+        Returns:
+            Number of rows in the chunk whose SKU appeared before
+        """
+        skus = skus.dropna().astype(str)
+        skus = skus[skus.str.strip() != '']
+        rows = skus.index.to_numpy()
+        hashes = pd.util.hash_array(skus.to_numpy(dtype=object))
+
+        # Record the first row of each new SKU; seen SKUs return their earlier first row
+        first_rows = np.fromiter(
+            map(self._first_rows.setdefault, hashes.tolist(), rows.tolist()),
+            dtype=np.int64,
+            count=len(rows),
+        )
+        repeated = np.flatnonzero(first_rows != rows)
+
+        for position in repeated.tolist():
+            sku = skus.iat[position]
+            group = self.groups.get(sku)
+            if group is None:
+                self.groups[sku] = [int(first_rows[position]), int(rows[position])]
+            else:
+                group.append(int(rows[position]))
+        return len(repeated)
+
+    @property
+    def duplicate_rows(self) -> int:
+        """Number of rows, first occurrences included, whose SKU is duplicated"""
+        return sum(len(rows) for rows in self.groups.values())
+
+    def row_offsets(self) -> Set[int]:
+        """Row offsets of every row whose SKU is duplicated"""
+        return {row for rows in self.groups.values() for row in rows}
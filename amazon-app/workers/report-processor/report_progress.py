@@ -0,0 +1,82 @@
+import logging
+import threading
+
+# Configure logging
+logger = logging.getLogger('report_progress')
+
+class ProgressReporter:
+    """
+    Coalesce row progress into at most one write per interval
+
+    The processing loop calls update() for every row, which only stores the
+    count, and set_checkpoint() once a chunk is durably written. A background
+    thread writes the latest count and checkpoint every interval seconds if
+    they changed, and both are flushed when the reporter is closed.
+
+    Usage:
+        with ProgressReporter(write, interval=2.0) as progress:
+            progress.update(processed_rows)
+    """
+
+    def __init__(self, write, interval, processed_rows=0):
+        """
+        Initialize the reporter
+
+        Args:
+            write: Function called with the number of processed rows and the
+                latest checkpoint (None if it did not change)
+            interval: Minimum number of seconds between writes
+            processed_rows: Rows already processed, e.g. before a resume
+        """
+        self.write = write
+        self.interval = max(interval, 0)
+        self.processed_rows = processed_rows
+        self.checkpoint = None
+        self._written_rows = processed_rows
+        self._written_checkpoint = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='progress-reporter', daemon=True)
+
+    def update(self, processed_rows):
+        """Record the number of rows processed so far"""
+        self.processed_rows = processed_rows
+
+    def set_checkpoint(self, checkpoint):
+        """Record the point up to which the report is durably written"""
+        self.checkpoint = checkpoint
+
+    def start(self):
+        """Start writing progress in the background"""
+        self._thread.start()
+
+    def close(self):
+        """Stop the background thread and write the final count"""
+        self._stopped.set()
+        self._thread.join()
+        self._flush()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _run(self):
+        """Write progress every interval until stopped"""
+        while not self._stopped.wait(self.interval):
+            self._flush()
+
+    def _flush(self):
+        """Write the current count and checkpoint if they changed since the last write"""
+        processed_rows = self.processed_rows
+        checkpoint = self.checkpoint
+        new_checkpoint = checkpoint if checkpoint is not self._written_checkpoint else None
+        if processed_rows == self._written_rows and new_checkpoint is None:
+            return
+        try:
+            self.write(processed_rows, new_checkpoint)
+            self._written_rows = processed_rows
+            self._written_checkpoint = checkpoint
+        except Exception as e:
+            logger.error(f"Error writing progress: {e}")
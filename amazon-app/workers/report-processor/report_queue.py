@@ -0,0 +1,403 @@
+import os
+import json
+import time
+import random
+import socket
+import logging
+import threading
+from datetime import datetime, timezone
+
+# Configure logging
+logger = logging.getLogger('report_queue')
+
+# Tasks that ingest a full snapshot of a report, so only the newest queued one matters
+SNAPSHOT_TASKS = ('process_report', 'process_all_listings_report')
+
+# Atomically move the next task of the highest-priority non-empty lane into
+# a processing list. KEYS[1] is the processing list and KEYS[2..] the lanes,
+# highest priority first; list lanes are FIFO, sorted set lanes lowest score first.
+TAKE_SCRIPT = """
+for i = 2, #KEYS do
+    local message
+    if redis.call('TYPE', KEYS[i]).ok == 'zset' then
+        message = redis.call('ZPOPMIN', KEYS[i])[1]
+    else
+        message = redis.call('RPOP', KEYS[i])
+    end
+    if message then
+        redis.call('LPUSH', KEYS[1], message)
+        return message
+    end
+end
+return false
+"""
+
+# Move retries whose backoff has elapsed from the delayed set (KEYS[1]) onto
+# the queue (KEYS[2]); ARGV[1] is the current time
+PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, message in ipairs(due) do
+    redis.call('ZREM', KEYS[1], message)
+    redis.call('LPUSH', KEYS[2], message)
+end
+return #due
+"""
+
+# Queue a task unless its file_id is already claimed by a queued, running or
+# retrying task. KEYS: enqueued key, lane; ARGV: task JSON, task id, claim TTL
+ENQUEUE_SCRIPT = """
+if not redis.call('SET', KEYS[1], ARGV[2], 'NX', 'EX', ARGV[3]) then
+    return 0
+end
+redis.call('LPUSH', KEYS[2], ARGV[1])
+return 1
+"""
+
+# Move a dead-lettered task back onto the queue unless another replay took it
+# first. KEYS: dead letter list, queue, enqueued key of its file (optional);
+# ARGV: dead letter entry, task JSON, task id, claim TTL
+REPLAY_SCRIPT = """
+if redis.call('LREM', KEYS[1], 1, ARGV[1]) == 0 then
+    return 0
+end
+redis.call('LPUSH', KEYS[2], ARGV[2])
+if KEYS[3] then
+    redis.call('SET', KEYS[3], ARGV[3], 'EX', ARGV[4])
+end
+return 1
+"""
+
+class TaskQueue:
+    """
+    Consume a Redis task list with at-least-once delivery
+
+    receive() atomically moves a task from the queue into this consumer's
+    processing list, and ack() removes it once it has been handled, so a
+    task is never only held in the memory of a process that can die.
+
+    Tasks are taken from three priority lanes, each drained before the next:
+    <queue>:interactive (list) for tasks a user is waiting on, such as
+    duplicate resolutions; <queue> (list) for regular uploads; and
+    <queue>:bulk (sorted set scored by file size) for large reports and
+    reprocessing, so the smallest of them runs first.
+
+    A task that fails is retried with exponential backoff: fail() parks it in
+    the <queue>:delayed sorted set, scored by when it is due, and
+    promote_due() moves it back onto the queue. Once its retries are used
+    up, it is moved to the <queue>:dead list with the error of every attempt.
+
+    Each consumer holds a lease key that a background thread refreshes while
+    it is alive. When a consumer stops refreshing it, e.g. because it was
+    killed, the lease expires after visibility_timeout seconds and reap(),
+    called by any other consumer, moves its unacknowledged tasks back onto
+    the queue.
+
+    Usage:
+        with TaskQueue(redis_client, 'celery') as queue:
+            message = queue.receive(timeout=5)
+            ...
+            queue.ack(message)
+    """
+
+    def __init__(self, redis_client, queue, visibility_timeout=60, consumer_id=None,
+                 max_retries=3, retry_base_delay=30, retry_max_delay=1800, claim_ttl=7 * 24 * 3600):
+        """
+        Initialize the consumer
+
+        Args:
+            redis_client: Redis client
+            queue: Name of the Redis list tasks are pushed onto
+            visibility_timeout: Seconds after which the tasks of a consumer that
+                stopped renewing its lease are handed to other consumers
+            consumer_id: Unique name of this consumer (host and process id by default)
+            max_retries: Retries of a failed task before it is dead-lettered
+            retry_base_delay: Seconds before the first retry, doubled for each further one
+            retry_max_delay: Upper bound on the seconds between retries
+            claim_ttl: Seconds a file_id claimed by enqueue() or replay() stays
+                claimed if its task is never acknowledged
+        """
+        self.redis = redis_client
+        self.queue = queue
+        self.visibility_timeout = max(int(visibility_timeout), 3)
+        self.consumer_id = consumer_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.processing = self.processing_key(self.consumer_id)
+        self.lanes = [f"{queue}:interactive", queue, f"{queue}:bulk"]
+        self.max_retries = max(max_retries, 0)
+        self.retry_base_delay = max(retry_base_delay, 0)
+        self.retry_max_delay = max(retry_max_delay, self.retry_base_delay)
+        self.claim_ttl = max(int(claim_ttl), 1)
+        self._enqueue = self.redis.register_script(ENQUEUE_SCRIPT)
+        self._take = self.redis.register_script(TAKE_SCRIPT)
+        self._promote = self.redis.register_script(PROMOTE_SCRIPT)
+        self._replay = self.redis.register_script(REPLAY_SCRIPT)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='queue-lease', daemon=True)
+
+    @property
+    def consumers_key(self):
+        """Set of the consumers that may hold tasks in a processing list"""
+        return f"{self.queue}:consumers"
+
+    @property
+    def delayed_key(self):
+        """Sorted set of failed tasks waiting for a retry, scored by when they are due"""
+        return f"{self.queue}:delayed"
+
+    @property
+    def dead_letter_key(self):
+        """List of tasks that failed on every attempt, newest first"""
+        return f"{self.queue}:dead"
+
+    def enqueued_key(self, file_id):
+        """Key that claims a file_id while its task is queued (see queue_task.enqueue_task)"""
+        return f"{self.queue}:enqueued:{file_id}"
+
+    def processing_key(self, consumer_id):
+        """List of the tasks a consumer has received but not acknowledged"""
+        return f"{self.queue}:processing:{consumer_id}"
+
+    def lease_key(self, consumer_id):
+        """Key that exists while a consumer is alive"""
+        return f"{self.queue}:lease:{consumer_id}"
+
+    def start(self):
+        """Register this consumer and keep its lease alive in the background"""
+        self.renew_lease()
+        self._thread.start()
+
+    def close(self):
+        """Stop renewing the lease and hand back any unacknowledged tasks right away"""
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        requeued = self._requeue(self.consumer_id)
+        if requeued:
+            logger.info(f"Returned {requeued} unfinished tasks to queue '{self.queue}'")
+        self.redis.delete(self.lease_key(self.consumer_id))
+        self.redis.srem(self.consumers_key, self.consumer_id)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def renew_lease(self):
+        """Mark this consumer as alive for another visibility timeout"""
+        with self.redis.pipeline() as pipe:
+            pipe.sadd(self.consumers_key, self.consumer_id)
+            pipe.set(self.lease_key(self.consumer_id), 1, ex=self.visibility_timeout)
+            pipe.execute()
+
+    def receive(self, timeout):
+        """
+        Wait for the next task and move it into this consumer's processing list
+
+        Args:
+            timeout: Seconds to wait for a task
+
+        Returns:
+            The raw task message, or None if no task arrived in time
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            message = self._take(keys=[self.processing, *self.lanes])
+            if message is not None:
+                return message
+
+            # Wake up at once for interactive tasks and within a second for the rest
+            wait = min(deadline - time.monotonic(), 1)
+            if wait <= 0:
+                return None
+            # Tasks are pushed on the left, so the oldest is taken from the right
+            message = self.redis.blmove(self.lanes[0], self.processing, wait, src='RIGHT', dest='LEFT')
+            if message is not None:
+                return message
+
+    def enqueue(self, task, file_id, lane=None):
+        """
+        Queue a task for a file unless a task for that file_id is already queued
+
+        The file_id claim is held from enqueue until ack or dead letter, so a
+        task that is running, waiting for a retry or left in the processing
+        list of a stopped consumer (which reap() hands back) also counts as
+        queued. Unlike queue_task.enqueue_task, the file is not recorded as
+        the newest snapshot of its report.
+
+        Args:
+            task: Task message to queue
+            file_id: File the task is for
+            lane: Lane to push the task onto (the regular queue by default)
+
+        Returns:
+            True if the task was queued, False if the file_id was already claimed
+        """
+        keys = [self.enqueued_key(file_id), lane or self.queue]
+        return bool(self._enqueue(keys=keys, args=[json.dumps(task), task['id'], self.claim_ttl]))
+
+    def ack(self, message, file_id=None):
+        """Remove a handled task from this consumer's processing list and release its file_id"""
+        with self.redis.pipeline() as pipe:
+            pipe.lrem(self.processing, 1, message)
+            if file_id:
+                pipe.delete(self.enqueued_key(file_id))
+            pipe.execute()
+
+    def fail(self, message, task, error, file_id=None, retry=True):
+        """
+        Take a failed task out of the processing list, to be retried or dead-lettered
+
+        The task keeps its file_id claim while it waits for a retry. Its
+        attempt history travels with the message, so the backoff and the
+        dead letter see every earlier failure.
+
+        Args:
+            message: Raw task message as received
+            task: Decoded task, or None if the message could not be decoded
+            error: Description of the failure
+            file_id: File the task was for, released if the task is dead-lettered
+            retry: False to dead-letter the task right away, e.g. an unknown task type
+
+        Returns:
+            Seconds until the retry, or None if the task was dead-lettered
+        """
+        attempts = list(task.get('attempts') or []) if task else []
+        attempts.append({'failed_at': datetime.now(timezone.utc).isoformat(), 'error': error})
+        task_id = task.get('id') if task else None
+
+        if task is None or not retry or len(attempts) > self.max_retries:
+            entry = {
+                'task': task,
+                'message': None if task else _text(message),
+                'error': error,
+                'attempts': attempts,
+                'dead_at': attempts[-1]['failed_at'],
+            }
+            with self.redis.pipeline() as pipe:
+                pipe.lpush(self.dead_letter_key, json.dumps(entry))
+                pipe.lrem(self.processing, 1, message)
+                if file_id:
+                    pipe.delete(self.enqueued_key(file_id))
+                pipe.execute()
+            logger.error(f"Dead-lettered task {task_id} after {len(attempts)} attempts: {error}")
+            return None
+
+        # Exponential backoff with jitter, so tasks that failed together do not retry together
+        delay = min(self.retry_base_delay * 2 ** (len(attempts) - 1), self.retry_max_delay)
+        delay *= random.uniform(0.5, 1)
+        retried = json.dumps({**task, 'retries': len(attempts), 'attempts': attempts})
+        with self.redis.pipeline() as pipe:
+            pipe.zadd(self.delayed_key, {retried: time.time() + delay})
+            pipe.lrem(self.processing, 1, message)
+            pipe.execute()
+        logger.warning(
+            f"Task {task_id} failed (attempt {len(attempts)} of {self.max_retries + 1}), "
+            f"retrying in {delay:.0f} seconds: {error}"
+        )
+        return delay
+
+    def promote_due(self):
+        """
+        Move retries whose backoff has elapsed back onto the queue
+
+        Returns:
+            Number of tasks moved
+        """
+        return self._promote(keys=[self.delayed_key, self.queue], args=[time.time()])
+
+    def dead_letters(self):
+        """
+        List the dead-lettered tasks, newest first
+
+        Returns:
+            List of (raw entry, decoded entry) tuples; the raw entry identifies
+            it for replay() and drop()
+        """
+        return [(raw, json.loads(raw)) for raw in self.redis.lrange(self.dead_letter_key, 0, -1)]
+
+    def replay(self, raw_entry):
+        """
+        Queue a dead-lettered task again with a fresh set of retries
+
+        Returns:
+            False if the entry is gone or holds no decodable task
+        """
+        task = json.loads(raw_entry).get('task')
+        if not task:
+            return False
+
+        task = {key: value for key, value in task.items() if key not in ('retries', 'attempts')}
+        args = task.get('args') or []
+        file_id = args[1] if len(args) > 1 else (task.get('kwargs') or {}).get('file_id')
+        keys = [self.dead_letter_key, self.queue]
+        if file_id:
+            keys.append(self.enqueued_key(file_id))
+        return bool(self._replay(
+            keys=keys, args=[raw_entry, json.dumps(task), task.get('id', ''), self.claim_ttl]
+        ))
+
+    def drop(self, raw_entry):
+        """Delete a dead-lettered task; returns False if it was already gone"""
+        return bool(self.redis.lrem(self.dead_letter_key, 1, raw_entry))
+
+    def superseded_by(self, task_name, file_id, account=None):
+        """
+        Find a newer full snapshot of the same report that was queued after this one
+
+        Producers record the file_id of the newest queued snapshot per report
+        type and account (see queue_task.enqueue_task), so an older snapshot
+        still in the queue would only be overwritten by the newer one. The
+        marker is only the last file queued for the account, e.g. a requeued
+        older upload does not update it, so callers confirm the returned file
+        was uploaded after this one before skipping it.
+
+        Returns:
+            The latest queued file_id if it differs from this one, else None
+        """
+        if task_name not in SNAPSHOT_TASKS or not file_id:
+            return None
+        latest = self.redis.get(f"{self.queue}:latest:{task_name}:{account or 'default'}")
+        if latest is None:
+            return None
+        latest = latest.decode() if isinstance(latest, bytes) else latest
+        return latest if latest != str(file_id) else None
+
+    def reap(self):
+        """
+        Requeue the unacknowledged tasks of consumers whose lease has expired
+
+        Returns:
+            Number of tasks moved back onto the queue
+        """
+        requeued = 0
+        for consumer_id in self.redis.smembers(self.consumers_key):
+            consumer_id = consumer_id.decode() if isinstance(consumer_id, bytes) else consumer_id
+            if consumer_id == self.consumer_id or self.redis.exists(self.lease_key(consumer_id)):
+                continue
+
+            count = self._requeue(consumer_id)
+            if count:
+                logger.warning(f"Requeued {count} tasks of stopped consumer {consumer_id}")
+            requeued += count
+            self.redis.srem(self.consumers_key, consumer_id)
+        return requeued
+
+    def _requeue(self, consumer_id):
+        """Move every task in a consumer's processing list back to the front of the queue"""
+        count = 0
+        while self.redis.lmove(self.processing_key(consumer_id), self.queue, src='RIGHT', dest='RIGHT') is not None:
+            count += 1
+        return count
+
+    def _run(self):
+        """Renew the lease a few times per visibility timeout until closed"""
+        while not self._stopped.wait(self.visibility_timeout / 3):
+            try:
+                self.renew_lease()
+            except Exception as e:
+                logger.error(f"Error renewing queue lease: {e}")
+
+def _text(message):
+    """Raw message as text, for storing it in JSON"""
+    return message.decode(errors='replace') if isinstance(message, bytes) else message
@@ -0,0 +1,378 @@
+import io
+import os
+import gzip
+import logging
+import zipfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from typing import BinaryIO, Iterator, Optional, Dict, List
+
+from report_schema import ALL_LISTINGS_SCHEMA, apply_schema, decode_categories, to_frame
+
+# Configure logging
+logger = logging.getLogger("report_reader")
+
+# Number of bytes sampled from the start of a report to estimate row width
+SAMPLE_SIZE_BYTES = 1024 * 1024
+
+# Approximate ratio between the in-memory size of a parsed DataFrame row
+# (boxed Python strings, index, block overhead) and its width on disk
+PARSED_ROW_OVERHEAD = 8
+
+# Block size used when scanning a report for line breaks
+READ_BLOCK_SIZE = 1024 * 1024
+
+# Compressed report formats, by file extension
+COMPRESSED_EXTENSIONS = ('.gz', '.zip', '.zst')
+
+# Extension of the typed snapshot kept next to a parsed report
+SNAPSHOT_EXTENSION = '.arrow'
+
+# Codec the record batches of a snapshot are compressed with
+SNAPSHOT_COMPRESSION = 'zstd'
+
+class ReportTooLargeError(ValueError):
+    """Raised when a report file exceeds the configured size limit"""
+    pass
+
+def check_report_size(file_path: str, max_size_mb: int) -> int:
+    """
+    Verify that a report file is within the configured size limit
+
+    Args:
+        file_path: Path to the report file
+        max_size_mb: Maximum allowed size in MB (0 disables the check)
+
+    Returns:
+        File size in bytes
+    """
+    file_size = os.path.getsize(file_path)
+    if max_size_mb and file_size > max_size_mb * 1024 * 1024:
+        raise ReportTooLargeError(
+            f"Report file is {file_size / (1024 * 1024):.1f} MB, "
+            f"which exceeds the limit of {max_size_mb} MB"
+        )
+    return file_size
+
+def is_compressed(file_path: str) -> bool:
+    """Whether a report is stored compressed (.gz, .zip or .zst)"""
+    return file_path.lower().endswith(COMPRESSED_EXTENSIONS)
+
+def open_report(file_path: str) -> BinaryIO:
+    """
+    Open a report for binary reading, decompressing it while it is read
+
+    Gzip and Zstandard files are decompressed as a stream, and a zip archive
+    must hold a single report, which is streamed from the archive. Other files
+    are opened as they are.
+
+    Args:
+        file_path: Path to the report file
+
+    Returns:
+        Binary file object with the uncompressed report
+    """
+    name = file_path.lower()
+    if name.endswith('.gz'):
+        return gzip.open(file_path, 'rb')
+    if name.endswith('.zst'):
+        return io.BufferedReader(pa.input_stream(file_path, compression='zstd'), READ_BLOCK_SIZE)
+    if name.endswith('.zip'):
+        with zipfile.ZipFile(file_path) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            if len(members) != 1:
+                raise ValueError(f"Zip archive must contain exactly one report, found {len(members)} files")
+            # The member keeps the archive file open until it is closed
+            return archive.open(members[0])
+    return open(file_path, 'rb')
+
+def count_report_rows(file_path: str) -> int:
+    """
+    Count the data rows in a report without parsing it
+
+    Args:
+        file_path: Path to the report file
+
+    Returns:
+        Number of lines after the header row
+    """
+    line_count = 0
+    last_block = b""
+    with open_report(file_path) as f:
+        while True:
+            block = f.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            line_count += block.count(b"\n")
+            last_block = block
+
+    # Count a final line that is not terminated by a newline
+    if last_block and not last_block.endswith(b"\n"):
+        line_count += 1
+
+    return max(line_count - 1, 0)
+
+def estimate_chunk_rows(file_path: str, memory_budget_mb: int, max_rows: int) -> int:
+    """
+    Choose how many rows to parse at once so a chunk stays within the memory budget
+
+    Args:
+        file_path: Path to the report file
+        memory_budget_mb: Memory budget for a single parsed chunk in MB
+        max_rows: Upper bound on the number of rows per chunk
+
+    Returns:
+        Number of rows per chunk (at least 1)
+    """
+    with open_report(file_path) as f:
+        sample = f.read(SAMPLE_SIZE_BYTES)
+
+    sample_lines = max(sample.count(b"\n"), 1)
+    avg_row_bytes = max(len(sample) / sample_lines, 1)
+
+    budget_rows = int((memory_budget_mb * 1024 * 1024) / (avg_row_bytes * PARSED_ROW_OVERHEAD))
+    chunk_rows = max(min(max_rows, budget_rows), 1)
+
+    logger.info(
+        f"Using chunks of {chunk_rows} rows "
+        f"(~{avg_row_bytes:.0f} bytes per row, budget {memory_budget_mb} MB)"
+    )
+    return chunk_rows
+
+def read_report(
+    file_path: str,
+    sep: str = "\t",
+    schema: Optional[Dict[str, pa.DataType]] = ALL_LISTINGS_SCHEMA,
+) -> pd.DataFrame:
+    """
+    Parse a whole report with Arrow's multithreaded CSV reader
+
+    Every column is read as text and cast to its declared type (see
+    apply_schema). Prefer iter_report_chunks for large reports.
+
+    Args:
+        file_path: Path to the report file
+        sep: Field separator
+        schema: Declared column types by normalized column name (None keeps text)
+
+    Returns:
+        DataFrame with stripped column names
+    """
+    with open_report(file_path) as source:
+        table = pacsv.read_csv(
+            source,
+            read_options=pacsv.ReadOptions(use_threads=True),
+            parse_options=pacsv.ParseOptions(delimiter=sep),
+            convert_options=_text_convert_options(file_path, sep),
+        )
+    df = to_frame(apply_schema(table, schema))
+    df.columns = [col.strip() for col in df.columns]
+    return df
+
+def iter_report_chunks(
+    file_path: str,
+    chunk_size: int,
+    sep: str = "\t",
+    usecols: Optional[List[str]] = None,
+    schema: Optional[Dict[str, pa.DataType]] = ALL_LISTINGS_SCHEMA,
+    start_row: int = 0,
+    snapshot_path: Optional[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a report file as DataFrame chunks
+
+    Compressed reports are decompressed as they are read (see open_report).
+    The file is parsed by Arrow's multithreaded CSV reader with every column
+    read as text and then cast to its declared type (see apply_schema), so no
+    dtypes are inferred. Only one chunk is held in memory at a time. Chunks
+    keep a continuous index across the file, so index labels are row offsets
+    in the report, also when reading starts at start_row.
+
+    With snapshot_path, the typed rows are also written there as an Arrow IPC
+    file that iter_snapshot_chunks reads back without parsing. The snapshot
+    only appears once every chunk has been read.
+
+    Args:
+        file_path: Path to the report file
+        chunk_size: Number of rows per chunk
+        sep: Field separator
+        usecols: Optional subset of columns to parse
+        schema: Declared column types by normalized column name (None keeps text)
+        start_row: Number of leading data rows to skip, e.g. when resuming
+        snapshot_path: Optional path to write a typed snapshot of the rows read
+
+    Yields:
+        DataFrame chunks with stripped column names
+    """
+    with open_report(file_path) as source:
+        reader = pacsv.open_csv(
+            source,
+            read_options=pacsv.ReadOptions(use_threads=True, skip_rows_after_names=start_row),
+            parse_options=pacsv.ParseOptions(delimiter=sep),
+            convert_options=_text_convert_options(file_path, sep, usecols),
+        )
+        tables = (apply_schema(table, schema) for table in _regroup_batches(reader, reader.schema, chunk_size))
+        if snapshot_path:
+            tables = _write_snapshot(tables, snapshot_path)
+        yield from _to_chunks(tables, start_row)
+
+def snapshot_path_for(file_path: str) -> str:
+    """Path of the typed snapshot kept next to a report file"""
+    return file_path + SNAPSHOT_EXTENSION
+
+def count_snapshot_rows(snapshot_path: str) -> int:
+    """Count the data rows in a report snapshot, reading one record batch at a time"""
+    reader = pa.ipc.open_file(pa.memory_map(snapshot_path))
+    return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+
+def remove_snapshot(snapshot_path: str) -> bool:
+    """
+    Delete a report snapshot, along with a temporary file left by an interrupted write
+
+    Returns:
+        Whether the snapshot existed
+    """
+    if os.path.exists(snapshot_path + '.tmp'):
+        os.remove(snapshot_path + '.tmp')
+    try:
+        os.remove(snapshot_path)
+    except FileNotFoundError:
+        return False
+    logger.info(f"Removed report snapshot {snapshot_path}")
+    return True
+
+def iter_snapshot_chunks(
+    snapshot_path: str,
+    chunk_size: int,
+    usecols: Optional[List[str]] = None,
+    schema: Optional[Dict[str, pa.DataType]] = ALL_LISTINGS_SCHEMA,
+    start_row: int = 0,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a report snapshot written by iter_report_chunks as DataFrame chunks
+
+    The snapshot is memory-mapped instead of parsed, and its compressed
+    record batches are decoded one at a time, so only the rows around the
+    current chunk are held in memory. Batches before start_row are skipped
+    without converting them. Chunks have the same types, column names and
+    row offset index as iter_report_chunks.
+
+    Args:
+        snapshot_path: Path to the snapshot file
+        chunk_size: Number of rows per chunk
+        usecols: Optional subset of columns to read
+        schema: Declared column types by normalized column name
+        start_row: Number of leading data rows to skip, e.g. when resuming
+
+    Yields:
+        DataFrame chunks with stripped column names
+    """
+    reader = pa.ipc.open_file(pa.memory_map(snapshot_path))
+    stored_schema = reader.schema
+    if usecols is not None:
+        stored_schema = pa.schema([stored_schema.field(name) for name in usecols])
+
+    # Dictionary columns are stored as text, so categories are encoded per chunk again
+    batches = _snapshot_batches(reader, usecols, start_row)
+    tables = (apply_schema(table, schema) for table in _regroup_batches(batches, stored_schema, chunk_size))
+    yield from _to_chunks(tables, start_row)
+
+def _snapshot_batches(
+    reader: pa.ipc.RecordBatchFileReader,
+    usecols: Optional[List[str]],
+    start_row: int,
+) -> Iterator[pa.RecordBatch]:
+    """Read the record batches of a snapshot from start_row on, one at a time"""
+    skipped = 0
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        if skipped + batch.num_rows <= start_row:
+            skipped += batch.num_rows
+            continue
+        if skipped < start_row:
+            batch = batch.slice(start_row - skipped)
+            skipped = start_row
+        yield batch.select(usecols) if usecols is not None else batch
+
+def _regroup_batches(
+    batches: Iterator[pa.RecordBatch],
+    schema: pa.Schema,
+    chunk_size: int,
+) -> Iterator[pa.Table]:
+    """Regroup record batches, e.g. Arrow's CSV batches sized by bytes, into tables of chunk_size rows"""
+    pending: List[pa.RecordBatch] = []
+    pending_rows = 0
+    for batch in batches:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunk_size:
+            table = pa.Table.from_batches(pending, schema=schema)
+            yield table.slice(0, chunk_size)
+            rest = table.slice(chunk_size)
+            pending = rest.to_batches()
+            pending_rows = rest.num_rows
+
+    if pending_rows:
+        yield pa.Table.from_batches(pending, schema=schema)
+
+def _to_chunks(tables: Iterator[pa.Table], start_row: int) -> Iterator[pd.DataFrame]:
+    """Convert typed tables to DataFrame chunks indexed by their row offsets in the report"""
+    next_row = start_row
+    for table in tables:
+        chunk = to_frame(table)
+        chunk.columns = [col.strip() for col in chunk.columns]
+        chunk.index = pd.RangeIndex(next_row, next_row + len(chunk))
+        next_row += len(chunk)
+        yield chunk
+
+def _write_snapshot(tables: Iterator[pa.Table], snapshot_path: str) -> Iterator[pa.Table]:
+    """
+    Pass typed tables through while writing them to an Arrow IPC snapshot
+
+    The IPC file format cannot change a dictionary between batches, so
+    dictionary columns are stored as text. Record batches are compressed with
+    SNAPSHOT_COMPRESSION to keep the snapshot small next to compressed
+    uploads. Rows go to a temporary file that replaces snapshot_path only
+    after the last table, so a read that stops early never leaves a partial
+    snapshot behind.
+    """
+    temp_path = snapshot_path + '.tmp'
+    writer = None
+    try:
+        for table in tables:
+            stored = decode_categories(table)
+            if writer is None:
+                options = pa.ipc.IpcWriteOptions(compression=SNAPSHOT_COMPRESSION)
+                writer = pa.ipc.new_file(temp_path, stored.schema, options=options)
+            writer.write_table(stored)
+            yield table
+
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(temp_path, snapshot_path)
+            logger.info(f"Wrote report snapshot {snapshot_path}")
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def _text_convert_options(
+    file_path: str,
+    sep: str,
+    usecols: Optional[List[str]] = None,
+) -> pacsv.ConvertOptions:
+    """Arrow conversion options that read every column of a report as text, with blanks as nulls"""
+    with open_report(file_path) as f:
+        header = f.readline()
+    names = pacsv.read_csv(io.BytesIO(header), parse_options=pacsv.ParseOptions(delimiter=sep)).column_names
+
+    return pacsv.ConvertOptions(
+        column_types={name: pa.string() for name in names},
+        include_columns=usecols,
+        # Only blank cells are missing; text such as 'NA' or 'null' is kept as is
+        null_values=[''],
+        strings_can_be_null=True,
+    )
@@ -0,0 +1,122 @@
+import os
+import time
+import signal
+import logging
+import multiprocessing
+from multiprocessing.connection import wait
+
+# Configure logging
+logger = logging.getLogger('report_supervisor')
+
+def resident_memory_mb(pid=None):
+    """Resident memory of a process in MB, read from /proc (0 where it is unavailable)"""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return 0.0
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+class ProcessSupervisor:
+    """
+    Keep a fixed number of worker processes running
+
+    Each slot runs target(slot, restarts) in its own forked process. A
+    process that exits, whether it crashed or stepped down on its own (e.g.
+    to release memory), is replaced by a new one in the same slot; crashed
+    processes are replaced after restart_delay seconds so a failing start
+    does not spin.
+    SIGTERM or Ctrl-C stops the supervisor, which then terminates its processes.
+
+    Usage:
+        ProcessSupervisor(consume, processes=4).run()
+    """
+
+    def __init__(self, target, processes, restart_delay=1.0, name='consumer'):
+        """
+        Initialize the supervisor
+
+        Args:
+            target: Function run in each process, called with its slot number and
+                how many times the slot was restarted before
+            processes: Number of processes to keep running
+            restart_delay: Seconds to wait before replacing a crashed process
+            name: Prefix of the process names
+        """
+        self.target = target
+        self.processes = max(processes, 1)
+        self.restart_delay = max(restart_delay, 0)
+        self.name = name
+        self._restarts = [0] * self.processes
+        self._running = {}
+        self._stopping = False
+
+    def run(self):
+        """Start the processes and replace those that exit until stopped"""
+        previous_handler = signal.signal(signal.SIGTERM, self._stop)
+        try:
+            for slot in range(self.processes):
+                self._start(slot)
+
+            while not self._stopping:
+                wait([process.sentinel for process in self._running.values()], timeout=1)
+                for slot, process in list(self._running.items()):
+                    if self._stopping or process.is_alive():
+                        continue
+                    process.join()
+                    if process.exitcode == 0:
+                        logger.info(f"{process.name} exited, starting a new one")
+                    else:
+                        logger.error(f"{process.name} crashed with exit code {process.exitcode}, restarting")
+                        time.sleep(self.restart_delay)
+                        if self._stopping:
+                            break
+                    self._restarts[slot] += 1
+                    self._start(slot)
+        except KeyboardInterrupt:
+            logger.info("Supervisor interrupted")
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+            self._terminate_all()
+
+    def _start(self, slot):
+        """Start the process of a slot"""
+        process = multiprocessing.get_context('fork').Process(
+            target=self._run_target,
+            args=(slot, self._restarts[slot]),
+            name=f"{self.name}-{slot}",
+        )
+        # Hold SIGTERM until the child has replaced the supervisor's handler
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM})
+        try:
+            process.start()
+        finally:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM})
+        self._running[slot] = process
+        logger.info(f"Started {process.name} (pid {process.pid})")
+
+    def _run_target(self, slot, restarts):
+        """Entry point of a supervised process"""
+        # Forked processes inherit the supervisor's handler; SIGTERM interrupts
+        # them like Ctrl-C instead, so they can hand back unfinished work
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM})
+        self.target(slot, restarts)
+
+    def _stop(self, signum, frame):
+        """Stop replacing processes once a termination signal arrives"""
+        logger.info("Supervisor received SIGTERM, stopping processes")
+        self._stopping = True
+
+    def _terminate_all(self, timeout=30):
+        """Terminate the running processes, killing any that do not exit in time"""
+        for process in self._running.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self._running.values():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning(f"{process.name} did not stop, killing it")
+                process.kill()
+                process.join()
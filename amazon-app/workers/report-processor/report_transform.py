@@ -0,0 +1,109 @@
+import logging
+import numpy as np
+import pandas as pd
+from typing import List, Any, Tuple
+
+# Configure logging
+logger = logging.getLogger("report_transform")
+
+# Listing columns stored as BOOLEAN, reported as y/n flags
+BOOLEAN_COLUMNS = ('item-is-marketplace', 'will-ship-internationally', 'expedited-shipping', 'zshop-boldface')
+
+# Listing columns stored as DECIMAL
+DECIMAL_COLUMNS = ('price',)
+
+# Listing columns stored as INTEGER
+INTEGER_COLUMNS = ('quantity', 'pending-quantity')
+
+# Flag values that mean "true"
+TRUE_VALUES = ('y', 'yes', 'true')
+
+# Length of a timestamp such as '2023-01-01 12:00:00'
+TIMESTAMP_LENGTH = 19
+
+def normalize_listing_chunk(chunk: pd.DataFrame, report_type: str = 'default') -> Tuple[List[str], List[Tuple[Any, ...]]]:
+    """
+    Rename and cast a chunk of listing rows, one whole column at a time
+
+    Column names are mapped to the database form ('Seller SKU' -> 'seller-sku'),
+    blank cells become None, prices become floats (invalid prices become None),
+    quantities become integers (invalid quantities become 0) and y/n flags
+    become booleans.
+
+    Args:
+        chunk: DataFrame chunk as read from the report
+        report_type: 'default' or 'all_listings'
+
+    Returns:
+        Tuple of (columns, records) where each record is a tuple of native
+        Python values in column order
+    """
+    frame = chunk.copy()
+    frame.columns = [col.strip().replace(' ', '-').lower() for col in frame.columns]
+
+    # A later column wins if two report columns map to the same name
+    frame = frame.loc[:, ~frame.columns.duplicated(keep='last')]
+
+    for col in DECIMAL_COLUMNS:
+        if col in frame.columns:
+            frame[col] = pd.to_numeric(frame[col], errors='coerce')
+
+    for col in INTEGER_COLUMNS:
+        # Columns already typed by the report schema need no cast
+        if col in frame.columns and not pd.api.types.is_integer_dtype(frame[col]):
+            present = frame[col].notna() & (frame[col].astype(str).str.strip() != '')
+            numbers = pd.to_numeric(frame[col], errors='coerce').fillna(0)
+            frame[col] = numbers.where(present).apply(np.trunc).astype('Int64')
+
+    for col in BOOLEAN_COLUMNS:
+        if col in frame.columns:
+            values = frame[col]
+            if pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'mixed'):
+                continue
+            # Non-string cells (already booleans) yield NaN here and are kept as is
+            text = values.str.lower()
+            frame[col] = values.where(text.isna(), text.isin(TRUE_VALUES))
+
+    # Truncate to fit the timestamp format
+    if (report_type == 'all_listings' and 'open-date' in frame.columns
+            and pd.api.types.infer_dtype(frame['open-date'], skipna=True) == 'string'):
+        frame['open-date'] = frame['open-date'].str[:TIMESTAMP_LENGTH]
+
+    columns = list(frame.columns)
+    arrays = [to_python_column(frame[col]) for col in columns]
+    return columns, list(zip(*arrays))
+
+def to_python_column(series: pd.Series) -> List[Any]:
+    """
+    Convert a column to a list of native Python values with None for nulls and blanks
+
+    Args:
+        series: DataFrame column
+
+    Returns:
+        List of Python values ready for psycopg2
+    """
+    present = series.notna()
+    if series.dtype == object:
+        present &= series != ''
+    return series.astype(object).where(present, None).tolist()
+
+def row_fingerprints(columns: List[str], records: List[Tuple[Any, ...]]) -> List[int]:
+    """
+    Hash the report columns of each record into a signed 64-bit fingerprint
+
+    Values are hashed as text and columns in name order, so a row hashes the
+    same whatever the column order of the report.
+
+    Args:
+        columns: Column names, in record order
+        records: Records from normalize_listing_chunk
+
+    Returns:
+        List of fingerprints, one per record
+    """
+    if not records:
+        return []
+    frame = pd.DataFrame.from_records(records, columns=columns)
+    text = frame[sorted(columns)].astype(object).astype(str)
+    return pd.util.hash_pandas_object(text, index=False).to_numpy().view('int64').tolist()
@@ -9,9 +9,22 @@ import redis
 import sys
 import traceback
 
+from report_duplicates import DuplicateSkuDetector
+from report_progress import ProgressReporter
+from report_reader import read_report
+
 # Load environment variables
 load_dotenv()
 
+# Minimum seconds between progress writes for a report
+PROGRESS_INTERVAL_SECONDS = float(os.getenv('PROGRESS_INTERVAL_SECONDS', '2'))
+
+# List lanes of the task queue, highest priority first (see report_queue.TaskQueue)
+LIST_LANES = ['celery:interactive', 'celery']
+
+# Sorted set of large reports, scored by size, taken only while the list lanes are empty
+BULK_LANE = 'celery:bulk'
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -55,28 +68,31 @@ def process_report(file_path, file_id, user_id=None):
                 )
         
         # Read the file
-        df = pd.read_csv(file_path, sep='\t', encoding='utf-8')
+        df = read_report(file_path)
         df.columns = [col.strip() for col in df.columns]
         
-        # Check for duplicate SKUs in the input file
-        duplicate_skus = df[df.duplicated(subset=['seller-sku'], keep=False)]
-        has_duplicates = len(duplicate_skus) > 0
-        duplicate_count = len(duplicate_skus)
+        # Check for duplicate SKUs in the input file in one hash-based pass
+        detector = DuplicateSkuDetector()
+        detector.add(df['seller-sku'])
+        has_duplicates = bool(detector.groups)
+        duplicate_count = detector.duplicate_rows
         duplicate_info = {}
         
         # Store information about duplicates if found
         if has_duplicates:
             logger.info(f"Found {duplicate_count} duplicate SKUs in file {file_id}")
             
-            # Group duplicates by SKU
-            duplicate_groups = df[df.duplicated(subset=['seller-sku'], keep=False)].groupby('seller-sku')
-            
-            for sku, group in duplicate_groups:
+            # Rows of each duplicated SKU, read back by row offset
+            for sku, rows in detector.groups.items():
+                group = df.loc[rows]
                 duplicate_info[sku] = []
+                
+                # Plain Python values with None for blanks, so the info can be stored as JSON
+                group = group.astype(object).where(group.notna(), None)
                 for _, row in group.iterrows():
                     # Extract key fields for comparison
                     duplicate_info[sku].append({
-                        'row_index': row.name,
+                        'row_index': int(row.name),
                         'asin': row.get('asin1'),
                         'upc': row.get('product-id') if row.get('product-id-type') == '3' else None,
                         'ean': row.get('product-id') if row.get('product-id-type') == '4' else None,
@@ -147,7 +163,13 @@ def process_file_without_duplicates(df, file_id, user_id=None, report_type='defa
         processed_rows = 0
         identifier_changes = []
         
-        with get_db_connection() as conn:
+        # Progress is written from a background thread at most once per interval
+        progress = ProgressReporter(
+            lambda rows, checkpoint: update_progress(file_id, rows, total_rows),
+            interval=PROGRESS_INTERVAL_SECONDS
+        )
+        
+        with get_db_connection() as conn, progress:
             with conn.cursor() as cur:
                 for i in range(0, total_rows, chunk_size):
                     chunk = df.iloc[i:i+chunk_size]
@@ -266,10 +288,7 @@ def process_file_without_duplicates(df, file_id, user_id=None, report_type='defa
                             cur.execute(insert_query, values)
                         
                         processed_rows += 1
-                        
-                        # Update progress periodically
-                        if processed_rows % 25 == 0 or processed_rows == total_rows:
-                            update_progress(file_id, processed_rows, total_rows)
+                        progress.update(processed_rows)
                 
                 # Record any identifier changes
                 if identifier_changes:
@@ -419,7 +438,7 @@ def resolve_duplicates(issue_id, file_id):
                 file_path = result[0]
         
         # Read the file
-        df = pd.read_csv(file_path, sep='\t', encoding='utf-8')
+        df = read_report(file_path)
         df.columns = [col.strip() for col in df.columns]
         
         # Apply resolutions
@@ -514,28 +533,31 @@ def process_all_listings_report(file_path, file_id, user_id=None):
                 )
         
         # Read the file
-        df = pd.read_csv(file_path, sep='\t', encoding='utf-8')
+        df = read_report(file_path)
         df.columns = [col.strip() for col in df.columns]
         
-        # Check for duplicate SKUs in the input file
-        duplicate_skus = df[df.duplicated(subset=['seller-sku'], keep=False)]
-        has_duplicates = len(duplicate_skus) > 0
-        duplicate_count = len(duplicate_skus)
+        # Check for duplicate SKUs in the input file in one hash-based pass
+        detector = DuplicateSkuDetector()
+        detector.add(df['seller-sku'])
+        has_duplicates = bool(detector.groups)
+        duplicate_count = detector.duplicate_rows
         duplicate_info = {}
         
         # Store information about duplicates if found
         if has_duplicates:
             logger.info(f"Found {duplicate_count} duplicate SKUs in file {file_id}")
             
-            # Group duplicates by SKU
-            duplicate_groups = df[df.duplicated(subset=['seller-sku'], keep=False)].groupby('seller-sku')
-            
-            for sku, group in duplicate_groups:
+            # Rows of each duplicated SKU, read back by row offset
+            for sku, rows in detector.groups.items():
+                group = df.loc[rows]
                 duplicate_info[sku] = []
+                
+                # Plain Python values with None for blanks, so the info can be stored as JSON
+                group = group.astype(object).where(group.notna(), None)
                 for _, row in group.iterrows():
                     # Extract key fields for comparison
                     duplicate_info[sku].append({
-                        'row_index': row.name,
+                        'row_index': int(row.name),
                         'asin': row.get('asin1'),
                         'upc': row.get('product-id') if row.get('product-id-type') == '3' else None,
                         'ean': row.get('product-id') if row.get('product-id-type') == '4' else None,
@@ -593,6 +615,22 @@ def process_all_listings_report(file_path, file_id, user_id=None):
             'message': str(e)
         }
 
+def take_task(redis_client, timeout=1):
+    """
+    Take the next task, draining the interactive and regular lanes before the bulk lane
+    
+    Returns:
+        The raw task message, or None if no task arrived in time
+    """
+    # BRPOP checks its keys in order, so interactive tasks come first
+    task_data = redis_client.brpop(LIST_LANES, timeout=timeout)
+    if task_data:
+        return task_data[1]
+    
+    # The smallest bulk report runs first
+    bulk_task = redis_client.zpopmin(BULK_LANE)
+    return bulk_task[0][0] if bulk_task else None
+
 def process_redis_queue():
     """Main function to continuously process tasks from Redis queue"""
     logger.info("Starting Redis queue processor")
@@ -604,14 +642,13 @@ def process_redis_queue():
             try:
                 # Try to get a task from the Redis queue
                 logger.info("Polling Redis queue 'celery'...")
-                task_data = redis_client.brpop('celery', timeout=5)
+                task_json = take_task(redis_client)
                 
-                if not task_data:
+                if not task_json:
                     logger.info("No tasks in Redis queue, waiting...")
                     time.sleep(0.1)  # Sleep briefly to avoid high CPU usage in idle periods
                     continue
                     
-                _, task_json = task_data
                 logger.info(f"Received raw task: {task_json[:100]}...")
                 task = json.loads(task_json)
                 
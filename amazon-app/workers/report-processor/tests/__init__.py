@@ -0,0 +1 @@
+# Tests for the report processor worker
@@ -0,0 +1,68 @@
+import os
+import pytest
+import pyarrow as pa
+
+from report_reader import (
+    count_snapshot_rows,
+    iter_report_chunks,
+    iter_snapshot_chunks,
+    remove_snapshot,
+    snapshot_path_for,
+)
+
+HEADER = "item-name\tseller-sku\tprice\tquantity\n"
+
+@pytest.fixture
+def report_file(tmp_path):
+    """Write an All Listing Report to disk"""
+    path = tmp_path / "all-listings.txt"
+    rows = [f"Item {i}\tSKU-{i}\t{i}.99\t{i}\n" for i in range(2000)]
+    path.write_text(HEADER + "".join(rows), encoding="utf-8")
+    return str(path)
+
+@pytest.fixture
+def snapshot(report_file):
+    """Parse the report once, writing its typed snapshot"""
+    snapshot_path = snapshot_path_for(report_file)
+    for _ in iter_report_chunks(report_file, chunk_size=500, snapshot_path=snapshot_path):
+        pass
+    return snapshot_path
+
+def test_snapshot_is_compressed(snapshot, tmp_path):
+    """Test that the snapshot is smaller than the same rows written uncompressed"""
+    table = pa.ipc.open_file(pa.memory_map(snapshot)).read_all()
+    uncompressed_path = str(tmp_path / "uncompressed.arrow")
+    with pa.ipc.new_file(uncompressed_path, table.schema) as writer:
+        writer.write_table(table)
+
+    assert os.path.getsize(snapshot) < os.path.getsize(uncompressed_path)
+    assert not os.path.exists(snapshot + ".tmp")
+
+def test_iter_snapshot_chunks_matches_report(report_file, snapshot):
+    """Test that the snapshot reads back the rows of the report, also from a resume row"""
+    assert count_snapshot_rows(snapshot) == 2000
+
+    chunks = list(iter_snapshot_chunks(snapshot, chunk_size=300, start_row=650))
+    assert [len(chunk) for chunk in chunks] == [300] * 4 + [150]
+    assert chunks[0].index[0] == 650
+    assert chunks[0]["seller-sku"].iloc[0] == "SKU-650"
+    assert chunks[-1]["seller-sku"].iloc[-1] == "SKU-1999"
+
+    expected = next(iter_report_chunks(report_file, chunk_size=300, start_row=650))
+    assert chunks[0].equals(expected)
+
+def test_iter_snapshot_chunks_usecols(snapshot):
+    """Test reading a subset of the snapshot's columns"""
+    chunk = next(iter_snapshot_chunks(snapshot, chunk_size=100, usecols=["seller-sku"], start_row=1990))
+    assert list(chunk.columns) == ["seller-sku"]
+    assert len(chunk) == 10
+
+def test_remove_snapshot(snapshot):
+    """Test that removing a snapshot also removes a temporary file left behind"""
+    with open(snapshot + ".tmp", "wb") as f:
+        f.write(b"partial")
+
+    assert remove_snapshot(snapshot) is True
+    assert not os.path.exists(snapshot)
+    assert not os.path.exists(snapshot + ".tmp")
+    assert remove_snapshot(snapshot) is False
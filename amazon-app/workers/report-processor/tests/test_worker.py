@@ -0,0 +1,101 @@
+import os
+import pytest
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+
+import worker
+
+class FakeCursor:
+    """Cursor that records statements and returns the snapshot path when it is cleared"""
+
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        self.statements.append(query)
+
+    def fetchone(self):
+        return (self.snapshot_path,)
+
+@pytest.fixture
+def snapshot(tmp_path, monkeypatch):
+    """A recorded snapshot file, with the database replaced by a fake connection"""
+    snapshot_path = tmp_path / "report.txt.arrow"
+    snapshot_path.write_bytes(b"snapshot")
+    cursor = FakeCursor(str(snapshot_path))
+
+    @contextmanager
+    def fake_connection(autocommit=True):
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+        yield conn
+
+    monkeypatch.setattr(worker, "get_db_connection", fake_connection)
+    return snapshot_path
+
+@pytest.mark.parametrize("status", ["processed", "superseded"])
+def test_finished_file_drops_snapshot(snapshot, status):
+    """Test that a file's snapshot is deleted once it is processed or superseded"""
+    worker.update_file_status("file-1", status)
+    assert not os.path.exists(snapshot)
+
+@pytest.mark.parametrize("status", ["processing", "duplicate_detected", "error"])
+def test_unfinished_file_keeps_snapshot(snapshot, status):
+    """Test that a file that may still be read keeps its snapshot"""
+    worker.update_file_status("file-1", status)
+    assert os.path.exists(snapshot)
+
+def test_dead_lettered_task_drops_snapshot(snapshot):
+    """Test that a task out of retries deletes its file's snapshot"""
+    queue = MagicMock()
+    queue.fail.return_value = None
+
+    assert worker.fail_task(queue, "message", {"id": "task-1"}, "failed", "file-1") is None
+    assert not os.path.exists(snapshot)
+
+def test_retried_task_keeps_snapshot(snapshot):
+    """Test that a task waiting for a retry keeps its file's snapshot to resume from"""
+    queue = MagicMock()
+    queue.fail.return_value = 30.0
+
+    assert worker.fail_task(queue, "message", {"id": "task-1"}, "failed", "file-1") == 30.0
+    assert os.path.exists(snapshot)
+
+@pytest.mark.parametrize("snapshot_first", [False, True])
+def test_resume_across_duplicate_pair(tmp_path, snapshot_first):
+    """Test that a resumed run drops a SKU that the rows before its checkpoint already kept"""
+    report_file = tmp_path / "all-listings.txt"
+    skus = ["SKU-0", "SKU-1", "SKU-2", "SKU-3", "SKU-1", "SKU-4"]
+    rows = [f"Item {i}\t{sku}\t{i}.99\t{i}\n" for i, sku in enumerate(skus)]
+    report_file.write_text("item-name\tseller-sku\tprice\tquantity\n" + "".join(rows), encoding="utf-8")
+
+    snapshot_path = worker.snapshot_path_for(str(report_file))
+    if snapshot_first:
+        for _ in worker.report_chunks(str(report_file), 2, snapshot_path):
+            pass
+
+    seen_skus = worker.skus_before(str(report_file), 2, snapshot_path, start_row=3)
+    assert seen_skus == {"SKU-0", "SKU-1", "SKU-2"}
+
+    kept = [
+        worker.keep_first_occurrences(chunk, seen_skus)
+        for chunk in worker.report_chunks(str(report_file), 2, snapshot_path, start_row=3)
+    ]
+    assert [sku for chunk in kept for sku in chunk["seller-sku"]] == ["SKU-3", "SKU-4"]
+
+def test_skus_before_applies_resolutions(tmp_path):
+    """Test that rows removed by a duplicate resolution do not count as kept"""
+    report_file = tmp_path / "all-listings.txt"
+    rows = [f"Item {i}\tSKU-{i}\t{i}.99\t{i}\n" for i in range(4)]
+    report_file.write_text("item-name\tseller-sku\tprice\tquantity\n" + "".join(rows), encoding="utf-8")
+
+    resolve = lambda chunk: chunk.drop(index=[1], errors="ignore")
+    assert worker.skus_before(str(report_file), 10, None, start_row=3, resolve=resolve) == {"SKU-0", "SKU-2"}
+    assert worker.skus_before(str(report_file), 10, None, start_row=0) == set()
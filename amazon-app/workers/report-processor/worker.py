@@ -1,21 +1,61 @@
 import os
+import io
+import csv
 import time
 import json
+import uuid
 import pandas as pd
 import logging
 import psycopg2
+import psycopg2.pool
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import redis
 import sys
 import traceback
 
+from report_reader import (
+    check_report_size, count_report_rows, count_snapshot_rows, estimate_chunk_rows,
+    iter_report_chunks, iter_snapshot_chunks, remove_snapshot, snapshot_path_for
+)
+from report_duplicates import DuplicateSkuDetector
+from report_progress import ProgressReporter
+from report_queue import TaskQueue
+from report_supervisor import ProcessSupervisor, resident_memory_mb
+from report_transform import normalize_listing_chunk, row_fingerprints
+
 # Load environment variables
 load_dotenv()
 
+# Report processing configuration
+MAX_REPORT_SIZE_MB = int(os.getenv('MAX_REPORT_SIZE_MB', '4096'))
+REPORT_CHUNK_SIZE = int(os.getenv('REPORT_CHUNK_SIZE', '1000'))
+REPORT_MEMORY_BUDGET_MB = int(os.getenv('REPORT_MEMORY_BUDGET_MB', '64'))
+PROGRESS_INTERVAL_SECONDS = float(os.getenv('PROGRESS_INTERVAL_SECONDS', '2'))
+INGEST_STALE_AFTER_SECONDS = int(os.getenv('INGEST_STALE_AFTER_SECONDS', '300'))
+DB_POOL_MIN_CONNECTIONS = int(os.getenv('DB_POOL_MIN_CONNECTIONS', '2'))
+DB_POOL_MAX_CONNECTIONS = int(os.getenv('DB_POOL_MAX_CONNECTIONS', '4'))
+WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', '1'))
+WORKER_MAX_MEMORY_MB = int(os.getenv('WORKER_MAX_MEMORY_MB', '0'))
+WORKER_RESTART_DELAY_SECONDS = float(os.getenv('WORKER_RESTART_DELAY_SECONDS', '5'))
+TASK_VISIBILITY_TIMEOUT_SECONDS = int(os.getenv('TASK_VISIBILITY_TIMEOUT_SECONDS', '60'))
+QUEUE_REAP_INTERVAL_SECONDS = float(os.getenv('QUEUE_REAP_INTERVAL_SECONDS', '30'))
+TASK_MAX_RETRIES = int(os.getenv('TASK_MAX_RETRIES', '3'))
+TASK_RETRY_BASE_SECONDS = float(os.getenv('TASK_RETRY_BASE_SECONDS', '30'))
+TASK_RETRY_MAX_SECONDS = float(os.getenv('TASK_RETRY_MAX_SECONDS', '1800'))
+ENQUEUE_KEY_TTL_SECONDS = int(os.getenv('ENQUEUE_KEY_TTL_SECONDS', str(7 * 24 * 3600)))
+
+# Statuses of files with nothing left to ingest; a redelivered task for them is dropped
+FINISHED_STATUSES = ('processed', 'superseded')
+
+# Name recorded in upload checkpoints, so the worker only resumes its own files
+PROCESSOR_NAME = 'report-worker'
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger('report_processor')
 
@@ -26,65 +66,283 @@ logger.info("Worker starting up with custom Redis processor...")
 def get_redis_client():
     return redis.Redis.from_url(os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0'))
 
-# Database connection
-def get_db_connection():
-    conn = psycopg2.connect(
-        host=os.getenv('POSTGRES_HOST', 'db'),
-        database=os.getenv('POSTGRES_DB', 'amazon_inventory'),
-        user=os.getenv('POSTGRES_USER', 'postgres'),
-        password=os.getenv('POSTGRES_PASSWORD', 'postgres')
-    )
-    conn.autocommit = True
-    return conn
+# Database connection pool, created on first use by the process that uses it
+_db_pool = None
+_db_pool_pid = None
+_db_pool_lock = threading.Lock()
+
+def get_db_pool():
+    """Get this process's connection pool, creating it on first use"""
+    global _db_pool, _db_pool_pid
+    with _db_pool_lock:
+        # A pool inherited from a parent process shares its sockets, so start a new one
+        if _db_pool is None or _db_pool_pid != os.getpid():
+            _db_pool = psycopg2.pool.ThreadedConnectionPool(
+                DB_POOL_MIN_CONNECTIONS,
+                DB_POOL_MAX_CONNECTIONS,
+                host=os.getenv('POSTGRES_HOST', 'db'),
+                database=os.getenv('POSTGRES_DB', 'amazon_inventory'),
+                user=os.getenv('POSTGRES_USER', 'postgres'),
+                password=os.getenv('POSTGRES_PASSWORD', 'postgres')
+            )
+            _db_pool_pid = os.getpid()
+            logger.info(f"Opened database pool of up to {DB_POOL_MAX_CONNECTIONS} connections")
+        return _db_pool
 
-def process_report(file_path, file_id, user_id=None):
+def borrow_healthy_connection(pool):
+    """Borrow a pooled connection, replacing connections the server has dropped"""
+    for _ in range(DB_POOL_MAX_CONNECTIONS):
+        conn = pool.getconn()
+        try:
+            # Ping outside a transaction, so the borrower can still choose autocommit
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            logger.warning(f"Discarding broken database connection: {e}")
+            pool.putconn(conn, close=True)
+    return pool.getconn()
+
+@contextmanager
+def get_db_connection(autocommit=True):
     """
-    Process Amazon inventory report file and store results in database
+    Borrow a connection from the worker's pool for the duration of a with block
+    
+    Like a psycopg2 connection used in a with block, the open transaction is
+    committed when the block succeeds and rolled back when it raises. The
+    connection is then returned to the pool, or closed if it broke.
     """
+    pool = get_db_pool()
+    conn = borrow_healthy_connection(pool)
     try:
-        logger.info(f"Processing report: {file_path} (ID: {file_id})")
+        conn.autocommit = autocommit
+        with conn:
+            yield conn
+    finally:
+        pool.putconn(conn, close=bool(conn.closed))
+
+def write_rows_isolated(cur, rows, write):
+    """
+    Write rows inside the current transaction, isolating the rows that fail
+    
+    The rows are written under a savepoint. If that fails, the savepoint is
+    rolled back and the rows are split in half and retried, until each
+    failing row is on its own. A bad row therefore costs a few savepoints
+    while the rest of the chunk still commits as one transaction.
+    
+    Args:
+        cur: Cursor of a connection with autocommit off
+        rows: Rows to write
+        write: Function called with (cur, batch) that writes a batch and returns a result
+    
+    Returns:
+        Tuple of (results of the batches that were written, list of (row, error) for failed rows)
+    """
+    if not rows:
+        return [], []
+    
+    cur.execute("SAVEPOINT write_rows")
+    try:
+        result = write(cur, rows)
+    except Exception as e:
+        cur.execute("ROLLBACK TO SAVEPOINT write_rows")
+        cur.execute("RELEASE SAVEPOINT write_rows")
+        if len(rows) == 1:
+            return [], [(rows[0], e)]
         
-        # Update file status to "processing"
+        middle = len(rows) // 2
+        first_results, first_failures = write_rows_isolated(cur, rows[:middle], write)
+        second_results, second_failures = write_rows_isolated(cur, rows[middle:], write)
+        return first_results + second_results, first_failures + second_failures
+    
+    cur.execute("RELEASE SAVEPOINT write_rows")
+    return [result], []
+
+def find_duplicate_skus(file_path, chunk_size, snapshot_path):
+    """
+    Find SKUs that appear more than once in a report without loading it whole
+    
+    The first pass is the only parse of the report text: it finds the
+    duplicated SKUs and their row offsets in one hash-based pass and writes
+    the typed snapshot of the report to snapshot_path. Only when duplicates
+    exist, a second pass reads back the rows at those offsets from the snapshot.
+    
+    Returns:
+        Tuple of (number of rows with a duplicated SKU, duplicate info by SKU)
+    """
+    detector = DuplicateSkuDetector()
+    for chunk in iter_report_chunks(file_path, chunk_size, snapshot_path=snapshot_path):
+        detector.add(chunk['seller-sku'])
+    
+    duplicate_info = {}
+    duplicate_count = 0
+    if not detector.groups:
+        return duplicate_count, duplicate_info
+    
+    # The detector's SKU hashes are no longer needed for the second pass
+    duplicate_offsets = detector.row_offsets()
+    detector = None
+    
+    for chunk in report_chunks(file_path, chunk_size, snapshot_path):
+        duplicate_rows = chunk[chunk.index.isin(duplicate_offsets)]
+        if duplicate_rows.empty:
+            continue
+        
+        # Plain Python values with None for blanks, so the info can be stored as JSON
+        duplicate_rows = duplicate_rows.astype(object).where(duplicate_rows.notna(), None)
+        for _, row in duplicate_rows.iterrows():
+            # Extract key fields for comparison
+            duplicate_info.setdefault(str(row['seller-sku']), []).append({
+                'row_index': int(row.name),
+                'asin': row.get('asin1'),
+                'upc': row.get('product-id') if row.get('product-id-type') == '3' else None,
+                'ean': row.get('product-id') if row.get('product-id-type') == '4' else None,
+                'fnsku': row.get('fnsku'),
+                'price': row.get('price'),
+                'quantity': row.get('quantity'),
+                'condition': row.get('item-condition'),
+                'title': row.get('item-name')
+            })
+    
+    # Drop any group a SKU hash collision left with a single row
+    duplicate_info = {sku: rows for sku, rows in duplicate_info.items() if len(rows) > 1}
+    duplicate_count = sum(len(rows) for rows in duplicate_info.values())
+    return duplicate_count, duplicate_info
+
+def report_chunks(file_path, chunk_size, snapshot_path=None, start_row=0, usecols=None):
+    """Stream a report from its typed snapshot when there is one, otherwise parse its text"""
+    if snapshot_path and os.path.exists(snapshot_path):
+        return iter_snapshot_chunks(snapshot_path, chunk_size, usecols=usecols, start_row=start_row)
+    return iter_report_chunks(file_path, chunk_size, usecols=usecols, start_row=start_row)
+
+def skus_before(file_path, chunk_size, snapshot_path, start_row, resolve=None):
+    """
+    Collect the SKUs of the rows before a resume row, reading only the SKU column
+    
+    A resumed run keeps only the first occurrence of each SKU like a run from
+    row 0, so it must know the SKUs the rows before its checkpoint already kept.
+    
+    Args:
+        resolve: Optional function applied to each chunk first, e.g. duplicate resolutions
+    """
+    skus = set()
+    if start_row <= 0:
+        return skus
+    
+    for chunk in report_chunks(file_path, chunk_size, snapshot_path, usecols=['seller-sku']):
+        end_row = int(chunk.index[-1]) + 1 if len(chunk) else 0
+        if resolve:
+            chunk = resolve(chunk)
+        skus.update(chunk.loc[chunk.index < start_row, 'seller-sku'].dropna())
+        if end_row >= start_row:
+            break
+    return skus
+
+def keep_first_occurrences(chunk, seen_skus):
+    """Drop rows whose SKU was seen before, in earlier chunks or earlier in this one, and record the rest"""
+    chunk = chunk[~chunk['seller-sku'].isin(seen_skus)]
+    chunk = chunk.drop_duplicates(subset=['seller-sku'], keep='first')
+    seen_skus.update(chunk['seller-sku'].dropna())
+    return chunk
+
+def report_row_count(file_path, snapshot_path=None):
+    """Count the data rows of a report, from its typed snapshot when there is one"""
+    if snapshot_path and os.path.exists(snapshot_path):
+        return count_snapshot_rows(snapshot_path)
+    return count_report_rows(file_path)
+
+def record_snapshot(file_id, snapshot_path):
+    """
+    Record the typed snapshot written for a file, so later runs read it instead of the report
+    
+    Returns:
+        The snapshot path, or None when no snapshot was written (e.g. an empty report)
+    """
+    if not os.path.exists(snapshot_path):
+        return None
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE uploaded_files SET snapshot_path = %s, updated_at = NOW() WHERE id = %s",
+                (snapshot_path, file_id)
+            )
+    return snapshot_path
+
+def discard_snapshot(file_id):
+    """
+    Delete the typed snapshot of a file that reached a final state, and forget its path
+    
+    Files awaiting a duplicate resolution keep their snapshot for resolve_duplicates.
+    """
+    try:
         with get_db_connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(
-                    "UPDATE uploaded_files SET status = 'processing', updated_at = NOW() WHERE id = %s",
+                    """
+                    UPDATE uploaded_files f
+                    SET snapshot_path = NULL
+                    FROM (SELECT id, snapshot_path FROM uploaded_files WHERE id = %s FOR UPDATE) previous
+                    WHERE f.id = previous.id
+                      AND previous.snapshot_path IS NOT NULL
+                      AND f.status <> 'duplicate_detected'
+                    RETURNING previous.snapshot_path
+                    """,
                     (file_id,)
                 )
+                result = cur.fetchone()
+        if result:
+            remove_snapshot(result[0])
+    except Exception as e:
+        logger.error(f"Error removing snapshot of file {file_id}: {e}")
+
+def load_snapshot_path(file_id):
+    """Get the recorded typed snapshot of a file, or None if it has none"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT snapshot_path FROM uploaded_files WHERE id = %s", (file_id,))
+            result = cur.fetchone()
+    return result[0] if result else None
+
+def process_report(file_path, file_id, user_id=None, resume=False):
+    """
+    Process Amazon inventory report file and store results in database
+    
+    With resume, an interrupted run continues from its last checkpoint.
+    """
+    try:
+        logger.info(f"Processing report: {file_path} (ID: {file_id})")
         
-        # Read the file
-        df = pd.read_csv(file_path, sep='\t', encoding='utf-8')
-        df.columns = [col.strip() for col in df.columns]
+        # Update file status to "processing"
+        if not resume:
+            mark_processing(file_id, 'process_report', user_id=user_id)
         
-        # Check for duplicate SKUs in the input file
-        duplicate_skus = df[df.duplicated(subset=['seller-sku'], keep=False)]
-        has_duplicates = len(duplicate_skus) > 0
-        duplicate_count = len(duplicate_skus)
-        duplicate_info = {}
+        # Reject reports above the configured size before reading them
+        check_report_size(file_path, MAX_REPORT_SIZE_MB)
+        chunk_size = estimate_chunk_rows(file_path, REPORT_MEMORY_BUDGET_MB, REPORT_CHUNK_SIZE)
+        
+        # An interrupted run already passed the duplicate check and wrote the snapshot
+        if resume:
+            snapshot_path = load_snapshot_path(file_id)
+            total_rows = report_row_count(file_path, snapshot_path)
+            start_row, processed_before = load_checkpoint(file_id)
+            chunks = report_chunks(file_path, chunk_size, snapshot_path, start_row=start_row)
+            return process_file_without_duplicates(
+                chunks, file_id, user_id, total_rows=total_rows,
+                start_row=start_row, processed_before=processed_before,
+                seen_skus=skus_before(file_path, chunk_size, snapshot_path, start_row)
+            )
+        
+        # Check for duplicate SKUs in the input file, parsing it into its snapshot
+        snapshot_path = snapshot_path_for(file_path)
+        duplicate_count, duplicate_info = find_duplicate_skus(file_path, chunk_size, snapshot_path)
+        snapshot_path = record_snapshot(file_id, snapshot_path)
+        has_duplicates = duplicate_count > 0
         
         # Store information about duplicates if found
         if has_duplicates:
             logger.info(f"Found {duplicate_count} duplicate SKUs in file {file_id}")
             
-            # Group duplicates by SKU
-            duplicate_groups = df[df.duplicated(subset=['seller-sku'], keep=False)].groupby('seller-sku')
-            
-            for sku, group in duplicate_groups:
-                duplicate_info[sku] = []
-                for _, row in group.iterrows():
-                    # Extract key fields for comparison
-                    duplicate_info[sku].append({
-                        'row_index': row.name,
-                        'asin': row.get('asin1'),
-                        'upc': row.get('product-id') if row.get('product-id-type') == '3' else None,
-                        'ean': row.get('product-id') if row.get('product-id-type') == '4' else None,
-                        'fnsku': row.get('fnsku'),
-                        'price': row.get('price'),
-                        'quantity': row.get('quantity'),
-                        'condition': row.get('item-condition'),
-                        'title': row.get('item-name')
-                    })
-            
             # Store duplicate info in a separate table for user resolution
             with get_db_connection() as conn:
                 with conn.cursor() as cur:
@@ -113,7 +371,9 @@ def process_report(file_path, file_id, user_id=None):
             }
         
         # Continue with normal processing if no duplicates
-        return process_file_without_duplicates(df, file_id, user_id)
+        total_rows = report_row_count(file_path, snapshot_path)
+        chunks = report_chunks(file_path, chunk_size, snapshot_path)
+        return process_file_without_duplicates(chunks, file_id, user_id, total_rows=total_rows)
         
     except Exception as e:
         logger.error(f"Error processing report {file_id}: {str(e)}")
@@ -133,172 +393,129 @@ def process_report(file_path, file_id, user_id=None):
             'message': str(e)
         }
 
-def process_file_without_duplicates(df, file_id, user_id=None, report_type='default'):
-    """Process a file that has no duplicates or has been resolved"""
+def process_file_without_duplicates(chunks, file_id, user_id=None, report_type='default', total_rows=None,
+                                    start_row=0, processed_before=0, seen_skus=None):
+    """
+    Process a file that has no duplicates or has been resolved
+    
+    After each chunk, the report row reached is saved as the file's
+    checkpoint, so an interrupted run can resume there.
+    
+    Args:
+        chunks: Iterable of DataFrame chunks (or a single DataFrame) with the report data
+        file_id: ID of the file being processed
+        user_id: Optional ID of the uploading user
+        report_type: 'default' or 'all_listings'
+        total_rows: Number of rows in the report, used for progress reporting
+        start_row: Report row of the first chunk, when resuming from a checkpoint
+        processed_before: Rows processed before start_row
+        seen_skus: SKUs of the rows before start_row (see skus_before)
+    """
     try:
-        # Ensure no duplicate SKUs in the input file by keeping only the first occurrence
-        df = df.drop_duplicates(subset=['seller-sku'], keep='first')
+        if isinstance(chunks, pd.DataFrame):
+            total_rows = len(chunks) if total_rows is None else total_rows
+            chunks = [chunks]
         
-        # Process records in chunks
-        chunk_size = 1000
-        total_rows = len(df)
-        processed_rows = 0
-        identifier_changes = []
+        total_rows = total_rows or 0
+        processed_rows = processed_before
+        identifier_change_count = 0
+        failed_rows = 0
+        next_row = start_row
         
-        with get_db_connection() as conn:
+        # Listings written or left untouched because their fingerprint matched
+        row_counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        
+        # SKUs already written, so only the first occurrence in the file is kept
+        seen_skus = set(seen_skus or ())
+        
+        # Progress is written from a background thread at most once per interval
+        progress = ProgressReporter(
+            lambda rows, checkpoint: update_progress(file_id, rows, total_rows, checkpoint),
+            interval=PROGRESS_INTERVAL_SECONDS,
+            processed_rows=processed_before
+        )
+        
+        # Each chunk is committed as one transaction
+        with get_db_connection(autocommit=False) as conn, progress:
             with conn.cursor() as cur:
-                for i in range(0, total_rows, chunk_size):
-                    chunk = df.iloc[i:i+chunk_size]
+                # Rows from here on are written again, so drop their earlier errors
+                cur.execute(
+                    "DELETE FROM report_row_errors WHERE file_id = %s AND row_number > %s",
+                    (file_id, start_row)
+                )
+                
+                for chunk in chunks:
+                    # Index labels are report rows, so this is where the next chunk starts
+                    if len(chunk):
+                        next_row = max(next_row, int(chunk.index[-1]) + 1)
+                    
+                    # Ensure no duplicate SKUs in the input file by keeping only the first occurrence
+                    chunk = keep_first_occurrences(chunk, seen_skus)
                     
-                    # Process each listing in the chunk
-                    for _, row in chunk.iterrows():
-                        # Extract data from the row
-                        listing_data = {}
-                        for col in df.columns:
-                            # Convert column names with spaces to use hyphens (matching DB schema)
-                            db_col = col.strip().replace(' ', '-').lower()
-                            value = row[col]
-                            
-                            # Skip null values
-                            if pd.isna(value) or value == '':
-                                continue
-                                
-                            # Handle data type conversions
-                            if db_col in ['price']:
-                                try:
-                                    value = float(value)
-                                except (ValueError, TypeError):
-                                    value = None
-                            elif db_col in ['quantity', 'pending-quantity']:
-                                try:
-                                    value = int(value)
-                                except (ValueError, TypeError):
-                                    value = 0
-                            elif db_col in ['item-is-marketplace', 'will-ship-internationally', 
-                                           'expedited-shipping', 'zshop-boldface']:
-                                if isinstance(value, str):
-                                    value = value.lower() in ['y', 'yes', 'true']
-                                
-                            # Add to listing data
-                            if value is not None:
-                                listing_data[db_col] = value
+                    # Rename and cast whole columns, then walk plain tuples
+                    report_columns, records = normalize_listing_chunk(chunk, report_type)
+                    fingerprints = row_fingerprints(report_columns, records)
+                    
+                    # Index labels are report row offsets, kept to report failing rows
+                    rows = []
+                    for offset, values, fingerprint in zip(chunk.index, records, fingerprints):
+                        # Skip null values
+                        listing_data = {
+                            col: value for col, value in zip(report_columns, values) if value is not None
+                        }
                         
                         # Skip rows without SKU
                         if 'seller-sku' not in listing_data:
                             logger.warning(f"Skipping row without seller-sku: {listing_data}")
                             continue
                         
-                        # Special handling for All Listings Reports
-                        if report_type == 'all_listings':
-                            # Handle any specific transformations needed for all listings report
-                            # For example, map different column names that might be in this report format
-                            if 'open-date' in listing_data:
-                                listing_data['open-date'] = listing_data['open-date'][:19]  # Truncate to fit timestamp format
-                            
-                            # Additional mappings specific to All Listings Report can be added here
-                        
-                        # Check if this SKU already exists in the database
-                        sku = listing_data['seller-sku']
-                        cur.execute(
-                            "SELECT id, asin, upc, ean FROM listings WHERE seller_sku = %s",
-                            (sku,)
-                        )
-                        existing = cur.fetchone()
-                        
-                        # Track identifier changes if this is an update
-                        if existing:
-                            listing_id, old_asin, old_upc, old_ean = existing
-                            new_asin = listing_data.get('asin')
-                            new_upc = listing_data.get('upc')
-                            new_ean = listing_data.get('ean')
-                            
-                            # Check if any identifiers have changed
-                            if ((old_asin is not None and new_asin is not None and old_asin != new_asin) or
-                                (old_upc is not None and new_upc is not None and old_upc != new_upc) or
-                                (old_ean is not None and new_ean is not None and old_ean != new_ean)):
-                                
-                                identifier_changes.append({
-                                    'listing_id': listing_id,
-                                    'sku': sku,
-                                    'old_asin': old_asin,
-                                    'new_asin': new_asin,
-                                    'old_upc': old_upc,
-                                    'new_upc': new_upc,
-                                    'old_ean': old_ean,
-                                    'new_ean': new_ean,
-                                    'changed_at': time.strftime('%Y-%m-%d %H:%M:%S')
-                                })
-                            
-                            # Update existing listing
-                            columns = []
-                            values = []
-                            for key, value in listing_data.items():
-                                if key != 'seller-sku':  # Skip SKU as it's the primary key
-                                    columns.append(key.replace('-', '_'))
-                                    values.append(value)
-                            
-                            if values:  # Only update if there are values to update
-                                # Create the SET part of the SQL query
-                                set_clause = ", ".join([f"{col} = %s" for col in columns])
-                                values.append(sku)  # Add SKU for WHERE clause
-                                
-                                update_query = f"UPDATE listings SET {set_clause}, updated_at = NOW() WHERE seller_sku = %s"
-                                cur.execute(update_query, values)
-                        else:
-                            # Insert new listing
-                            columns = []
-                            values = []
-                            for key, value in listing_data.items():
-                                columns.append(key.replace('-', '_'))
-                                values.append(value)
-                            
-                            # Add timestamps
-                            columns.extend(['created_at', 'updated_at'])
-                            values.extend([time.strftime('%Y-%m-%d %H:%M:%S'), time.strftime('%Y-%m-%d %H:%M:%S')])
-                            
-                            # Create the INSERT SQL query
-                            placeholders = ", ".join(["%s"] * len(values))
-                            cols = ", ".join(columns)
-                            
-                            insert_query = f"INSERT INTO listings ({cols}) VALUES ({placeholders})"
-                            cur.execute(insert_query, values)
-                        
-                        processed_rows += 1
-                        
-                        # Update progress periodically
-                        if processed_rows % 100 == 0 or processed_rows == total_rows:
-                            update_progress(file_id, processed_rows, total_rows)
-                
-                # Record any identifier changes
-                if identifier_changes:
-                    for change in identifier_changes:
-                        cur.execute(
-                            """
-                            INSERT INTO identifier_changes 
-                            (listing_id, sku, old_asin, new_asin, old_upc, new_upc, old_ean, new_ean, file_id, changed_at)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            """,
-                            (
-                                change['listing_id'], change['sku'], 
-                                change['old_asin'], change['new_asin'],
-                                change['old_upc'], change['new_upc'],
-                                change['old_ean'], change['new_ean'],
-                                file_id,
-                                change['changed_at']
-                            )
-                        )
+                        listing_data['row_hash'] = fingerprint
+                        rows.append((int(offset) + 1, listing_data))
+                    
+                    # Write the chunk in one transaction, isolating failing rows with savepoints
+                    results, failures = write_rows_isolated(
+                        cur, rows, lambda cur, batch: write_listings(cur, batch, file_id)
+                    )
+                    for batch_counts, batch_changes in results:
+                        for key, count in batch_counts.items():
+                            row_counts[key] += count
+                        identifier_change_count += batch_changes
+                    
+                    # Rejected rows are stored in bulk with the chunk
+                    if failures:
+                        logger.warning(f"Rejected {len(failures)} rows of file {file_id}")
+                        record_row_errors(cur, file_id, [
+                            (row_number, listing_data.get('seller-sku'), str(error) or repr(error))
+                            for (row_number, listing_data), error in failures
+                        ])
+                    failed_rows += len(failures)
+                    
+                    processed_rows += len(rows) - len(failures)
+                    progress.update(processed_rows)
+                    
+                    # Commit the chunk; a restart can then skip these rows
+                    conn.commit()
+                    progress.set_checkpoint({'rows': next_row, 'processed_rows': processed_rows})
         
         # Update file status to "processed"
         update_file_status(file_id, 'processed', {
             'total_rows': total_rows,
             'processed_rows': processed_rows,
-            'identifier_changes': len(identifier_changes)
+            'failed_rows': failed_rows,
+            'identifier_changes': identifier_change_count,
+            **row_counts
         })
         
         return {
             'status': 'processed',
-            'message': f'Successfully processed {processed_rows} of {total_rows} rows',
-            'identifier_changes': len(identifier_changes)
+            'message': (
+                f'Successfully processed {processed_rows} of {total_rows} rows '
+                f"({row_counts['inserted']} inserted, {row_counts['updated']} updated, "
+                f"{row_counts['unchanged']} unchanged)"
+            ),
+            'identifier_changes': identifier_change_count,
+            'failed_rows': failed_rows,
+            **row_counts
         }
         
     except Exception as e:
@@ -316,8 +533,163 @@ def process_file_without_duplicates(df, file_id, user_id=None, report_type='defa
             'message': str(e)
         }
 
+def record_row_errors(cur, file_id, errors):
+    """
+    Store rejected report rows in report_row_errors with a single COPY
+    
+    Args:
+        cur: Cursor of the ingest transaction
+        file_id: ID of the file being processed
+        errors: List of (row_number, sku, message) tuples
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row_number, sku, message in errors:
+        # An empty unquoted field is NULL in CSV COPY
+        writer.writerow([file_id, row_number, '' if sku is None else sku, message])
+    buffer.seek(0)
+    cur.copy_expert(
+        "COPY report_row_errors (file_id, row_number, sku, message) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+def stage_listing_identifiers(cur, batch):
+    """
+    Load the SKUs, identifiers and fingerprints of a batch into a staging table with one COPY
+    
+    The temporary table lives as long as the connection and is emptied on
+    commit, so staged rows never outlive the chunk transaction.
+    """
+    cur.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS listing_identifiers_staging (
+            seller_sku TEXT,
+            asin TEXT,
+            upc TEXT,
+            ean TEXT,
+            row_hash BIGINT
+        ) ON COMMIT DELETE ROWS
+        """
+    )
+    cur.execute("TRUNCATE listing_identifiers_staging")
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for _, listing_data in batch:
+        # An empty unquoted field is NULL in CSV COPY
+        writer.writerow([
+            '' if listing_data.get(key) is None else listing_data[key]
+            for key in ('seller-sku', 'asin', 'upc', 'ean', 'row_hash')
+        ])
+    buffer.seek(0)
+    cur.copy_expert(
+        "COPY listing_identifiers_staging (seller_sku, asin, upc, ean, row_hash) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+def record_identifier_changes(cur, file_id):
+    """
+    Record identifier changes of the staged batch with a single INSERT ... SELECT
+    
+    An identifier counts as changed when the stored listing and the report both
+    have a value and the values differ; a blank report cell is not a change.
+    Must run before the batch updates listings, while the old values are stored.
+    
+    Returns:
+        Number of identifier changes recorded
+    """
+    cur.execute(
+        """
+        INSERT INTO identifier_changes
+        (listing_id, sku, old_asin, new_asin, old_upc, new_upc, old_ean, new_ean, file_id, changed_at)
+        SELECT l.id, s.seller_sku, l.asin, s.asin, l.upc, s.upc, l.ean, s.ean, %s, NOW()
+        FROM listing_identifiers_staging s
+        JOIN listings l ON l.seller_sku = s.seller_sku
+        WHERE l.row_hash IS DISTINCT FROM s.row_hash
+          AND (
+              (l.asin IS NOT NULL AND s.asin IS NOT NULL AND l.asin IS DISTINCT FROM s.asin)
+              OR (l.upc IS NOT NULL AND s.upc IS NOT NULL AND l.upc IS DISTINCT FROM s.upc)
+              OR (l.ean IS NOT NULL AND s.ean IS NOT NULL AND l.ean IS DISTINCT FROM s.ean)
+          )
+        """,
+        (file_id,)
+    )
+    return cur.rowcount
+
+def write_listings(cur, batch, file_id):
+    """
+    Insert or update a batch of (row_number, listing_data) rows
+    
+    Listings whose stored fingerprint matches are left untouched. Identifier
+    changes are detected for the whole batch at once on the server (see
+    record_identifier_changes) before any listing is updated.
+    
+    Returns:
+        Tuple of (counts of inserted, updated and unchanged listings, number of identifier changes)
+    """
+    row_counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    
+    stage_listing_identifiers(cur, batch)
+    identifier_change_count = record_identifier_changes(cur, file_id)
+    
+    # Look up the stored fingerprints of the whole batch at once
+    cur.execute(
+        """
+        SELECT l.seller_sku, l.row_hash
+        FROM listings l
+        JOIN listing_identifiers_staging s ON l.seller_sku = s.seller_sku
+        """
+    )
+    stored_hashes = dict(cur.fetchall())
+    
+    for _, listing_data in batch:
+        sku = listing_data['seller-sku']
+        
+        if sku in stored_hashes and stored_hashes[sku] == listing_data['row_hash']:
+            # Leave an unchanged listing untouched
+            row_counts['unchanged'] += 1
+        
+        elif sku in stored_hashes:
+            # Update existing listing
+            columns = []
+            values = []
+            for key, value in listing_data.items():
+                if key != 'seller-sku':  # Skip SKU as it's the primary key
+                    columns.append(key.replace('-', '_'))
+                    values.append(value)
+            
+            if values:  # Only update if there are values to update
+                # Create the SET part of the SQL query
+                set_clause = ", ".join([f"{col} = %s" for col in columns])
+                values.append(sku)  # Add SKU for WHERE clause
+                
+                update_query = f"UPDATE listings SET {set_clause}, updated_at = NOW() WHERE seller_sku = %s"
+                cur.execute(update_query, values)
+                row_counts['updated'] += 1
+        else:
+            # Insert new listing
+            columns = []
+            values = []
+            for key, value in listing_data.items():
+                columns.append(key.replace('-', '_'))
+                values.append(value)
+            
+            # Add timestamps
+            columns.extend(['created_at', 'updated_at'])
+            values.extend([time.strftime('%Y-%m-%d %H:%M:%S'), time.strftime('%Y-%m-%d %H:%M:%S')])
+            
+            # Create the INSERT SQL query
+            placeholders = ", ".join(["%s"] * len(values))
+            cols = ", ".join(columns)
+            
+            insert_query = f"INSERT INTO listings ({cols}) VALUES ({placeholders})"
+            cur.execute(insert_query, values)
+            row_counts['inserted'] += 1
+    
+    return row_counts, identifier_change_count
+
 def update_file_status(file_id, status, details=None):
-    """Update the status of a file in the database"""
+    """Update the status of a file in the database, dropping the snapshot of a finished file"""
     logger.info(f"Updating file {file_id} status to {status}")
     
     try:
@@ -335,9 +707,14 @@ def update_file_status(file_id, status, details=None):
                     )
     except Exception as e:
         logger.error(f"Error updating file status: {str(e)}")
+        return
+    
+    # A finished file is not read again, so its snapshot only takes up disk
+    if status in FINISHED_STATUSES:
+        discard_snapshot(file_id)
 
-def update_progress(file_id, processed_rows, total_rows):
-    """Update the progress of a file being processed"""
+def update_progress(file_id, processed_rows, total_rows, checkpoint=None):
+    """Update the progress of a file being processed, and its checkpoint if given"""
     progress = int(100 * processed_rows / total_rows) if total_rows > 0 else 100
     logger.info(f"File {file_id}: Processed {processed_rows}/{total_rows} rows ({progress}%)")
     update_file_status(file_id, 'processing', {
@@ -345,10 +722,58 @@ def update_progress(file_id, processed_rows, total_rows):
         'processed_rows': processed_rows,
         'total_rows': total_rows
     })
+    if checkpoint:
+        save_checkpoint(file_id, checkpoint)
+
+def mark_processing(file_id, task, **task_args):
+    """Mark a file as processing and record how to resume it if the worker stops"""
+    checkpoint = {
+        'processor': PROCESSOR_NAME,
+        'task': task,
+        'args': task_args,
+        'rows': 0,
+        'processed_rows': 0
+    }
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE uploaded_files SET status = 'processing', checkpoint = %s::jsonb, updated_at = NOW() WHERE id = %s",
+                (json.dumps(checkpoint), file_id)
+            )
 
-def resolve_duplicates(issue_id, file_id):
+def save_checkpoint(file_id, checkpoint):
+    """Merge a resume point into the stored checkpoint of a file"""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "UPDATE uploaded_files SET checkpoint = COALESCE(checkpoint, '{}'::jsonb) || %s::jsonb, updated_at = NOW() WHERE id = %s",
+                    (json.dumps(checkpoint), file_id)
+                )
+    except Exception as e:
+        logger.error(f"Error saving checkpoint for file {file_id}: {e}")
+
+def load_checkpoint(file_id):
+    """
+    Get the resume point of an interrupted file
+    
+    Returns:
+        Tuple of (data rows already written, rows processed by then)
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT checkpoint FROM uploaded_files WHERE id = %s", (file_id,))
+            result = cur.fetchone()
+    
+    checkpoint = (result[0] if result else None) or {}
+    logger.info(f"Resuming file {file_id} at row {checkpoint.get('rows', 0)}")
+    return int(checkpoint.get('rows', 0)), int(checkpoint.get('processed_rows', 0))
+
+def resolve_duplicates(issue_id, file_id, resume=False):
     """
     Resolve duplicate SKUs in a file based on user selections
+    
+    With resume, an interrupted run continues from its last checkpoint.
     """
     try:
         logger.info(f"Resolving duplicates for issue {issue_id} (File ID: {file_id})")
@@ -384,7 +809,7 @@ def resolve_duplicates(issue_id, file_id):
         with get_db_connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(
-                    "SELECT file_path FROM uploaded_files WHERE id = %s",
+                    "SELECT file_path, snapshot_path FROM uploaded_files WHERE id = %s",
                     (file_id,)
                 )
                 result = cur.fetchone()
@@ -396,14 +821,16 @@ def resolve_duplicates(issue_id, file_id):
                         'message': f'File {file_id} not found'
                     }
                 
-                file_path = result[0]
+                file_path, snapshot_path = result
         
-        # Read the file
-        df = pd.read_csv(file_path, sep='\t', encoding='utf-8')
-        df.columns = [col.strip() for col in df.columns]
-        
-        # Apply resolutions
-        df = apply_duplicate_resolutions(df, duplicate_info, resolutions)
+        # Stream the file's snapshot (or the file) and apply resolutions chunk by
+        # chunk; chunk index labels are row offsets, matching the stored row_index values
+        total_rows = report_row_count(file_path, snapshot_path)
+        chunk_size = estimate_chunk_rows(file_path, REPORT_MEMORY_BUDGET_MB, REPORT_CHUNK_SIZE)
+        start_row, processed_before = load_checkpoint(file_id) if resume else (0, 0)
+        resolve = lambda chunk: apply_duplicate_resolutions(chunk, duplicate_info, resolutions)
+        chunks = (resolve(chunk) for chunk in report_chunks(file_path, chunk_size, snapshot_path, start_row=start_row))
+        seen_skus = skus_before(file_path, chunk_size, snapshot_path, start_row, resolve)
         
         # Update issue status
         with get_db_connection() as conn:
@@ -413,8 +840,14 @@ def resolve_duplicates(issue_id, file_id):
                     (issue_id,)
                 )
         
+        if not resume:
+            mark_processing(file_id, 'resolve_duplicates', issue_id=issue_id)
+        
         # Process the file now that duplicates are resolved
-        return process_file_without_duplicates(df, file_id)
+        return process_file_without_duplicates(
+            chunks, file_id, total_rows=total_rows,
+            start_row=start_row, processed_before=processed_before, seen_skus=seen_skus
+        )
         
     except Exception as e:
         logger.error(f"Error resolving duplicates for issue {issue_id}: {str(e)}")
@@ -472,60 +905,51 @@ def apply_duplicate_resolutions(df, duplicate_info, resolutions):
             duplicate_rows = [item['row_index'] for item in duplicate_info[sku]]
             rows_to_drop.extend(duplicate_rows)
     
-    # Remove the unwanted rows
-    resolved_df = resolved_df.drop(rows_to_drop)
+    # Remove the unwanted rows (a chunk only holds some of them)
+    resolved_df = resolved_df.drop(rows_to_drop, errors='ignore')
     
     return resolved_df
 
-def process_all_listings_report(file_path, file_id, user_id=None):
+def process_all_listings_report(file_path, file_id, user_id=None, resume=False):
     """
     Process Amazon All Listings Report file and store results in database
     This is similar to process_report but specific to the All Listings Report format
+    
+    With resume, an interrupted run continues from its last checkpoint.
     """
     try:
         logger.info(f"Processing All Listings report: {file_path} (ID: {file_id})")
         
         # Update file status to "processing"
-        with get_db_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "UPDATE uploaded_files SET status = 'processing', updated_at = NOW() WHERE id = %s",
-                    (file_id,)
-                )
+        if not resume:
+            mark_processing(file_id, 'process_all_listings_report', user_id=user_id)
+        
+        # Reject reports above the configured size before reading them
+        check_report_size(file_path, MAX_REPORT_SIZE_MB)
+        chunk_size = estimate_chunk_rows(file_path, REPORT_MEMORY_BUDGET_MB, REPORT_CHUNK_SIZE)
         
-        # Read the file
-        df = pd.read_csv(file_path, sep='\t', encoding='utf-8')
-        df.columns = [col.strip() for col in df.columns]
+        # An interrupted run already passed the duplicate check and wrote the snapshot
+        if resume:
+            snapshot_path = load_snapshot_path(file_id)
+            total_rows = report_row_count(file_path, snapshot_path)
+            start_row, processed_before = load_checkpoint(file_id)
+            chunks = report_chunks(file_path, chunk_size, snapshot_path, start_row=start_row)
+            return process_file_without_duplicates(
+                chunks, file_id, user_id, report_type='all_listings', total_rows=total_rows,
+                start_row=start_row, processed_before=processed_before,
+                seen_skus=skus_before(file_path, chunk_size, snapshot_path, start_row)
+            )
         
-        # Check for duplicate SKUs in the input file
-        duplicate_skus = df[df.duplicated(subset=['seller-sku'], keep=False)]
-        has_duplicates = len(duplicate_skus) > 0
-        duplicate_count = len(duplicate_skus)
-        duplicate_info = {}
+        # Check for duplicate SKUs in the input file, parsing it into its snapshot
+        snapshot_path = snapshot_path_for(file_path)
+        duplicate_count, duplicate_info = find_duplicate_skus(file_path, chunk_size, snapshot_path)
+        snapshot_path = record_snapshot(file_id, snapshot_path)
+        has_duplicates = duplicate_count > 0
         
         # Store information about duplicates if found
         if has_duplicates:
             logger.info(f"Found {duplicate_count} duplicate SKUs in file {file_id}")
             
-            # Group duplicates by SKU
-            duplicate_groups = df[df.duplicated(subset=['seller-sku'], keep=False)].groupby('seller-sku')
-            
-            for sku, group in duplicate_groups:
-                duplicate_info[sku] = []
-                for _, row in group.iterrows():
-                    # Extract key fields for comparison
-                    duplicate_info[sku].append({
-                        'row_index': row.name,
-                        'asin': row.get('asin1'),
-                        'upc': row.get('product-id') if row.get('product-id-type') == '3' else None,
-                        'ean': row.get('product-id') if row.get('product-id-type') == '4' else None,
-                        'fnsku': row.get('fnsku'),
-                        'price': row.get('price'),
-                        'quantity': row.get('quantity'),
-                        'condition': row.get('item-condition'),
-                        'title': row.get('item-name')
-                    })
-            
             # Store duplicate info in a separate table for user resolution
             with get_db_connection() as conn:
                 with conn.cursor() as cur:
@@ -554,7 +978,11 @@ def process_all_listings_report(file_path, file_id, user_id=None):
             }
         
         # Continue with normal processing if no duplicates
-        return process_file_without_duplicates(df, file_id, user_id, report_type='all_listings')
+        total_rows = report_row_count(file_path, snapshot_path)
+        chunks = report_chunks(file_path, chunk_size, snapshot_path)
+        return process_file_without_duplicates(
+            chunks, file_id, user_id, report_type='all_listings', total_rows=total_rows
+        )
         
     except Exception as e:
         logger.error(f"Error processing All Listings report {file_id}: {str(e)}")
@@ -573,61 +1001,134 @@ def process_all_listings_report(file_path, file_id, user_id=None):
             'message': str(e)
         }
 
+def get_task_queue():
+    """Create this process's consumer of the 'celery' queue"""
+    return TaskQueue(
+        get_redis_client(), 'celery',
+        visibility_timeout=TASK_VISIBILITY_TIMEOUT_SECONDS,
+        max_retries=TASK_MAX_RETRIES,
+        retry_base_delay=TASK_RETRY_BASE_SECONDS,
+        retry_max_delay=TASK_RETRY_MAX_SECONDS,
+        claim_ttl=ENQUEUE_KEY_TTL_SECONDS
+    )
+
 def process_redis_queue():
-    """Main function to continuously process tasks from Redis queue"""
+    """
+    Main function to continuously process tasks from Redis queue
+    
+    Tasks are received into this consumer's processing list and acknowledged
+    once handled, so a task whose consumer dies is requeued by another
+    consumer after TASK_VISIBILITY_TIMEOUT_SECONDS instead of being lost.
+    Failed tasks are retried with exponential backoff, up to TASK_MAX_RETRIES
+    times, and then dead-lettered (see report_dlq.py).
+    """
     logger.info("Starting Redis queue processor")
     
-    redis_client = get_redis_client()
+    queue = get_task_queue()
+    next_reap = 0
     
     try:
-        while True:
-            try:
-                # Try to get a task from the Redis queue
-                logger.info("Polling Redis queue 'celery'...")
-                task_data = redis_client.brpop('celery', timeout=5)
-                
-                if not task_data:
-                    logger.debug("No tasks in Redis queue, waiting...")
-                    time.sleep(0.1)  # Sleep briefly to avoid high CPU usage in idle periods
-                    continue
+        with queue:
+            while True:
+                task_json = None
+                task = None
+                file_id = None
+                try:
+                    # Hand the tasks of consumers that stopped to the queue again
+                    if time.monotonic() >= next_reap:
+                        queue.reap()
+                        next_reap = time.monotonic() + QUEUE_REAP_INTERVAL_SECONDS
                     
-                _, task_json = task_data
-                logger.info(f"Received raw task: {task_json[:100]}...")
-                task = json.loads(task_json)
-                
-                logger.info(f"Processing task from Redis queue: {task.get('id')} ({task.get('task')})")
-                
-                # Extract task parameters
-                task_name = task.get('task')
-                args = task.get('args', [])
-                kwargs = task.get('kwargs', {})
-                
-                # Process the task based on its name
-                if task_name == 'process_report':
-                    logger.info(f"Calling process_report with args: {args}")
-                    result = process_report(*args, **kwargs)
-                    logger.info(f"process_report result: {result}")
+                    # Queue the retries whose backoff has elapsed
+                    queue.promote_due()
                     
-                elif task_name == 'process_all_listings_report':
-                    logger.info(f"Calling process_all_listings_report with args: {args}")
-                    result = process_all_listings_report(*args, **kwargs)
-                    logger.info(f"process_all_listings_report result: {result}")
+                    # Try to get a task from the Redis queue
+                    logger.info("Polling Redis queue 'celery'...")
+                    task_json = queue.receive(timeout=5)
                     
-                elif task_name == 'resolve_duplicates':
-                    logger.info(f"Calling resolve_duplicates with args: {args}")
-                    result = resolve_duplicates(*args, **kwargs)
-                    logger.info(f"resolve_duplicates result: {result}")
+                    if not task_json:
+                        logger.debug("No tasks in Redis queue, waiting...")
+                        time.sleep(0.1)  # Sleep briefly to avoid high CPU usage in idle periods
+                        continue
                     
-                else:
-                    logger.warning(f"Unknown task type: {task_name}")
+                    logger.info(f"Received raw task: {task_json[:100]}...")
+                    task = json.loads(task_json)
+                    
+                    logger.info(f"Processing task from Redis queue: {task.get('id')} ({task.get('task')})")
+                    
+                    # Extract task parameters
+                    task_name = task.get('task')
+                    args = task.get('args', [])
+                    kwargs = task.get('kwargs', {})
+                    
+                    # A redelivered task whose file an earlier delivery already finished has nothing to do
+                    file_id = args[1] if len(args) > 1 else kwargs.get('file_id')
+                    status = file_status(file_id) if file_id else None
+                    if status in FINISHED_STATUSES:
+                        logger.info(f"Skipping task {task.get('id')}, file {file_id} is already {status}")
+                        queue.ack(task_json, file_id)
+                        continue
+                    
+                    # An older full snapshot is skipped when a newer one of the same report is queued
+                    newer_file_id = queue.superseded_by(task_name, file_id, kwargs.get('user_id'))
+                    if newer_file_id and uploaded_after(newer_file_id, file_id):
+                        logger.info(f"Skipping file {file_id}, superseded by newer report {newer_file_id}")
+                        update_file_status(file_id, 'superseded', {'superseded_by': newer_file_id})
+                        queue.ack(task_json, file_id)
+                        continue
+                    
+                    # A redelivered or retried task continues from the checkpoint of its earlier run
+                    if file_id and 'resume' not in kwargs and was_interrupted(file_id, task_name):
+                        logger.info(f"Task {task.get('id')} was interrupted before, resuming file {file_id}")
+                        kwargs = {**kwargs, 'resume': True}
+                    
+                    # Process the task based on its name
+                    if task_name == 'process_report':
+                        logger.info(f"Calling process_report with args: {args}")
+                        result = process_report(*args, **kwargs)
+                        logger.info(f"process_report result: {result}")
+                        
+                    elif task_name == 'process_all_listings_report':
+                        logger.info(f"Calling process_all_listings_report with args: {args}")
+                        result = process_all_listings_report(*args, **kwargs)
+                        logger.info(f"process_all_listings_report result: {result}")
+                        
+                    elif task_name == 'resolve_duplicates':
+                        logger.info(f"Calling resolve_duplicates with args: {args}")
+                        result = resolve_duplicates(*args, **kwargs)
+                        logger.info(f"resolve_duplicates result: {result}")
+                        
+                    else:
+                        logger.warning(f"Unknown task type: {task_name}")
+                        fail_task(queue, task_json, task, f"Unknown task type: {task_name}", file_id, retry=False)
+                        continue
+                    
+                    # Failed tasks are retried later, and dead-lettered once out of retries
+                    if isinstance(result, dict) and result.get('status') == 'error':
+                        fail_task(queue, task_json, task, result.get('message') or 'Task failed', file_id)
+                    else:
+                        queue.ack(task_json, file_id)
+                    
+                    # Step down once the finished task left this process too large;
+                    # the supervisor starts a fresh process in its place
+                    memory_mb = resident_memory_mb()
+                    if WORKER_MAX_MEMORY_MB and memory_mb > WORKER_MAX_MEMORY_MB:
+                        logger.info(
+                            f"Worker holds {memory_mb:.0f} MB, above the limit of {WORKER_MAX_MEMORY_MB} MB; "
+                            "stopping to be replaced"
+                        )
+                        return
+                    
+                except json.JSONDecodeError as e:
+                    logger.error(f"Failed to decode task JSON: {e}")
+                    logger.error(f"Raw task data: {task_json}")
+                    queue.fail(task_json, None, f"Failed to decode task JSON: {e}")
+                except Exception as e:
+                    logger.error(f"Error processing task from Redis queue: {e}")
+                    logger.error(traceback.format_exc())
+                    if task_json:
+                        fail_task(queue, task_json, task, f"{type(e).__name__}: {e}", file_id)
                     
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to decode task JSON: {e}")
-                logger.error(f"Raw task data: {task_data}")
-            except Exception as e:
-                logger.error(f"Error processing task from Redis queue: {e}")
-                logger.error(traceback.format_exc())
-                
     except KeyboardInterrupt:
         logger.info("Redis queue processor shutting down")
     except Exception as e:
@@ -635,41 +1136,188 @@ def process_redis_queue():
         logger.error(traceback.format_exc())
         raise
 
+def fail_task(queue, message, task, error, file_id=None, retry=True):
+    """Hand a failed task back to the queue, dropping its file's snapshot once it is dead-lettered"""
+    delay = queue.fail(message, task, error, file_id, retry=retry)
+    if delay is None and file_id:
+        discard_snapshot(file_id)
+    return delay
+
+def uploaded_after(file_id, other_file_id):
+    """Whether a file was uploaded after another one (False if either is not registered)"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT newer.created_at > older.created_at
+                FROM uploaded_files newer, uploaded_files older
+                WHERE newer.id = %s AND older.id = %s
+                """,
+                (file_id, other_file_id)
+            )
+            result = cur.fetchone()
+    return bool(result and result[0])
+
+def file_status(file_id):
+    """Current status of an uploaded file, or None if it is not registered"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT status FROM uploaded_files WHERE id = %s", (file_id,))
+            result = cur.fetchone()
+    return result[0] if result else None
+
+def was_interrupted(file_id, task_name):
+    """Whether an earlier run of a task already committed rows of a file before it stopped or failed"""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT status, checkpoint FROM uploaded_files WHERE id = %s", (file_id,))
+            result = cur.fetchone()
+    
+    if not result:
+        return False
+    status, checkpoint = result[0], result[1] or {}
+    return (
+        status in ('processing', 'interrupted', 'error')
+        and checkpoint.get('processor') == PROCESSOR_NAME
+        and checkpoint.get('task') == task_name
+        and int(checkpoint.get('rows', 0)) > 0
+    )
+
 # Check for pending tasks on startup
+def claim_interrupted_files():
+    """
+    Claim files the worker was processing when it stopped
+    
+    A file qualifies if it is still marked as processing but its progress has
+    not been written for INGEST_STALE_AFTER_SECONDS, or if it was interrupted.
+    Claimed files are moved back to processing so other workers skip them.
+    
+    Returns:
+        List of (file_id, file_path, checkpoint, user_id) tuples
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE uploaded_files
+                SET status = 'processing', updated_at = NOW()
+                WHERE id IN (
+                    SELECT id FROM uploaded_files
+                    WHERE checkpoint->>'processor' = %s
+                      AND (
+                          status = 'interrupted'
+                          OR (status = 'processing' AND updated_at < NOW() - make_interval(secs => %s))
+                      )
+                    ORDER BY created_at
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, file_path, checkpoint, user_id
+                """,
+                (PROCESSOR_NAME, INGEST_STALE_AFTER_SECONDS)
+            )
+            return cur.fetchall()
+
+def task_message(task_name, args, kwargs=None):
+    """Build a Celery-compatible task message like the upload routes send"""
+    task_id = str(uuid.uuid4())
+    return {
+        'id': task_id,
+        'task': task_name,
+        'args': args,
+        'kwargs': kwargs or {},
+        'exchange': 'celery',
+        'routing_key': 'celery',
+        'properties': {
+            'delivery_mode': 2,  # persistent
+            'correlation_id': task_id,
+            'delivery_tag': task_id
+        }
+    }
+
+def account_kwargs(user_id):
+    """Task kwargs naming the account that uploaded a file, as the upload routes send them"""
+    return {'user_id': user_id} if user_id else {}
+
+def resume_interrupted_files(queue):
+    """
+    Queue files that were interrupted mid-way, to continue from their last checkpoint
+    
+    A file whose task is still queued, retrying or held by a stopped consumer
+    is left to that task, so no file is ingested by two consumers at once.
+    """
+    for file_id, file_path, checkpoint, user_id in claim_interrupted_files():
+        task = checkpoint.get('task')
+        args = checkpoint.get('args') or {}
+        
+        if task == 'resolve_duplicates':
+            # Duplicate resolutions are waited on by a user
+            message = task_message(task, [args.get('issue_id'), file_id], {'resume': True})
+            lane = queue.lanes[0]
+        else:
+            task = task if task == 'process_all_listings_report' else 'process_report'
+            # Coalesced with the newest upload of the account that uploaded the file
+            message = task_message(task, [file_path, file_id], {**args, **account_kwargs(user_id), 'resume': True})
+            lane = None
+        
+        if queue.enqueue(message, file_id, lane):
+            logger.info(f"Queued interrupted file {file_path} to resume (ID: {file_id}, task: {task})")
+        else:
+            logger.info(f"Interrupted file {file_id} is still queued, leaving it to its task")
+
 def check_pending_tasks():
-    """Check for tasks that were left in 'pending' status and queue them for processing"""
+    """Queue the files left interrupted or in 'pending' status that have no queued task"""
     logger.info("Checking for pending tasks...")
     
     try:
+        queue = get_task_queue()
+        
+        # Files interrupted mid-way continue from their checkpoint first
+        resume_interrupted_files(queue)
+        
         with get_db_connection() as conn:
             with conn.cursor() as cur:
+                # Files registered by the report services carry their own checkpoint and are resumed there
                 cur.execute(
-                    "SELECT id, file_path FROM uploaded_files WHERE status = 'pending' ORDER BY created_at ASC"
+                    """
+                    SELECT id, file_path, user_id FROM uploaded_files
+                    WHERE status = 'pending'
+                      AND (checkpoint IS NULL OR checkpoint->>'processor' = %s)
+                    ORDER BY created_at ASC
+                    """,
+                    (PROCESSOR_NAME,)
                 )
                 pending_files = cur.fetchall()
-                
-                if pending_files:
-                    logger.info(f"Found {len(pending_files)} pending files to process")
-                    
-                    for file_id, file_path in pending_files:
-                        logger.info(f"Processing pending file: {file_path} (ID: {file_id})")
-                        process_report(file_path, file_id)
-                else:
-                    logger.info("No pending tasks found")
+        
+        if pending_files:
+            logger.info(f"Found {len(pending_files)} pending files")
+            
+            for file_id, file_path, user_id in pending_files:
+                message = task_message('process_report', [file_path, file_id], account_kwargs(user_id))
+                if queue.enqueue(message, file_id):
+                    logger.info(f"Queued pending file: {file_path} (ID: {file_id})")
+        else:
+            logger.info("No pending tasks found")
     except Exception as e:
         logger.error(f"Error checking pending tasks: {e}")
         logger.error(traceback.format_exc())
 
+def run_consumer(slot, restarts):
+    """Consume the Redis queue in one supervised worker process"""
+    # Pending files are queued by one consumer only, and only on its first start
+    if slot == 0 and restarts == 0:
+        check_pending_tasks()
+    
+    process_redis_queue()
+
 # Main execution
 if __name__ == '__main__':
     try:
-        logger.info("Worker starting up in standalone mode...")
-        
-        # Check for pending tasks first
-        check_pending_tasks()
+        logger.info(f"Worker starting up in standalone mode with {WORKER_PROCESSES} consumer processes...")
         
-        # Then start the Redis queue processor
-        process_redis_queue()
+        # Consumers share the queue; crashed or oversized consumers are replaced
+        ProcessSupervisor(
+            run_consumer, WORKER_PROCESSES, restart_delay=WORKER_RESTART_DELAY_SECONDS
+        ).run()
     except Exception as e:
         logger.error(f"Worker crashed: {e}")
         logger.error(traceback.format_exc())
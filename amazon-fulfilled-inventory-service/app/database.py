@@ -1,7 +1,9 @@
 import asyncpg
 import logging
 import os
-from typing import Optional, List, Dict, Any, Union
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, Union, Tuple, AsyncIterator, Awaitable, Callable, TypeVar
 from asyncpg.pool import Pool
 
 from app.config import settings
@@ -12,13 +14,92 @@ logger = logging.getLogger("database")
 # Database connection pool
 _pool: Optional[Pool] = None
 
+# Row and batch result types for write_rows_isolated
+Row = TypeVar("Row")
+Result = TypeVar("Result")
+
+# Generated write statements keyed by (table, columns, operation), least recently used first
+_statement_cache: "OrderedDict[Tuple[str, Tuple[str, ...], str], str]" = OrderedDict()
+
+class _ConnectionPool:
+    """Pool stand-in that always hands out the same connection"""
+    
+    def __init__(self, conn: asyncpg.Connection):
+        self.conn = conn
+    
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        yield self.conn
+
 class Database:
     """Database connection manager class"""
     
-    def __init__(self, pool: Pool):
+    def __init__(self, pool: Union[Pool, _ConnectionPool]):
         """Initialize with a connection pool"""
         self.pool = pool
     
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["Database"]:
+        """
+        Run statements on one connection inside a single transaction
+        
+        Yields a Database bound to the transaction's connection, so every
+        method called on it joins the transaction. Calling transaction() on
+        that Database again opens a savepoint.
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                yield Database(_ConnectionPool(conn))
+    
+    async def write_rows_isolated(
+        self,
+        rows: List[Row],
+        write: Callable[["Database", List[Row]], Awaitable[Result]],
+        on_written: Optional[Callable[[Result], None]] = None,
+    ) -> List[Tuple[Row, Exception]]:
+        """
+        Write rows in one transaction, isolating the rows that fail
+        
+        The rows are written under a savepoint. If that fails, the savepoint
+        is rolled back and the rows are split in half and retried, until each
+        failing row is on its own. The rest of the rows are committed together,
+        so a bad row costs a few savepoints rather than a commit per row.
+        
+        Args:
+            rows: Rows to write
+            write: Coroutine function called with (transaction, batch) that writes a batch
+            on_written: Optional function called with the result of each batch that was written
+            
+        Returns:
+            List of (row, error) for the rows that could not be written
+        """
+        if not rows:
+            return []
+        
+        async with self.transaction() as tx:
+            return await tx._write_bisecting(rows, write, on_written)
+    
+    async def _write_bisecting(
+        self,
+        rows: List[Row],
+        write: Callable[["Database", List[Row]], Awaitable[Result]],
+        on_written: Optional[Callable[[Result], None]],
+    ) -> List[Tuple[Row, Exception]]:
+        """Write rows under a savepoint, splitting them in half on failure"""
+        try:
+            async with self.transaction():
+                result = await write(self, rows)
+        except Exception as e:
+            if len(rows) == 1:
+                return [(rows[0], e)]
+            middle = len(rows) // 2
+            failures = await self._write_bisecting(rows[:middle], write, on_written)
+            return failures + await self._write_bisecting(rows[middle:], write, on_written)
+        
+        if on_written:
+            on_written(result)
+        return []
+    
     async def fetch_one(self, query: str, *args) -> Optional[Dict[str, Any]]:
         """Execute a query and return the first result row as a dictionary"""
         try:
@@ -67,6 +148,103 @@ class Database:
             logger.error(f"Database execute_many error: {str(e)}, Query: {query}")
             raise
 
+    async def copy_records(self, table: str, columns: List[str], records: List[tuple]) -> None:
+        """
+        Insert records into a table with a single COPY
+        
+        Args:
+            table: Target table name
+            columns: Column names, in the same order as the values in each record
+            records: Row tuples with values of the column types
+        """
+        if not records:
+            return
+        
+        try:
+            async with self.pool.acquire() as conn:
+                await conn.copy_records_to_table(table, records=records, columns=columns)
+        except Exception as e:
+            logger.error(f"Database copy_records error: {str(e)}, Table: {table}")
+            raise
+
+    def get_statement(self, table: str, columns: Tuple[str, ...], operation: str) -> str:
+        """
+        Return the SQL for a single-row write, reusing it for repeated column sets
+
+        Every distinct (table, columns, operation) shape maps to one fixed query
+        text, so asyncpg prepares it once per connection and reuses the prepared
+        statement for every later row with the same shape.
+
+        Args:
+            table: Target table name
+            columns: Column names, in the same order as the values passed to the query
+            operation: 'insert', 'insert_returning_id' or 'update_by_id'
+
+        Returns:
+            SQL text with positional placeholders
+        """
+        cache_key = (table, columns, operation)
+        query = _statement_cache.get(cache_key)
+        if query is not None:
+            _statement_cache.move_to_end(cache_key)
+            return query
+
+        quoted_columns = [f'"{col}"' for col in columns]
+        if operation in ('insert', 'insert_returning_id'):
+            placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+            query = f"INSERT INTO {table} ({', '.join(quoted_columns)}) VALUES ({placeholders})"
+            if operation == 'insert_returning_id':
+                query += " RETURNING id"
+        elif operation == 'update_by_id':
+            set_clause = ", ".join(f"{col} = ${i}" for i, col in enumerate(quoted_columns, start=2))
+            query = f"UPDATE {table} SET {set_clause} WHERE id = $1"
+        else:
+            raise ValueError(f"Unknown statement operation: {operation}")
+
+        _statement_cache[cache_key] = query
+        if len(_statement_cache) > settings.DATABASE_STATEMENT_CACHE_SIZE:
+            _statement_cache.popitem(last=False)
+        return query
+
+    async def insert_row(self, table: str, data: Dict[str, Any], returning_id: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Insert one row through the statement cache
+
+        Args:
+            table: Target table name
+            data: Column values for the new row
+            returning_id: Return the generated id of the new row
+
+        Returns:
+            Dictionary with the new row's id if returning_id is set, otherwise None
+        """
+        columns = tuple(data.keys())
+        if returning_id:
+            query = self.get_statement(table, columns, 'insert_returning_id')
+            return await self.fetch_one(query, *data.values())
+
+        query = self.get_statement(table, columns, 'insert')
+        await self.execute(query, *data.values())
+        return None
+
+    async def update_row(self, table: str, row_id: Any, data: Dict[str, Any]) -> Optional[str]:
+        """
+        Update one row by id through the statement cache
+
+        Args:
+            table: Target table name
+            row_id: ID of the row to update
+            data: Column values to set
+
+        Returns:
+            Command status, or None if there was nothing to update
+        """
+        if not data:
+            return None
+
+        query = self.get_statement(table, tuple(data.keys()), 'update_by_id')
+        return await self.execute(query, row_id, *data.values())
+
 async def get_db_pool() -> Database:
     """Get or create a database connection pool"""
     global _pool
@@ -80,6 +258,7 @@ async def get_db_pool() -> Database:
                 database=settings.DATABASE_NAME,
                 min_size=settings.DATABASE_MIN_CONNECTIONS,
                 max_size=settings.DATABASE_MAX_CONNECTIONS,
+                statement_cache_size=settings.DATABASE_STATEMENT_CACHE_SIZE,
             )
             logger.info("Database connection pool created successfully")
         except Exception as e:
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.database import Database
+from app.processor import ReportProcessor
+
+# Configure logging
+logger = logging.getLogger("report-jobs")
+
+# Ingest jobs running or waiting on this replica, keyed by file ID
+_jobs: Dict[str, asyncio.Task] = {}
+
+# Limits how many ingests run at once on this replica
+_ingest_slots: Optional[asyncio.Semaphore] = None
+
+def _get_ingest_slots() -> asyncio.Semaphore:
+    """Get or create the semaphore bounding concurrent ingests"""
+    global _ingest_slots
+    if _ingest_slots is None:
+        _ingest_slots = asyncio.Semaphore(max(settings.MAX_CONCURRENT_INGESTS, 1))
+    return _ingest_slots
+
+async def submit_report(db: Database, file_path: str) -> str:
+    """
+    Register a report and process it in a background job
+
+    The file is registered as 'pending' before this returns, so its status
+    can be polled immediately. At most MAX_CONCURRENT_INGESTS jobs process
+    reports at the same time; the rest wait in 'pending'.
+
+    Args:
+        db: Database connection
+        file_path: Path to the report file
+
+    Returns:
+        ID of the registered file
+    """
+    processor = ReportProcessor(db=db)
+    file_id = await processor.queue_report(file_path)
+    _start_job(processor, file_path, file_id)
+
+    logger.info(f"Queued ingest job for file {file_id} ({len(_jobs)} jobs on this replica)")
+    return file_id
+
+async def resume_interrupted_reports(db: Database) -> List[str]:
+    """
+    Claim reports interrupted by a stopped replica and resume them in background jobs
+
+    Each report continues from its last checkpoint instead of row 0.
+
+    Args:
+        db: Database connection
+
+    Returns:
+        IDs of the resumed files
+    """
+    files = await ReportProcessor(db=db).claim_interrupted_files()
+    for file in files:
+        _start_job(ReportProcessor(db=db), file["file_path"], file["id"], resume=True)
+
+    if files:
+        logger.info(f"Resuming {len(files)} interrupted ingest jobs")
+    return [file["id"] for file in files]
+
+def _start_job(processor: ReportProcessor, file_path: str, file_id: str, resume: bool = False) -> None:
+    """Start a background job for a registered report"""
+    task = asyncio.create_task(_run_report(processor, file_path, file_id, resume))
+    _jobs[file_id] = task
+    task.add_done_callback(lambda _: _jobs.pop(file_id, None))
+
+async def _run_report(processor: ReportProcessor, file_path: str, file_id: str, resume: bool = False) -> None:
+    """Process a queued report once an ingest slot is free"""
+    slots = _get_ingest_slots()
+    try:
+        await slots.acquire()
+    except asyncio.CancelledError:
+        # Cancelled while still waiting; the file is resumed from row 0 on restart
+        await processor.set_file_interrupted(file_id)
+        raise
+    try:
+        result = await processor.process_report(file_path, file_id=file_id, resume=resume)
+    finally:
+        slots.release()
+    logger.info(f"Ingest job for file {file_id} finished with status {result.status}: {result.message}")
+
+def active_jobs() -> int:
+    """Number of ingest jobs running or waiting on this replica"""
+    return len(_jobs)
+
+async def cancel_jobs() -> None:
+    """Cancel all ingest jobs on this replica and wait for them to stop"""
+    global _ingest_slots
+    tasks = list(_jobs.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _jobs.clear()
+    _ingest_slots = None
+    if tasks:
+        logger.info(f"Cancelled {len(tasks)} ingest jobs")
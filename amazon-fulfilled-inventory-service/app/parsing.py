@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import pandas as pd
+import pyarrow as pa
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Optional
+
+from app.config import settings
+from app.reader import (
+    is_compressed,
+    iter_report_blocks,
+    parse_report_block,
+    plan_report_chunks,
+    read_report_range,
+)
+from app.schema import FBA_INVENTORY_SCHEMA
+
+# Configure logging
+logger = logging.getLogger("report-parsing")
+
+# Process pool used to parse report chunks off the event loop
+_executor: Optional[ProcessPoolExecutor] = None
+
+def get_parse_executor() -> Optional[ProcessPoolExecutor]:
+    """Get or create the report parsing process pool (None when PARSE_WORKERS is 0)"""
+    global _executor
+    if _executor is None and settings.PARSE_WORKERS > 0:
+        _executor = ProcessPoolExecutor(max_workers=settings.PARSE_WORKERS)
+        logger.info(f"Report parsing pool started with {settings.PARSE_WORKERS} processes")
+    return _executor
+
+def close_parse_executor() -> None:
+    """Shut down the report parsing process pool"""
+    global _executor
+    if _executor:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+        logger.info("Report parsing pool shut down")
+
+async def parse_report_chunks(
+    file_path: str,
+    chunk_rows: int,
+    prepare: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    executor: Optional[ProcessPoolExecutor] = None,
+    max_in_flight: Optional[int] = None,
+    start_row: int = 0,
+    schema: Optional[Dict[str, pa.DataType]] = FBA_INVENTORY_SCHEMA,
+) -> AsyncIterator[pd.DataFrame]:
+    """
+    Parse and prepare a report in a process pool, yielding chunks in file order
+
+    The report is split into byte ranges that are parsed (and passed through
+    prepare) by the pool, so the event loop only receives finished DataFrames.
+    Compressed reports are decompressed in a thread and sent to the pool as
+    blocks of lines instead.
+    At most max_in_flight chunks are being parsed or waiting at any time.
+    Chunks keep a continuous index across the file, so index labels are row
+    offsets in the report, also when parsing starts at start_row. Without an
+    executor the default thread pool is used.
+
+    Args:
+        file_path: Path to the report file
+        chunk_rows: Target number of rows per chunk
+        prepare: Optional module-level function applied to each parsed chunk
+        executor: Process pool used for parsing
+        max_in_flight: Maximum number of chunks parsed ahead of the consumer
+        start_row: Number of leading data rows to skip, e.g. when resuming
+        schema: Declared column types by normalized column name (None keeps text)
+
+    Yields:
+        Prepared DataFrame chunks
+    """
+    loop = asyncio.get_running_loop()
+    if max_in_flight is None:
+        max_in_flight = settings.PARSE_WORKERS + 1
+    max_in_flight = max(max_in_flight, 1)
+
+    async def submit_parse_jobs():
+        if is_compressed(file_path):
+            # Compressed reports cannot be split by byte offsets, so they are
+            # decompressed in order here and the pool parses each block
+            blocks = iter_report_blocks(file_path, chunk_rows, start_row)
+            while True:
+                block = await loop.run_in_executor(None, next, blocks, None)
+                if block is None:
+                    return
+                yield loop.run_in_executor(executor, parse_report_block, block, "\t", prepare, schema)
+        else:
+            ranges = await loop.run_in_executor(executor, plan_report_chunks, file_path, chunk_rows, start_row)
+            for start, end in ranges:
+                yield loop.run_in_executor(executor, read_report_range, file_path, start, end, "\t", prepare, schema)
+
+    pending = deque()
+    next_row = start_row
+    try:
+        async for job in submit_parse_jobs():
+            pending.append(job)
+            if len(pending) < max_in_flight:
+                continue
+            chunk = await pending.popleft()
+            chunk.index = pd.RangeIndex(next_row, next_row + len(chunk))
+            next_row += len(chunk)
+            yield chunk
+
+        while pending:
+            chunk = await pending.popleft()
+            chunk.index = pd.RangeIndex(next_row, next_row + len(chunk))
+            next_row += len(chunk)
+            yield chunk
+    finally:
+        for future in pending:
+            future.cancel()
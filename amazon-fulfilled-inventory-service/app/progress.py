@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger("report-progress")
+
+class ProgressReporter:
+    """
+    Coalesce row progress into at most one status write per interval
+
+    Writers call add() as rows are processed, which only bumps a counter, and
+    set_checkpoint() once a leading part of the report is durably written. A
+    background task writes the latest count and checkpoint every interval
+    seconds if they changed, and both are flushed when the reporter is closed.
+
+    Usage:
+        async with ProgressReporter(write, interval=2.0) as progress:
+            progress.add(rows)
+    """
+
+    def __init__(
+        self,
+        write: Callable[[int, Optional[Dict[str, Any]]], Awaitable[None]],
+        interval: float,
+        processed_rows: int = 0
+    ):
+        """
+        Initialize the reporter
+
+        Args:
+            write: Coroutine function called with the number of processed rows
+                and the latest checkpoint (None if it did not change)
+            interval: Minimum number of seconds between writes
+            processed_rows: Rows already processed, e.g. before a resume
+        """
+        self.write = write
+        self.interval = max(interval, 0)
+        self.processed_rows = processed_rows
+        self.checkpoint: Optional[Dict[str, Any]] = None
+        self._written_rows = processed_rows
+        self._written_checkpoint: Optional[Dict[str, Any]] = None
+        self._stopped = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, rows: int) -> None:
+        """Record rows as processed"""
+        self.processed_rows += rows
+
+    def set_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """Record the point up to which the report is durably written"""
+        self.checkpoint = checkpoint
+
+    async def __aenter__(self) -> "ProgressReporter":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._stopped.set()
+        if exc_type is asyncio.CancelledError:
+            # Shutting down; do not start another write
+            self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        """Write progress every interval, and once more when stopped"""
+        while not self._stopped.is_set():
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            await self._flush()
+
+    async def _flush(self) -> None:
+        """Write the current count and checkpoint if they changed since the last write"""
+        processed_rows = self.processed_rows
+        checkpoint = self.checkpoint
+        new_checkpoint = checkpoint if checkpoint is not self._written_checkpoint else None
+        if processed_rows == self._written_rows and new_checkpoint is None:
+            return
+        try:
+            await self.write(processed_rows, new_checkpoint)
+            self._written_rows = processed_rows
+            self._written_checkpoint = checkpoint
+        except Exception as e:
+            logger.warning(f"Failed to write progress: {str(e)}")
@@ -0,0 +1,456 @@
+import hashlib
+import io
+import os
+import gzip
+import logging
+import zipfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+from typing import BinaryIO, Iterator, Optional, Dict, Any, List, Callable, Tuple
+
+from app.schema import FBA_INVENTORY_SCHEMA, apply_schema, to_frame
+
+# Configure logging
+logger = logging.getLogger("report-reader")
+
+# Number of bytes sampled from the start of a report to estimate row width
+SAMPLE_SIZE_BYTES = 1024 * 1024
+
+# Approximate ratio between the in-memory size of a parsed DataFrame row
+# (boxed Python strings, index, block overhead) and its width on disk
+PARSED_ROW_OVERHEAD = 8
+
+# Block size used when scanning a report for line breaks
+READ_BLOCK_SIZE = 1024 * 1024
+
+# Compressed report formats, by file extension
+COMPRESSED_EXTENSIONS = (".gz", ".zip", ".zst")
+
+class ReportTooLargeError(ValueError):
+    """Raised when a report file exceeds the configured size limit"""
+    pass
+
+def check_report_size(file_path: str, max_size_mb: int) -> int:
+    """
+    Verify that a report file is within the configured size limit
+
+    Args:
+        file_path: Path to the report file
+        max_size_mb: Maximum allowed size in MB (0 disables the check)
+
+    Returns:
+        File size in bytes
+    """
+    file_size = os.path.getsize(file_path)
+    if max_size_mb and file_size > max_size_mb * 1024 * 1024:
+        raise ReportTooLargeError(
+            f"Report file is {file_size / (1024 * 1024):.1f} MB, "
+            f"which exceeds the limit of {max_size_mb} MB"
+        )
+    return file_size
+
+def is_compressed(file_path: str) -> bool:
+    """Whether a report is stored compressed (.gz, .zip or .zst)"""
+    return file_path.lower().endswith(COMPRESSED_EXTENSIONS)
+
+def open_report(file_path: str) -> BinaryIO:
+    """
+    Open a report for binary reading, decompressing it while it is read
+
+    Gzip and Zstandard files are decompressed as a stream, and a zip archive
+    must hold a single report, which is streamed from the archive. Other files
+    are opened as they are.
+
+    Args:
+        file_path: Path to the report file
+
+    Returns:
+        Binary file object with the uncompressed report
+    """
+    name = file_path.lower()
+    if name.endswith(".gz"):
+        return gzip.open(file_path, "rb")
+    if name.endswith(".zst"):
+        return io.BufferedReader(pa.input_stream(file_path, compression="zstd"), READ_BLOCK_SIZE)
+    if name.endswith(".zip"):
+        with zipfile.ZipFile(file_path) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            if len(members) != 1:
+                raise ValueError(f"Zip archive must contain exactly one report, found {len(members)} files")
+            # The member keeps the archive file open until it is closed
+            return archive.open(members[0])
+    return open(file_path, "rb")
+
+def count_report_rows(file_path: str) -> int:
+    """
+    Count the data rows in a report without parsing it
+
+    Args:
+        file_path: Path to the report file
+
+    Returns:
+        Number of lines after the header row
+    """
+    return _scan_lines(file_path)
+
+def scan_report(file_path: str) -> Tuple[int, str]:
+    """
+    Count the data rows and hash the content of a report in one streaming pass
+
+    Compressed reports are hashed after decompression, so the same report
+    hashes the same however it was compressed.
+
+    Args:
+        file_path: Path to the report file
+
+    Returns:
+        Tuple of (number of lines after the header row, hex SHA-256 of the report)
+    """
+    digest = hashlib.sha256()
+    line_count = _scan_lines(file_path, digest)
+    return line_count, digest.hexdigest()
+
+def estimate_chunk_rows(file_path: str, memory_budget_mb: int, max_rows: int) -> int:
+    """
+    Choose how many rows to parse at once so a chunk stays within the memory budget
+
+    Args:
+        file_path: Path to the report file
+        memory_budget_mb: Memory budget for a single parsed chunk in MB
+        max_rows: Upper bound on the number of rows per chunk
+
+    Returns:
+        Number of rows per chunk (at least 1)
+    """
+    avg_row_bytes = _average_row_bytes(file_path)
+
+    budget_rows = int((memory_budget_mb * 1024 * 1024) / (avg_row_bytes * PARSED_ROW_OVERHEAD))
+    chunk_rows = max(min(max_rows, budget_rows), 1)
+
+    logger.info(
+        f"Using chunks of {chunk_rows} rows "
+        f"(~{avg_row_bytes:.0f} bytes per row, budget {memory_budget_mb} MB)"
+    )
+    return chunk_rows
+
+def plan_report_chunks(file_path: str, chunk_rows: int, start_row: int = 0) -> List[Tuple[int, int]]:
+    """
+    Split a report into byte ranges of roughly chunk_rows lines each
+
+    Ranges start after the header row (and start_row data rows) and end on
+    line breaks, so each one can be parsed on its own (see read_report_range).
+    Fields with embedded line breaks are not supported. Compressed reports
+    cannot be split by offsets and are read with iter_report_blocks instead.
+
+    Args:
+        file_path: Path to the report file
+        chunk_rows: Target number of rows per range
+        start_row: Number of leading data rows to skip, e.g. when resuming
+
+    Returns:
+        List of (start, end) byte offsets
+    """
+    target_bytes = max(int(chunk_rows * _average_row_bytes(file_path)), 1)
+    file_size = os.path.getsize(file_path)
+
+    ranges = []
+    with open(file_path, "rb") as f:
+        f.readline()
+        _skip_lines(f, start_row)
+        start = f.tell()
+        while start < file_size:
+            # Extend the range to the end of the line containing its last byte
+            f.seek(min(start + target_bytes, file_size) - 1)
+            f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+
+    return ranges
+
+def read_report_range(
+    file_path: str,
+    start: int,
+    end: int,
+    sep: str = "\t",
+    prepare: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    schema: Optional[Dict[str, pa.DataType]] = FBA_INVENTORY_SCHEMA,
+) -> pd.DataFrame:
+    """
+    Parse one byte range of a report planned by plan_report_chunks
+
+    The range is parsed with the header row by parse_report_block. This runs
+    in a worker process, so prepare must be a module-level function.
+
+    Args:
+        file_path: Path to the report file
+        start: Offset of the first byte of the range
+        end: Offset just past the last byte of the range
+        sep: Field separator
+        prepare: Optional function applied to the parsed chunk
+        schema: Declared column types by normalized column name (None keeps text)
+
+    Returns:
+        DataFrame chunk with stripped column names
+    """
+    with open(file_path, "rb") as f:
+        header = f.readline()
+        f.seek(start)
+        data = f.read(end - start)
+
+    return parse_report_block(header + data, sep, prepare, schema)
+
+def iter_report_blocks(file_path: str, chunk_rows: int, start_row: int = 0) -> Iterator[bytes]:
+    """
+    Read a report as blocks of roughly chunk_rows lines, each with the header row
+
+    This is the sequential counterpart of plan_report_chunks for compressed
+    reports: the report is decompressed as it is read and each block ends on
+    a line break, so it can be parsed on its own (see parse_report_block).
+
+    Args:
+        file_path: Path to the report file
+        chunk_rows: Target number of rows per block
+        start_row: Number of leading data rows to skip, e.g. when resuming
+
+    Yields:
+        Header row followed by the block's lines
+    """
+    target_bytes = max(int(chunk_rows * _average_row_bytes(file_path)), 1)
+
+    with open_report(file_path) as f:
+        header = f.readline()
+        rest = _skip_stream_lines(f, start_row)
+        while True:
+            data = rest + f.read(max(target_bytes - len(rest), 1))
+            if not data:
+                return
+            # Extend the block to the end of its last line
+            if not data.endswith(b"\n"):
+                data += f.readline()
+            rest = b""
+            yield header + data
+
+def parse_report_block(
+    data: bytes,
+    sep: str = "\t",
+    prepare: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+    schema: Optional[Dict[str, pa.DataType]] = FBA_INVENTORY_SCHEMA,
+) -> pd.DataFrame:
+    """
+    Parse a block of report lines that starts with the header row
+
+    The block is parsed by Arrow's multithreaded CSV reader with every column
+    read as text and then cast to its declared type (see apply_schema), so no
+    dtypes are inferred. This runs in a worker process, so prepare must be a
+    module-level function.
+
+    Args:
+        data: Header row followed by complete report lines
+        sep: Field separator
+        prepare: Optional function applied to the parsed chunk
+        schema: Declared column types by normalized column name (None keeps text)
+
+    Returns:
+        DataFrame chunk with stripped column names
+    """
+    header = data[:data.find(b"\n") + 1] or data
+    table = pacsv.read_csv(
+        io.BytesIO(data),
+        read_options=pacsv.ReadOptions(use_threads=True),
+        parse_options=pacsv.ParseOptions(delimiter=sep),
+        convert_options=_text_convert_options(header, sep),
+    )
+    chunk = to_frame(apply_schema(table, schema))
+    chunk.columns = [col.strip() for col in chunk.columns]
+    return prepare(chunk) if prepare else chunk
+
+def iter_report_chunks(
+    file_path: str,
+    chunk_size: int,
+    sep: str = "\t",
+    usecols: Optional[List[str]] = None,
+    schema: Optional[Dict[str, pa.DataType]] = FBA_INVENTORY_SCHEMA,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a report file as DataFrame chunks
+
+    Compressed reports are decompressed as they are read (see open_report).
+    The file is parsed by Arrow's multithreaded CSV reader and cast to the
+    declared column types (see apply_schema). Only one chunk is held in
+    memory at a time. Chunks keep a continuous index across the file, so
+    index labels are row offsets in the report.
+
+    Args:
+        file_path: Path to the report file
+        chunk_size: Number of rows per chunk
+        sep: Field separator
+        usecols: Optional subset of columns to parse
+        schema: Declared column types by normalized column name (None keeps text)
+
+    Yields:
+        DataFrame chunks with stripped column names
+    """
+    with open_report(file_path) as f:
+        header = f.readline()
+
+    with open_report(file_path) as source:
+        reader = pacsv.open_csv(
+            source,
+            read_options=pacsv.ReadOptions(use_threads=True),
+            parse_options=pacsv.ParseOptions(delimiter=sep),
+            convert_options=_text_convert_options(header, sep, usecols),
+        )
+        yield from _regroup_chunks(reader, chunk_size, schema)
+
+def iter_report_skus(
+    file_path: str,
+    chunk_size: int,
+    end_row: int,
+    names: Tuple[str, ...] = ("seller-sku",),
+    sep: str = "\t",
+) -> Iterator[pd.Series]:
+    """
+    Stream the SKU column of the rows before end_row, e.g. the rows a resumed run skips
+
+    Only the SKU column is parsed, so this is much cheaper than reading the rows.
+
+    Args:
+        file_path: Path to the report file
+        chunk_size: Number of rows per chunk
+        end_row: Report row to stop before
+        names: Lowercase names of the SKU column, in order of preference
+        sep: Field separator
+
+    Yields:
+        SKU columns indexed by row offset in the report
+    """
+    if end_row <= 0:
+        return
+
+    with open_report(file_path) as f:
+        header = f.readline()
+    columns = pacsv.read_csv(io.BytesIO(header), parse_options=pacsv.ParseOptions(delimiter=sep)).column_names
+    by_name = {column.strip().lower(): column for column in columns}
+    column = next((by_name[name] for name in names if name in by_name), None)
+    if column is None:
+        return
+
+    for chunk in iter_report_chunks(file_path, chunk_size, sep=sep, usecols=[column]):
+        skus = chunk.iloc[:, 0]
+        yield skus[skus.index < end_row]
+        if chunk.index[-1] + 1 >= end_row:
+            return
+
+def _regroup_chunks(
+    reader: pacsv.CSVStreamingReader,
+    chunk_size: int,
+    schema: Optional[Dict[str, pa.DataType]],
+) -> Iterator[pd.DataFrame]:
+    """Regroup Arrow's record batches, which are sized by bytes, into typed chunks of chunk_size rows"""
+    next_row = 0
+
+    def to_chunk(table: pa.Table) -> pd.DataFrame:
+        nonlocal next_row
+        chunk = to_frame(apply_schema(table, schema))
+        chunk.columns = [col.strip() for col in chunk.columns]
+        chunk.index = pd.RangeIndex(next_row, next_row + len(chunk))
+        next_row += len(chunk)
+        return chunk
+
+    pending: List[pa.RecordBatch] = []
+    pending_rows = 0
+    for batch in reader:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunk_size:
+            table = pa.Table.from_batches(pending, schema=reader.schema)
+            yield to_chunk(table.slice(0, chunk_size))
+            rest = table.slice(chunk_size)
+            pending = rest.to_batches()
+            pending_rows = rest.num_rows
+
+    if pending_rows:
+        yield to_chunk(pa.Table.from_batches(pending, schema=reader.schema))
+
+def _text_convert_options(
+    header: bytes,
+    sep: str,
+    usecols: Optional[List[str]] = None,
+) -> pacsv.ConvertOptions:
+    """Arrow conversion options that read every column of a report as text, with blanks as nulls"""
+    names = pacsv.read_csv(io.BytesIO(header), parse_options=pacsv.ParseOptions(delimiter=sep)).column_names
+
+    return pacsv.ConvertOptions(
+        column_types={name: pa.string() for name in names},
+        include_columns=usecols,
+        # Only blank cells are missing; text such as 'NA' or 'null' is kept as is
+        null_values=[''],
+        strings_can_be_null=True,
+    )
+
+def _average_row_bytes(file_path: str) -> float:
+    """Estimate the average width of a row in bytes from the start of a report"""
+    with open_report(file_path) as f:
+        sample = f.read(SAMPLE_SIZE_BYTES)
+
+    sample_lines = max(sample.count(b"\n"), 1)
+    return max(len(sample) / sample_lines, 1)
+
+def _scan_lines(file_path: str, digest: Optional[Any] = None) -> int:
+    """Count lines after the header in blocks, feeding each block to an optional hash"""
+    line_count = 0
+    last_block = b""
+    with open_report(file_path) as f:
+        while True:
+            block = f.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            line_count += block.count(b"\n")
+            if digest is not None:
+                digest.update(block)
+            last_block = block
+
+    # Count a final line that is not terminated by a newline
+    if last_block and not last_block.endswith(b"\n"):
+        line_count += 1
+
+    return max(line_count - 1, 0)
+
+def _skip_lines(f: BinaryIO, count: int) -> None:
+    """Advance an open binary file past the next count line breaks"""
+    while count > 0:
+        position = f.tell()
+        block = f.read(READ_BLOCK_SIZE)
+        if not block:
+            return
+        newlines = block.count(b"\n")
+        if newlines < count:
+            count -= newlines
+            continue
+
+        # Stop just after the count-th line break in this block
+        index = -1
+        for _ in range(count):
+            index = block.index(b"\n", index + 1)
+        f.seek(position + index + 1)
+        return
+
+def _skip_stream_lines(f: BinaryIO, count: int) -> bytes:
+    """Read a file that cannot seek past the next count line breaks, returning the bytes read after them"""
+    while count > 0:
+        block = f.read(READ_BLOCK_SIZE)
+        if not block:
+            return b""
+        newlines = block.count(b"\n")
+        if newlines < count:
+            count -= newlines
+            continue
+
+        # Keep what follows the count-th line break in this block
+        index = -1
+        for _ in range(count):
+            index = block.index(b"\n", index + 1)
+        return block[index + 1:]
+    return b""
@@ -0,0 +1,124 @@
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Dict, Optional
+
+# Configure logging
+logger = logging.getLogger("report-schema")
+
+# Low-cardinality text, read into pandas as a categorical
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# Flag values that mean "true"
+TRUE_VALUES = ('y', 'yes', 'true')
+
+# Text that parses as a number once surrounding whitespace is trimmed
+NUMBER_PATTERN = r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$'
+
+# FBA Inventory Report columns and their types
+FBA_INVENTORY_SCHEMA: Dict[str, pa.DataType] = {
+    'sku': pa.string(),
+    'fnsku': pa.string(),
+    'asin': pa.string(),
+    'product-name': pa.string(),
+    'condition': CATEGORY,
+    'your-price': pa.float64(),
+    'mfn-listing-exists': CATEGORY,
+    'mfn-fulfillable-quantity': pa.int64(),
+    'afn-listing-exists': CATEGORY,
+    'afn-warehouse-quantity': pa.int64(),
+    'afn-fulfillable-quantity': pa.int64(),
+    'afn-unsellable-quantity': pa.int64(),
+    'afn-reserved-quantity': pa.int64(),
+    'afn-total-quantity': pa.int64(),
+    'per-unit-volume': pa.float64(),
+    'afn-inbound-working-quantity': pa.int64(),
+    'afn-inbound-shipped-quantity': pa.int64(),
+    'afn-inbound-receiving-quantity': pa.int64(),
+}
+
+# pandas dtypes for Arrow types that would otherwise become Python objects or floats
+PANDAS_TYPES = {
+    pa.string(): pd.StringDtype("pyarrow"),
+    pa.int64(): pd.Int64Dtype(),
+    pa.bool_(): pd.BooleanDtype(),
+}
+
+def column_key(name: str) -> str:
+    """Normalize a report column name for schema lookups ('Seller SKU' -> 'seller-sku')"""
+    return name.strip().replace(' ', '-').lower()
+
+def apply_schema(table: pa.Table, schema: Optional[Dict[str, pa.DataType]]) -> pa.Table:
+    """
+    Cast the text columns of a parsed report to their declared types
+
+    Reports are read as text, so a single bad cell never fails a chunk. Here
+    quantities become integers (invalid quantities become 0), prices become
+    floats (invalid prices become null), y/n flags become booleans and
+    low-cardinality columns are dictionary encoded. Blank cells stay null and
+    undeclared columns stay text.
+
+    Args:
+        table: Parsed report rows with text columns
+        schema: Declared column types by normalized column name
+
+    Returns:
+        Table with the declared column types
+    """
+    if not schema:
+        return table
+
+    columns = []
+    for name, values in zip(table.column_names, table.columns):
+        target = schema.get(column_key(name))
+        columns.append(values if target is None else cast_column(values, target))
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+def cast_column(values: pa.ChunkedArray, target: pa.DataType) -> pa.ChunkedArray:
+    """
+    Cast one text column to its declared type without failing on bad cells
+
+    Args:
+        values: Text column
+        target: Declared type
+
+    Returns:
+        Column of the declared type
+    """
+    if target == pa.string():
+        return values
+    if pa.types.is_dictionary(target):
+        return pc.dictionary_encode(values)
+
+    text = pc.utf8_trim_whitespace(values)
+    present = pc.fill_null(pc.not_equal(text, ''), False)
+
+    if pa.types.is_boolean(target):
+        flags = pc.is_in(pc.utf8_lower(text), value_set=pa.array(TRUE_VALUES))
+        return pc.if_else(present, flags, pa.scalar(None, pa.bool_()))
+
+    numeric = pc.fill_null(pc.match_substring_regex(text, NUMBER_PATTERN), False)
+    numbers = pc.cast(pc.if_else(numeric, text, pa.scalar(None, pa.string())), pa.float64())
+
+    if pa.types.is_integer(target):
+        integers = pc.cast(pc.trunc(numbers), target)
+        return pc.if_else(present, pc.fill_null(integers, 0), pa.scalar(None, target))
+
+    return pc.cast(numbers, target)
+
+def to_frame(table: pa.Table) -> pd.DataFrame:
+    """
+    Convert a typed report table to pandas
+
+    Text stays Arrow-backed instead of becoming Python strings, integers
+    and flags become nullable pandas dtypes and dictionary columns become
+    categoricals.
+
+    Args:
+        table: Table from apply_schema
+
+    Returns:
+        DataFrame with the same columns
+    """
+    return table.to_pandas(types_mapper=PANDAS_TYPES.get)
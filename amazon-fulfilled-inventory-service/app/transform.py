@@ -0,0 +1,55 @@
+import logging
+import numpy as np
+import pandas as pd
+from typing import List, Any, Tuple
+
+# Configure logging
+logger = logging.getLogger("report-transform")
+
+def to_python_column(series: pd.Series) -> List[Any]:
+    """
+    Convert a column to a list of native Python values with None for nulls
+
+    Args:
+        series: DataFrame column
+
+    Returns:
+        List of Python values ready for the database driver
+    """
+    values = series.astype(object)
+    return values.where(series.notna(), None).tolist()
+
+def to_records(chunk: pd.DataFrame, columns: List[str]) -> List[Tuple[Any, ...]]:
+    """
+    Convert a chunk to row tuples of native Python values, column by column
+
+    Args:
+        chunk: DataFrame chunk
+        columns: Columns to include, in tuple order
+
+    Returns:
+        List of row tuples
+    """
+    return list(zip(*(to_python_column(chunk[col]) for col in columns)))
+
+def normalize_quantity_columns(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast every *-quantity column to a nullable integer, one whole column at a time
+
+    Invalid quantities become 0 and blank cells stay null.
+
+    Args:
+        chunk: DataFrame chunk with standardized column names
+
+    Returns:
+        DataFrame chunk with normalized quantity columns
+    """
+    for col in chunk.columns:
+        # Columns already typed by the report schema need no cast
+        if not col.endswith('-quantity') or pd.api.types.is_integer_dtype(chunk[col]):
+            continue
+        present = chunk[col].notna() & (chunk[col].astype(str).str.strip() != '')
+        numbers = pd.to_numeric(chunk[col], errors='coerce').fillna(0)
+        chunk[col] = numbers.where(present).apply(np.trunc).astype('Int64')
+
+    return chunk
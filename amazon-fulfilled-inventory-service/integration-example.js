@@ -96,20 +96,17 @@ async function getInventoryStats() {
 }
 
 /**
- * Process an Amazon-fulfilled Inventory report file
+ * Queue an Amazon-fulfilled Inventory report file for processing
  * 
  * @param {string} filePath - Path to the report file
- * @returns {Promise<Object>} - Processing result
+ * @returns {Promise<Object>} - Queued job with the file ID to poll
  */
 async function processReport(filePath) {
   try {
     // Make the API request
-    const response = await fetch(`${FBA_INVENTORY_API_URL}/api/reports/upload`, {
+    const params = new URLSearchParams({ file_path: filePath });
+    const response = await fetch(`${FBA_INVENTORY_API_URL}/api/reports/upload?${params.toString()}`, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({ file_path: filePath }),
     });
     
     // Handle errors
@@ -118,7 +115,7 @@ async function processReport(filePath) {
       throw new Error(`API request failed: ${response.status} ${response.statusText} - ${errorText}`);
     }
     
-    // Return the processing result
+    // Return the queued job
     return await response.json();
   } catch (error) {
     console.error(`Error processing report:`, error);
@@ -126,6 +123,31 @@ async function processReport(filePath) {
   }
 }
 
+/**
+ * Get the processing status of a report
+ * 
+ * @param {string} fileId - File ID returned by processReport
+ * @returns {Promise<Object>} - Status, progress and throughput of the report
+ */
+async function getReportStatus(fileId) {
+  try {
+    // Make the API request
+    const response = await fetch(`${FBA_INVENTORY_API_URL}/api/reports/${fileId}`);
+    
+    // Handle errors
+    if (!response.ok) {
+      const errorText = await response.text();
+      throw new Error(`API request failed: ${response.status} ${response.statusText} - ${errorText}`);
+    }
+    
+    // Return the report status
+    return await response.json();
+  } catch (error) {
+    console.error(`Error fetching report status ${fileId}:`, error);
+    throw error;
+  }
+}
+
 // Example usage
 async function exampleUsage() {
   try {
@@ -143,7 +165,11 @@ async function exampleUsage() {
     
     // Process a report file
     const result = await processReport('/path/to/fba-inventory-report.txt');
-    console.log('Processing result:', result);
+    console.log('Queued report:', result);
+    
+    // Check the processing status
+    const status = await getReportStatus(result.file_id);
+    console.log('Report status:', status);
   } catch (error) {
     console.error('Example usage error:', error);
   }
@@ -155,4 +181,5 @@ module.exports = {
   batchGetInventory,
   getInventoryStats,
   processReport,
+  getReportStatus,
 }; 
\ No newline at end of file
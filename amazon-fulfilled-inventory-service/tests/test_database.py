@@ -1,8 +1,10 @@
 import pytest
 import asyncio
+from contextlib import asynccontextmanager
 import asyncpg
 from unittest.mock import patch, MagicMock, AsyncMock
 
+from app import database
 from app.database import Database
 
 @pytest.fixture
@@ -149,4 +151,70 @@ async def test_transaction(mock_db):
     
     # Check that the transaction was rolled back
     mock_transaction = conn_mock.transaction()
-    mock_transaction.rollback.assert_called_once() 
\ No newline at end of file
+    mock_transaction.rollback.assert_called_once() 
+
+def test_get_statement_reuses_cached_query():
+    """Test that repeated write shapes share one cached statement"""
+    from app import database
+    database._statement_cache.clear()
+    db = Database(pool=None)
+
+    first = db.get_statement("fba_inventory", ("seller-sku", "afn-total-quantity"), "insert_returning_id")
+    second = db.get_statement("fba_inventory", ("seller-sku", "afn-total-quantity"), "insert_returning_id")
+
+    assert first is second
+    assert first == (
+        'INSERT INTO fba_inventory ("seller-sku", "afn-total-quantity") '
+        'VALUES ($1, $2) RETURNING id'
+    )
+    database._statement_cache.clear()
+
+class FakeConnection:
+    """Connection whose transactions and savepoints roll back a list of written rows"""
+
+    def __init__(self):
+        self.rows = []
+        self.transactions = 0
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        snapshot = list(self.rows)
+        try:
+            yield
+        except Exception:
+            self.rows[:] = snapshot
+            raise
+
+def test_write_rows_isolated_bisects_to_failing_rows():
+    """Test that failing rows are isolated and the other rows are kept"""
+    conn = FakeConnection()
+    db = Database(database._ConnectionPool(conn))
+    written = []
+
+    async def write(tx, batch):
+        for row in batch:
+            tx.pool.conn.rows.append(row)
+            if row in (3, 6):
+                raise ValueError(f"bad row {row}")
+        return len(batch)
+
+    failures = asyncio.run(db.write_rows_isolated([1, 2, 3, 4, 5, 6, 7, 8], write, on_written=written.append))
+
+    assert [row for row, _ in failures] == [3, 6]
+    assert conn.rows == [1, 2, 4, 5, 7, 8]
+    assert sum(written) == 6
+
+def test_write_rows_isolated_uses_one_savepoint_without_failures():
+    """Test that a clean batch is written under a single savepoint"""
+    conn = FakeConnection()
+    db = Database(database._ConnectionPool(conn))
+
+    async def write(tx, batch):
+        tx.pool.conn.rows.extend(batch)
+
+    failures = asyncio.run(db.write_rows_isolated([1, 2, 3], write))
+
+    assert failures == []
+    assert conn.rows == [1, 2, 3]
+    assert conn.transactions == 2
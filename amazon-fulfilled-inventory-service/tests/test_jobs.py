@@ -0,0 +1,128 @@
+import pytest
+import asyncio
+from unittest.mock import MagicMock
+
+from app import jobs
+from app.config import settings
+from app.database import Database
+from app.models import ReportProcessingResult
+from app.processor import ReportProcessor
+
+@pytest.fixture(autouse=True)
+def reset_jobs():
+    """Start every test without jobs or ingest slots"""
+    jobs._jobs.clear()
+    jobs._ingest_slots = None
+    yield
+    jobs._jobs.clear()
+    jobs._ingest_slots = None
+
+@pytest.fixture
+def fake_processor(monkeypatch):
+    """Replace queueing and processing with fakes that track concurrency"""
+    state = {"running": 0, "peak": 0, "processed": [], "resumed": [], "interrupted": []}
+
+    async def fake_queue_report(self, file_path):
+        return f"file-{file_path}"
+
+    async def fake_process_report(self, file_path, file_id=None, resume=False):
+        state["resumed"].append(resume)
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.01)
+        state["running"] -= 1
+        state["processed"].append(file_id)
+        return ReportProcessingResult(processed_rows=1, status="success", message="done")
+
+    async def fake_set_file_interrupted(self, file_id):
+        state["interrupted"].append(file_id)
+
+    monkeypatch.setattr(ReportProcessor, "queue_report", fake_queue_report)
+    monkeypatch.setattr(ReportProcessor, "set_file_interrupted", fake_set_file_interrupted)
+    monkeypatch.setattr(ReportProcessor, "process_report", fake_process_report)
+    return state
+
+def test_submit_report_returns_before_processing(fake_processor):
+    """Test that submitting returns the file ID while the job is still queued"""
+    async def run():
+        file_id = await jobs.submit_report(MagicMock(spec=Database), "a.txt")
+        assert file_id == "file-a.txt"
+        assert jobs.active_jobs() == 1
+        assert fake_processor["processed"] == []
+        await asyncio.gather(*jobs._jobs.values())
+
+    asyncio.run(run())
+
+    assert fake_processor["processed"] == ["file-a.txt"]
+    assert jobs.active_jobs() == 0
+
+def test_submit_report_bounds_concurrent_ingests(fake_processor, monkeypatch):
+    """Test that at most MAX_CONCURRENT_INGESTS reports are processed at once"""
+    monkeypatch.setattr(settings, "MAX_CONCURRENT_INGESTS", 2)
+
+    async def run():
+        for name in ("a.txt", "b.txt", "c.txt", "d.txt", "e.txt"):
+            await jobs.submit_report(MagicMock(spec=Database), name)
+        await asyncio.gather(*jobs._jobs.values())
+
+    asyncio.run(run())
+
+    assert fake_processor["peak"] == 2
+    assert len(fake_processor["processed"]) == 5
+
+def test_cancel_jobs(fake_processor):
+    """Test that shutdown cancels running and waiting jobs"""
+    async def run():
+        await jobs.submit_report(MagicMock(spec=Database), "a.txt")
+        await jobs.submit_report(MagicMock(spec=Database), "b.txt")
+        await jobs.cancel_jobs()
+
+    asyncio.run(run())
+
+    assert jobs.active_jobs() == 0
+    assert fake_processor["processed"] == []
+
+def test_cancel_jobs_interrupts_waiting_files(fake_processor, monkeypatch):
+    """Test that jobs cancelled before getting an ingest slot leave their files to be resumed"""
+    monkeypatch.setattr(settings, "MAX_CONCURRENT_INGESTS", 1)
+
+    async def run():
+        await jobs.submit_report(MagicMock(spec=Database), "a.txt")
+        await jobs.submit_report(MagicMock(spec=Database), "b.txt")
+        await jobs.submit_report(MagicMock(spec=Database), "c.txt")
+        # Let the first job take the only slot while the others wait on it
+        await asyncio.sleep(0)
+        await jobs.cancel_jobs()
+
+    asyncio.run(run())
+
+    assert jobs.active_jobs() == 0
+    assert fake_processor["processed"] == []
+    assert fake_processor["interrupted"] == ["file-b.txt", "file-c.txt"]
+
+def test_resume_interrupted_reports(fake_processor, monkeypatch):
+    """Test that claimed files are processed again from their checkpoint"""
+    async def fake_claim(self):
+        return [{"id": "file-x", "file_path": "x.txt"}, {"id": "file-y", "file_path": "y.txt"}]
+
+    monkeypatch.setattr(ReportProcessor, "claim_interrupted_files", fake_claim)
+
+    async def run():
+        resumed = await jobs.resume_interrupted_reports(MagicMock(spec=Database))
+        assert resumed == ["file-x", "file-y"]
+        await asyncio.gather(*jobs._jobs.values())
+
+    asyncio.run(run())
+
+    assert sorted(fake_processor["processed"]) == ["file-x", "file-y"]
+    assert fake_processor["resumed"] == [True, True]
+
+def test_queue_report_missing_file():
+    """Test that a missing file is rejected before it is registered"""
+    db = MagicMock(spec=Database)
+    processor = ReportProcessor(db=db)
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(processor.queue_report("/nonexistent/report.txt"))
+
+    db.execute.assert_not_called()
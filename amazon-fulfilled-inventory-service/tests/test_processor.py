@@ -1,3 +1,4 @@
+import hashlib
 import pytest
 import asyncio
 from unittest.mock import patch, MagicMock, mock_open
@@ -6,7 +7,10 @@ import os
 import json
 from datetime import datetime
 
-from app.processor import ReportProcessor
+from app.config import settings
+from app.processor import ReportProcessor, detect_skus_before, prepare_chunk
+from app.duplicates import DuplicateSkuDetector
+from app.reader import iter_report_chunks
 from app.database import Database
 
 # Test data as would be found in a CSV file
@@ -37,6 +41,22 @@ def mock_db():
     
     return mock
 
+def write_rows_one_by_one(mock):
+    """Make a mock database write isolated rows one at a time, without a transaction"""
+    async def mock_write_rows_isolated(rows, write, on_written=None):
+        failures = []
+        for row in rows:
+            try:
+                result = await write(mock, [row])
+            except Exception as e:
+                failures.append((row, e))
+                continue
+            if on_written:
+                on_written(result)
+        return failures
+
+    mock.write_rows_isolated.side_effect = mock_write_rows_isolated
+
 @pytest.fixture
 def processor(mock_db):
     """Create a processor instance with mocked database"""
@@ -133,4 +153,158 @@ def test_transform_data(processor, sample_dataframe):
     # Check specific transformations if applicable
     # For example, if your processor renames columns:
     if "product_name" in transformed_df.columns:
-        assert transformed_df["product_name"].iloc[0] == "ATOM SKATES Outdoor Quad Roller Wheels" 
\ No newline at end of file
+        assert transformed_df["product_name"].iloc[0] == "ATOM SKATES Outdoor Quad Roller Wheels" 
+def test_process_file_rows_prefetches_existing_ids(sample_dataframe, monkeypatch):
+    """Test that existing SKUs are resolved with one query per chunk"""
+    monkeypatch.setattr(settings, "REPORT_WRITER_CONCURRENCY", 1)
+    mock = MagicMock(spec=Database)
+    lookups = []
+    executed = []
+
+    async def mock_fetch_all(query, *args):
+        lookups.append(args)
+        return [{"seller-sku": "AM-1000-BK-4W-A1", "id": 7}]
+
+    async def mock_update_row(table, row_id, data):
+        executed.append(("update", table, row_id))
+        return "UPDATE 1"
+
+    async def mock_insert_row(table, data, returning_id=False):
+        executed.append(("insert", table, returning_id))
+        return {"id": 8}
+
+    mock.fetch_all.side_effect = mock_fetch_all
+    mock.update_row.side_effect = mock_update_row
+    mock.insert_row.side_effect = mock_insert_row
+    write_rows_one_by_one(mock)
+
+    processor = ReportProcessor(db=mock)
+    processed = asyncio.run(processor._process_file_rows([prepare_chunk(sample_dataframe.copy())], "file-1"))
+
+    assert processed == 2
+    assert lookups == [(["AM-1000-BK-4W-A1", "AM-1000-BL-4W-A3"],)]
+    assert executed == [("update", "fba_inventory", 7), ("insert", "fba_inventory", True)]
+
+def test_process_file_rows_reports_failing_rows(sample_dataframe, monkeypatch):
+    """Test that a failing row is stored with its report row without failing the rest of the chunk"""
+    monkeypatch.setattr(settings, "REPORT_WRITER_CONCURRENCY", 1)
+    mock = MagicMock(spec=Database)
+
+    async def mock_fetch_all(query, *args):
+        return []
+
+    async def mock_insert_row(table, data, returning_id=False):
+        if data["seller-sku"] == "AM-1000-BK-4W-A1":
+            raise ValueError("value too long")
+        return {"id": 8}
+
+    async def mock_execute(query, *args):
+        return "UPDATE 1"
+
+    mock.fetch_all.side_effect = mock_fetch_all
+    mock.insert_row.side_effect = mock_insert_row
+    mock.execute.side_effect = mock_execute
+    write_rows_one_by_one(mock)
+
+    copies = []
+
+    async def mock_copy_records(table, columns, records):
+        copies.append((table, columns, records))
+
+    mock.copy_records.side_effect = mock_copy_records
+
+    processor = ReportProcessor(db=mock)
+    processed = asyncio.run(processor._process_file_rows([prepare_chunk(sample_dataframe.copy())], "file-1"))
+
+    assert processed == 1
+    assert copies == [(
+        "report_row_errors",
+        ["file_id", "row_number", "sku", "message"],
+        [("file-1", 1, "AM-1000-BK-4W-A1", "value too long")],
+    )]
+
+def test_process_report_skips_already_processed_content(tmp_path, monkeypatch):
+    """Test that a report with the content of a completed upload is not written again"""
+    monkeypatch.setattr(settings, "PARSE_WORKERS", 0)
+    path = tmp_path / "report.txt"
+    path.write_text(SAMPLE_CSV_DATA, encoding="utf-8")
+
+    mock_db = MagicMock(spec=Database)
+    executed = []
+
+    async def mock_execute(query, *args):
+        executed.append((query, args))
+        return "UPDATE 1"
+
+    async def mock_fetch_one(query, *args):
+        return {"id": "prior-file", "processed_rows": 3}
+
+    async def unexpected_write(*args, **kwargs):
+        raise AssertionError("rows should not be written for a duplicate report")
+
+    mock_db.execute.side_effect = mock_execute
+    mock_db.fetch_one.side_effect = mock_fetch_one
+    processor = ReportProcessor(db=mock_db)
+    processor._process_file_rows = unexpected_write
+
+    result = asyncio.run(processor.process_report(str(path), file_id="new-file"))
+
+    assert result.status == "success"
+    assert result.duplicate_of == "prior-file"
+    assert result.processed_rows == 3
+
+    # The new upload is registered with its hash and completed with the earlier row count
+    register_args = executed[0][1]
+    assert hashlib.sha256(path.read_bytes()).hexdigest() in register_args
+    assert executed[-1][1][:2] == ("completed", 3)
+
+def test_process_file_rows_checkpoints_after_resume(sample_dataframe):
+    """Test that a resumed run continues the row count and checkpoints the file row reached"""
+    mock_db = MagicMock(spec=Database)
+
+    async def mock_fetch_all(query, *args):
+        return []
+
+    async def mock_insert_row(table, data, returning_id=False):
+        return {"id": 1}
+
+    mock_db.fetch_all.side_effect = mock_fetch_all
+    mock_db.insert_row.side_effect = mock_insert_row
+    write_rows_one_by_one(mock_db)
+    saved = []
+
+    async def mock_execute(query, *args):
+        saved.append(args)
+        return "UPDATE 1"
+
+    mock_db.execute.side_effect = mock_execute
+    processor = ReportProcessor(db=mock_db)
+
+    processed = asyncio.run(processor._process_file_rows(
+        [prepare_chunk(sample_dataframe.copy())], "file-1", start_row=100, processed_before=40
+    ))
+
+    assert processed == 42
+
+    # The final progress write carries the checkpoint of the last chunk
+    file_id, processed_rows, checkpoint = saved[-1]
+    assert (file_id, processed_rows) == ("file-1", 42)
+    assert json.loads(checkpoint) == {"rows": 100 + 2, "processed_rows": 42}
+
+def test_resume_completes_duplicate_groups_across_checkpoint(mock_db, tmp_path):
+    """Test that a resumed run groups a duplicate SKU with its occurrence before the checkpoint"""
+    report_file = tmp_path / "inventory.txt"
+    skus = ["SKU-A", "SKU-B", "SKU-C", "SKU-B", "SKU-D"]
+    rows = [f"{sku}\tB00000000{i}\tX00000000{i}\tItem {i}\t{i}\n" for i, sku in enumerate(skus)]
+    report_file.write_text("sku\tasin\tfnsku\tproduct-name\tafn-total-quantity\n" + "".join(rows), encoding="utf-8")
+
+    processor = ReportProcessor(db=mock_db)
+    duplicates = DuplicateSkuDetector()
+    detect_skus_before(duplicates, str(report_file), 2, start_row=3)
+    chunks = [prepare_chunk(chunk[chunk.index >= 3].copy()) for chunk in iter_report_chunks(str(report_file), 2)]
+
+    asyncio.run(processor._process_file_rows(
+        [chunk for chunk in chunks if len(chunk)], "file-1", start_row=3, processed_before=3, duplicates=duplicates
+    ))
+
+    assert duplicates.groups == {"SKU-B": [1, 3]}
@@ -0,0 +1,83 @@
+import gzip
+import hashlib
+import pytest
+import zipfile
+import pandas as pd
+
+from app.reader import (
+    ReportTooLargeError,
+    check_report_size,
+    count_report_rows,
+    estimate_chunk_rows,
+    iter_report_chunks,
+    open_report,
+    scan_report,
+)
+
+HEADER = "sku\tfnsku\tyour-price\tafn-total-quantity\n"
+
+@pytest.fixture
+def report_file(tmp_path):
+    """Write a small FBA inventory report to disk"""
+    path = tmp_path / "fba-inventory.txt"
+    rows = [f"SKU-{i}\tX00{i}\t{i}.99\t{i}\n" for i in range(25)]
+    path.write_text(HEADER + "".join(rows), encoding="utf-8")
+    return str(path)
+
+def test_count_report_rows(report_file):
+    """Test counting data rows without parsing"""
+    assert count_report_rows(report_file) == 25
+
+def test_count_report_rows_without_trailing_newline(tmp_path):
+    """Test counting when the last line has no newline"""
+    path = tmp_path / "report.txt"
+    path.write_text(HEADER + "SKU-1\tX001\t1.99\t1\nSKU-2\tX002\t2.99\t2", encoding="utf-8")
+    assert count_report_rows(str(path)) == 2
+
+def test_scan_report(report_file):
+    """Test counting rows and hashing the content in one pass"""
+    with open(report_file, "rb") as f:
+        expected_hash = hashlib.sha256(f.read()).hexdigest()
+
+    assert scan_report(report_file) == (25, expected_hash)
+
+def test_check_report_size(report_file):
+    """Test enforcement of the maximum report size"""
+    assert check_report_size(report_file, max_size_mb=1) > 0
+    assert check_report_size(report_file, max_size_mb=0) > 0
+
+    with pytest.raises(ReportTooLargeError):
+        check_report_size(report_file, max_size_mb=0.0001)
+
+def test_estimate_chunk_rows(report_file):
+    """Test that the chunk size respects both the row cap and the memory budget"""
+    assert estimate_chunk_rows(report_file, memory_budget_mb=64, max_rows=10) == 10
+    assert estimate_chunk_rows(report_file, memory_budget_mb=0, max_rows=10) == 1
+
+def test_iter_report_chunks(report_file):
+    """Test streaming a report in chunks with a continuous index"""
+    chunks = list(iter_report_chunks(report_file, chunk_size=10))
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert chunks[1].index[0] == 10
+    assert list(chunks[0].columns) == ["sku", "fnsku", "your-price", "afn-total-quantity"]
+    assert pd.concat(chunks)["sku"].tolist() == [f"SKU-{i}" for i in range(25)]
+
+def test_scan_report_hashes_decompressed_content(report_file, tmp_path):
+    """Test that a gzipped report counts and hashes the same as the plain report"""
+    path = tmp_path / "report.txt.gz"
+    with open(report_file, "rb") as source, gzip.open(path, "wb") as target:
+        target.write(source.read())
+
+    assert scan_report(str(path)) == scan_report(report_file)
+    assert [len(chunk) for chunk in iter_report_chunks(str(path), chunk_size=10)] == [10, 10, 5]
+
+def test_open_report_rejects_zip_with_several_files(tmp_path):
+    """Test that a zip archive must hold a single report"""
+    path = tmp_path / "reports.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("a.txt", HEADER)
+        archive.writestr("b.txt", HEADER)
+
+    with pytest.raises(ValueError):
+        open_report(str(path))
@@ -0,0 +1,28 @@
+import pytest
+import io
+import pandas as pd
+
+from app.transform import normalize_quantity_columns, to_records
+
+# Sample FBA inventory data (tab separated)
+SAMPLE_TSV_DATA = (
+    "seller-sku\tyour-price\tafn-total-quantity\tafn-reserved-quantity\n"
+    "SKU-1\t19.99\t10\t2\n"
+    "SKU-2\t\tmany\t\n"
+)
+
+@pytest.fixture
+def sample_dataframe():
+    """Create a dataframe from TSV data"""
+    return pd.read_csv(io.StringIO(SAMPLE_TSV_DATA), sep="\t")
+
+def test_normalize_quantity_columns(sample_dataframe):
+    """Test column-wise casting of quantity columns"""
+    chunk = normalize_quantity_columns(sample_dataframe)
+    records = to_records(chunk, ["seller-sku", "your-price", "afn-total-quantity", "afn-reserved-quantity"])
+
+    assert records == [
+        ("SKU-1", 19.99, 10, 2),
+        ("SKU-2", None, 0, None),
+    ]
+    assert type(records[0][2]) is int
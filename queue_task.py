@@ -4,12 +4,51 @@ import uuid
 import os
 import sys
 
+# Seconds an enqueued file_id stays claimed if its task is never acknowledged
+ENQUEUE_KEY_TTL_SECONDS = int(os.getenv('ENQUEUE_KEY_TTL_SECONDS', str(7 * 24 * 3600)))
+
+# Tasks that ingest a full snapshot of a report, so only the newest queued one matters
+SNAPSHOT_TASKS = ('process_report', 'process_all_listings_report')
+
+# Atomically claim the file_id, queue the task and record it as the newest snapshot.
+# KEYS: enqueued key, queue, latest key (snapshot tasks only)
+# ARGV: task JSON, task id, key TTL, file_id
+ENQUEUE_SCRIPT = """
+if not redis.call('SET', KEYS[1], ARGV[2], 'NX', 'EX', ARGV[3]) then
+    return 0
+end
+redis.call('LPUSH', KEYS[2], ARGV[1])
+if KEYS[3] then
+    redis.call('SET', KEYS[3], ARGV[4], 'EX', ARGV[3])
+end
+return 1
+"""
+
 # Create Redis client
 def get_redis_client():
     redis_url = os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0')
     print(f"Connecting to Redis at: {redis_url}")
     return redis.Redis.from_url(redis_url)
 
+def enqueue_task(redis_client, task, file_id, queue="celery"):
+    """
+    Queue a task for a file unless a task for that file_id is already queued
+
+    The file_id stays claimed until the worker acknowledges its task. For full
+    snapshot reports, the file is also recorded as the newest of its report
+    type and account (the task's user_id), so the worker skips older
+    snapshots still in the queue.
+
+    Returns:
+        True if the task was queued, False if the file_id was already queued
+    """
+    keys = [f"{queue}:enqueued:{file_id}", queue]
+    if task["task"] in SNAPSHOT_TASKS:
+        account = task.get("kwargs", {}).get("user_id") or "default"
+        keys.append(f"{queue}:latest:{task['task']}:{account}")
+    enqueue = redis_client.register_script(ENQUEUE_SCRIPT)
+    return bool(enqueue(keys=keys, args=[json.dumps(task), task["id"], ENQUEUE_KEY_TTL_SECONDS, file_id]))
+
 def queue_file_for_processing():
     try:
         # Use command line argument for file_id and file_name if provided, otherwise use default
@@ -39,8 +78,10 @@ def queue_file_for_processing():
             }
         }
         
-        # Add task to Celery queue
-        redis_client.lpush("celery", json.dumps(task))
+        # Add task to Celery queue, once per file
+        if not enqueue_task(redis_client, task, file_id):
+            print(f"File {file_id} is already queued, not queueing it again")
+            return
         print("Task successfully added to Redis queue")
         print("Task ID:", task_id)
         
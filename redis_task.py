@@ -1,5 +1,6 @@
 import redis
-import json
+
+from queue_task import enqueue_task
 
 # Connect to Redis
 redis_client = redis.Redis.from_url("redis://redis:6379/0")
@@ -12,7 +13,8 @@ task = {
     "kwargs": {}
 }
 
-# Push the task to the Redis queue
-redis_client.rpush("celery", json.dumps(task))
-
-print("Task added to Redis queue") 
\ No newline at end of file
+# Push the task to the Redis queue, unless this file is already queued
+if enqueue_task(redis_client, task, task["args"][1]):
+    print("Task added to Redis queue")
+else:
+    print("File is already queued, task not added") 
\ No newline at end of file